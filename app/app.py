@@ -1,42 +1,331 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, field_validator
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from contextlib import asynccontextmanager
+from functools import partial
+import hashlib
+import json
 import joblib
 import pandas as pd
 import numpy as np
-import shap
+import asyncio
+import hmac
 import logging
+import os
 import sys
+import time
 from pathlib import Path
 
 # Sets up the project root path for imports
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.micro_batching import MicroBatcher
+from src.prediction_cache import PredictionCache
+from src.metrics import MetricsMiddleware, MetricsRegistry
+from src.precomputed_responses import PrecomputedResponse
+from src.name_index import NameIndex, read_name_index
+from src.profiling import ProfilingMiddleware, list_profiles, load_profile, profiling_active
+from src.model_export import NATIVE_SCORER_FILES, load_scorer, predict_proba_native
+from src.model_bundle import latest_bundle_dir, load_bundle
+from src.ensemble import ENSEMBLE_METHODS, combine, ensemble_weights, parse_weights
+from src.model_registry import ModelRegistry, ModelSnapshot, source_fingerprint
+from src.explainers import LinearShapExplainer, BudgetedKernelExplainer
+from src.executors import (
+    BoundedExecutor, PoolSaturatedError, init_worker, predict_in_worker, explain_in_worker
+)
+
 # Sets up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global vars for models and preprocessor
-models = {}
-explainers = {}
-feature_columns = []
-region_lookup = {}
-city_lookup = {}
-preprocessor = None
+# Micro-batching settings for /predict and the size limit for /predict/batch
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+MAX_BATCH_RECORDS = int(os.getenv("MAX_BATCH_RECORDS", "10000"))
+
+# Executor settings for CPU bound model work
+# Thread pool: preprocessing and GIL releasing models (XGBoost, Logistic Regression)
+# Process pool: SHAP explanations and the models listed in PROCESS_POOL_MODELS (set EXPLAIN_PROCESSES=0 to disable)
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "4"))
+INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "64"))
+EXPLAIN_PROCESSES = int(os.getenv("EXPLAIN_PROCESSES", "2"))
+EXPLAIN_QUEUE_LIMIT = int(os.getenv("EXPLAIN_QUEUE_LIMIT", "8"))
+PROCESS_POOL_MODELS = [name for name in os.getenv("PROCESS_POOL_MODELS", "svm").split(",") if name]
+
+# Serves logistic/XGBoost through the compiled NumPy scorers when they are exported
+USE_NATIVE_SCORERS = os.getenv("USE_NATIVE_SCORERS", "1") == "1"
+
+# Serves the latest versioned bundle (results/models/bundles/LATEST) instead of the loose pickles when present
+# BUNDLE_VERIFY checks every bundle array against its manifest hash at load time
+USE_MODEL_BUNDLE = os.getenv("USE_MODEL_BUNDLE", "1") == "1"
+BUNDLE_VERIFY = os.getenv("BUNDLE_VERIFY", "1") == "1"
+
+# Upper bound for the per request nsamples budget on /predict/explain
+MAX_EXPLAIN_NSAMPLES = int(os.getenv("MAX_EXPLAIN_NSAMPLES", "2048"))
+
+# Prediction cache settings (size 0 disables the cache, TTL 0 disables expiry)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+# Per stage latency histograms and request counters served on /metrics (0 disables recording)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Opt-in per request profiling: requests sending X-Profile (or ?profile=1) with X-Profile-Token set to this
+# token run under cProfile, with their model and explainer calls inline; unset leaves the middleware out entirely
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") or None
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(project_root / "results" / "profiles")))
 
-async def load_models():
+# Opt-in typo tolerance: region/city inputs without an exact match map to the closest known name with
+# at least this trigram similarity, reported back as normalized_region/normalized_city. The default 0
+# keeps unmatched inputs as typed, which encode as the unknown density tier
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", "0")) or None
+MAX_AUTOCOMPLETE_LIMIT = 100
+
+# Defaults for /predict/ensemble: mean, weighted (ENSEMBLE_WEIGHTS like "xgboost=2,logistic=1,svm=1") or vote
+ENSEMBLE_METHOD = os.getenv("ENSEMBLE_METHOD", "mean")
+ENSEMBLE_WEIGHTS = parse_weights(os.getenv("ENSEMBLE_WEIGHTS", ""))
+if ENSEMBLE_METHOD not in ENSEMBLE_METHODS:
+    raise ValueError(f"ENSEMBLE_METHOD must be one of {ENSEMBLE_METHODS}, got {ENSEMBLE_METHOD}")
+
+# Startup settings
+# LOAD_EXPLAINERS: eager loads SHAP explainers at startup, lazy on the first /predict/explain, off never
+# BACKGROUND_STARTUP: opens the port immediately and loads in the background, /ready gates traffic
+LOAD_EXPLAINERS = os.getenv("LOAD_EXPLAINERS", "lazy")
+BACKGROUND_STARTUP = os.getenv("BACKGROUND_STARTUP", "0") == "1"
+WARMUP_BATCH_ROWS = int(os.getenv("WARMUP_BATCH_ROWS", "64"))
+if LOAD_EXPLAINERS not in ('eager', 'lazy', 'off'):
+    raise ValueError(f"LOAD_EXPLAINERS must be eager, lazy or off, got {LOAD_EXPLAINERS}")
+
+# Hot reload settings
+# ADMIN_TOKEN: enables POST /admin/reload for requests sending it in X-Admin-Token
+# MODEL_WATCH_SECONDS: polls results/models and the dropdown CSVs, reloading when they change (0 = off)
+# RELOAD_DRAIN_SECONDS: how long a replaced version waits for its in-flight requests before its pools stop
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "0"))
+RELOAD_DRAIN_SECONDS = float(os.getenv("RELOAD_DRAIN_SECONDS", "30"))
+
+MODELS_DIR = project_root / "results" / "models"
+DATA_DIR = project_root / "data" / "processed"
+
+# Every model, explainer, preprocessor and lookup lives in the registry's active snapshot,
+# the thread pool is shared by all snapshots
+registry = ModelRegistry()
+executors = {}
+background_tasks = set()
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+metrics = MetricsRegistry('startup_api', enabled=METRICS_ENABLED)
+metrics.describe('stage_duration_seconds', 'Time spent per request stage (normalize, preprocess, inference, explanation, serialization)')
+metrics.describe('request_duration_seconds', 'End to end request latency by endpoint')
+metrics.describe('requests_total', 'Requests by endpoint and status code')
+metrics.describe('errors_total', 'Failed requests by endpoint and error kind')
+metrics.describe('model_reloads_total', 'Model reloads by trigger and result')
+
+# Readiness state reported by /ready, per artifact load and warmup timings live on each ModelSnapshot
+startup_state = {'ready': False, 'startup_seconds': None, 'error': None, 'last_reload_error': None}
+
+def artifact_version(path: Path) -> str:
     """
-    Loads all trained models and SHAP explainers on startup
+    Identifies a model file by size and modification time, changes whenever it is retrained
     """
-    global models, explainers, feature_columns, preprocessor, region_lookup, city_lookup
+    stat = path.stat()
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+async def load_artifact(key: str, loader: Callable[[Path], Any], path: Path, report: Dict[str, Any]) -> Any:
+    """
+    Loads one artifact on a worker thread and records its load time in report, shown by /ready
+    Returns None when the file does not exist
+    """
+    if not path.exists():
+        report[key] = {"status": "missing", "path": str(path)}
+        return None
     
+    start = time.perf_counter()
+    artifact = await asyncio.to_thread(loader, path)
+    seconds = time.perf_counter() - start
+    report[key] = {"status": "loaded", "path": str(path), "seconds": round(seconds, 4)}
+    logger.info(f"Loaded {key} from {path} in {seconds:.3f}s")
+    return artifact
+
+def import_model_libraries(with_shap: bool) -> None:
+    """
+    Imports the libraries the pickles reference before they load in parallel
+    Threads unpickling at once would otherwise import the same packages concurrently and can deadlock
+    """
+    import sklearn.linear_model, sklearn.svm, xgboost
+    if with_shap:
+        import shap
+
+def is_kernel_explainer(explainer: Any) -> bool:
+    """
+    isinstance check against shap.KernelExplainer without importing shap
+    Unpickling a KernelExplainer has already imported it
+    """
+    shap = sys.modules.get('shap')
+    return shap is not None and isinstance(explainer, shap.KernelExplainer)
+
+def explanation_output_space(explainer: Any) -> str:
+    """
+    Units of an explainer's SHAP values
+    TreeExplainer explains the raw margin unless built with model_output='probability'
+    """
+    output_space = getattr(explainer, 'output_space', None)
+    if output_space is not None:
+        return output_space
+    if type(explainer).__name__ == 'TreeExplainer' and getattr(explainer, 'model_output', 'raw') == 'raw':
+        return 'log_odds'
+    return 'probability'
+
+def prepare_explainer(model_name: str, explainer: Any, models: Dict[str, Any]) -> Any:
+    """
+    Older training runs pickled a sampled KernelExplainer for LR, upgrades it to the exact one
+    """
+    if model_name == 'logistic' and is_kernel_explainer(explainer) and 'logistic' in models:
+        logger.info("Replaced logistic KernelExplainer with exact LinearShapExplainer")
+        return LinearShapExplainer.from_kernel_explainer(models['logistic'], explainer)
+    return explainer
+
+async def load_from_pickles(models_dir: Path, report: Dict[str, Any]) -> ModelSnapshot:
+    """
+    Loads the loose model, scorer, explainer and preprocessor pickles concurrently
+    """
+    # Model pickles, svm_approx only exists once it has been trained
+    model_files = {
+        'logistic': models_dir / 'logistic_regression_best.pkl',
+        'xgboost': models_dir / 'xgboost_best.pkl', 
+        'svm': models_dir / 'svm_rbf_best.pkl',
+        'svm_approx': models_dir / 'svm_approx_best.pkl'
+    }
+    explainer_files = {
+        'logistic': models_dir / 'logistic_explainer.pkl',
+        'xgboost': models_dir / 'xgboost_explainer.pkl',
+        'svm': models_dir / 'svm_explainer.pkl',
+        'svm_approx': models_dir / 'svm_approx_explainer.pkl'
+    }
+    
+    # Compiled NumPy scorers, skipping any older than their source model
+    native_files = {}
+    if USE_NATIVE_SCORERS:
+        for name, filename in NATIVE_SCORER_FILES.items():
+            path = models_dir / filename
+            if not model_files[name].exists() or not path.exists():
+                continue
+            if path.stat().st_mtime_ns < model_files[name].stat().st_mtime_ns:
+                logger.warning(f"Native scorer {path.name} is older than its model, run python -m src.model_export")
+                continue
+            native_files[name] = path
+    
+    # Queues every independent artifact, unpickling overlaps on worker threads
+    jobs = {}
+    for name, path in model_files.items():
+        jobs[f"model:{name}"] = load_artifact(f"model:{name}", joblib.load, path, report)
+    for name, path in native_files.items():
+        jobs[f"native_scorer:{name}"] = load_artifact(f"native_scorer:{name}", lambda p: load_scorer(str(p)), path, report)
+    if LOAD_EXPLAINERS == 'eager':
+        for name, path in explainer_files.items():
+            jobs[f"explainer:{name}"] = load_artifact(f"explainer:{name}", joblib.load, path, report)
+    jobs['feature_columns'] = load_artifact('feature_columns', joblib.load, models_dir / 'feature_columns.pkl', report)
+    jobs['preprocessor'] = load_artifact('preprocessor', joblib.load, models_dir / 'preprocessor.pkl', report)
+    loaded = dict(zip(jobs, await asyncio.gather(*jobs.values())))
+    
+    models = {}
+    model_versions = {}
+    artifact_paths = {'models': {}, 'explainers': {}, 'bundle': None}
+    for name, path in model_files.items():
+        if loaded[f"model:{name}"] is not None:
+            models[name] = loaded[f"model:{name}"]
+            model_versions[name] = artifact_version(path)
+            artifact_paths['models'][name] = str(path)
+        else:
+            logger.warning(f"Model file not found: {path}")
+    
+    native_scorers = {}
+    for name in native_files:
+        native_scorers[name] = loaded[f"native_scorer:{name}"]
+        model_versions[name] += "-native"
+    
+    # Explainers are loaded now (eager), on first /predict/explain (lazy) or never (off)
+    explainers = {}
+    if LOAD_EXPLAINERS != 'off':
+        for name, path in explainer_files.items():
+            if not path.exists():
+                logger.warning(f"Explainer file not found: {path}")
+                continue
+            artifact_paths['explainers'][name] = str(path)
+            if LOAD_EXPLAINERS == 'eager':
+                explainers[name] = prepare_explainer(name, loaded[f"explainer:{name}"], models)
+            else:
+                report[f"explainer:{name}"] = {"status": "lazy", "path": str(path)}
+    
+    # Loads feature columns
+    feature_columns = loaded['feature_columns']
+    if feature_columns is not None:
+        logger.info(f"Loaded {len(feature_columns)} feature columns")
+    else:
+        logger.warning(f"Feature columns file not found: {models_dir / 'feature_columns.pkl'}")
+        # Uses default from preprocessor
+        feature_columns = []
+    
+    # Pickle runs have no bundle version, so the version is derived from the files that were loaded
+    preprocessor_path = models_dir / 'preprocessor.pkl'
+    sources = dict(model_versions, preprocessor=artifact_version(preprocessor_path) if preprocessor_path.exists() else '')
+    version = "pickles-" + hashlib.sha256(json.dumps(sources, sort_keys=True).encode()).hexdigest()[:12]
+    
+    snapshot = ModelSnapshot(
+        version, models, loaded['preprocessor'], feature_columns, native_scorers, model_versions, artifact_paths
+    )
+    snapshot.explainers.update(explainers)
+    return snapshot
+
+async def load_from_bundle(bundle_dir: Path, report: Dict[str, Any]) -> ModelSnapshot:
+    """
+    Loads a versioned model bundle in one step, its arrays memory-mapped
+    """
+    model_bundle = await load_artifact('bundle', partial(load_bundle, verify=BUNDLE_VERIFY), bundle_dir, report)
+    
+    # Every bundled model is a NumPy scorer, XGBoost also keeps its booster for large batches
+    models = dict(model_bundle.models)
+    native_scorers = {
+        name: scorer for name, scorer in model_bundle.scorers.items()
+        if USE_NATIVE_SCORERS or scorer is models[name]
+    }
+    model_versions = {name: model_bundle.version for name in models}
+    artifact_paths = {
+        'models': {name: str(bundle_dir) for name in models},
+        'explainers': {},
+        'bundle': str(bundle_dir)
+    }
+    
+    # Explainers are built now (eager), on first /predict/explain (lazy) or never (off)
+    explainers = {}
+    if LOAD_EXPLAINERS != 'off':
+        for name in model_bundle.explainer_names:
+            artifact_paths['explainers'][name] = str(bundle_dir)
+            if LOAD_EXPLAINERS == 'eager':
+                explainers[name] = await load_artifact(f"explainer:{name}", lambda _, name=name: model_bundle.explainer(name), bundle_dir, report)
+            else:
+                report[f"explainer:{name}"] = {"status": "lazy", "path": str(bundle_dir)}
+    
+    logger.info(f"Loaded model bundle {model_bundle.version} with {len(models)} models")
+    snapshot = ModelSnapshot(
+        model_bundle.version, models, model_bundle.preprocessor, model_bundle.feature_columns,
+        native_scorers, model_versions, artifact_paths, model_bundle=model_bundle
+    )
+    snapshot.explainers.update(explainers)
+    return snapshot
+
+async def load_models() -> Optional[ModelSnapshot]:
+    """
+    Loads all trained models, the preprocessor and the dropdown data into a new snapshot
+    Uses the latest model bundle when one exists, otherwise the loose pickles
+    Artifacts are read concurrently, SHAP explainers only when LOAD_EXPLAINERS=eager
+    Returns None when there is no models directory
+    """
     try:
-        # Gets the absolute path to the project root
-        project_root = Path(__file__).parent.parent
-        models_dir = project_root / "results" / "models"
+        models_dir = MODELS_DIR
+        data_dir = DATA_DIR
         
         logger.info(f"Looking for models in: {models_dir.absolute()}")
         
@@ -46,102 +335,416 @@ async def load_models():
             logger.info(f"Found pickle files: {[f.name for f in pkl_files]}")
         else:
             logger.error(f"Models directory does not exist: {models_dir}")
-            return
-        # Loads your three models (using absolute paths)
-        model_files = {
-            'logistic': models_dir / 'logistic_regression_best.pkl',
-            'xgboost': models_dir / 'xgboost_best.pkl', 
-            'svm': models_dir / 'svm_rbf_best.pkl'
-        }
-        
-        models = {}
-        for name, path in model_files.items():
-            if path.exists():
-                models[name] = joblib.load(path)
-                logger.info(f"Loaded {name} model from {path}")
-            else:
-                logger.warning(f"Model file not found: {path}")
-        
-        # Loads SHAP explainers
-        explainer_files = {
-            'logistic': models_dir / 'logistic_explainer.pkl',
-            'xgboost': models_dir / 'xgboost_explainer.pkl',
-            'svm': models_dir / 'svm_explainer.pkl'
-        }
+            return None
+        bundle_dir = latest_bundle_dir(models_dir) if USE_MODEL_BUNDLE else None
         
-        explainers = {}
-        for name, path in explainer_files.items():
-            if path.exists():
-                explainers[name] = joblib.load(path)
-                logger.info(f"Loaded {name} explainer from {path}")
-            else:
-                logger.warning(f"Explainer file not found: {path}")
+        # Each snapshot keeps its own load report, so a reload never touches the serving one's
+        report = {}
+        start = time.perf_counter()
+        await asyncio.to_thread(import_model_libraries, LOAD_EXPLAINERS == 'eager')
+        report['imports'] = {"status": "loaded", "seconds": round(time.perf_counter() - start, 4)}
         
-        # Loads feature columns
-        feature_columns_path = models_dir / 'feature_columns.pkl'
-        if feature_columns_path.exists():
-            feature_columns = joblib.load(feature_columns_path)
-            logger.info(f"Loaded {len(feature_columns)} feature columns")
-        else:
-            logger.warning(f"Feature columns file not found: {feature_columns_path}")
-            # Uses default from preprocessor
-            feature_columns = []
-        
-        # Loads the preprocessor
-        preprocessor_path = models_dir / 'preprocessor.pkl'
-        if preprocessor_path.exists():
-            preprocessor = joblib.load(preprocessor_path)
-            logger.info("Loaded preprocessor successfully")
+        # Dropdown CSVs parse and index on their own threads while the model artifacts load
+        lookups = asyncio.gather(
+            load_artifact('regions', partial(read_name_index, 'region'), data_dir / "unique_regions.csv", report),
+            load_artifact('cities', partial(read_name_index, 'city'), data_dir / "unique_cities.csv", report)
+        )
+        if bundle_dir is not None:
+            snapshot = await load_from_bundle(bundle_dir, report)
         else:
-            logger.error(f"Preprocessor not found at {preprocessor_path}")
+            snapshot = await load_from_pickles(models_dir, report)
+        regions, cities = await lookups
+        snapshot.artifacts = report
+        
+        # Checks the preprocessor
+        if snapshot.preprocessor is None:
+            logger.error(f"Preprocessor not found at {models_dir / 'preprocessor.pkl'}")
             raise FileNotFoundError(f"Preprocessor required for API operation")
         
-        # Loads the dropdown data and creates lookup dictionaries
-        data_dir = project_root / "data" / "processed"
-        
-        # Loads the exact region and exact city names
-        regions_csv = data_dir / "unique_regions.csv"
-        cities_csv = data_dir / "unique_cities.csv"
-        
-        if regions_csv.exists() and cities_csv.exists():
-            regions_df = pd.read_csv(regions_csv)
-            cities_df = pd.read_csv(cities_csv)
-            
-            # Creates a case INSENSITIVE lookup dictionaries
-            region_lookup = {region.lower(): region for region in regions_df['region']}
-            city_lookup = {city.lower(): city for city in cities_df['city']}
-            
-            logger.info(f"Loaded {len(region_lookup)} regions and {len(city_lookup)} cities for lookup")
+        # Exact region and city names behind case INSENSITIVE lookups
+        if regions is not None and cities is not None:
+            logger.info(f"Loaded {len(regions)} regions and {len(cities)} cities for lookup")
         else:
             logger.warning("Dropdown CSV files not found. Case sensitivity may cause issues...")
-            region_lookup = {}
-            city_lookup = {}
+            regions = NameIndex([])
+            cities = NameIndex([])
+        snapshot.region_index = regions
+        snapshot.city_index = cities
+        snapshot.catalog_responses = build_catalog_responses(regions, cities)
         
         logger.info("All models and preprocessor loaded successfully!")
+        return snapshot
         
     except Exception as e:
         logger.error(f"Error loading models: {str(e)}")
         raise e
 
-def normalize_region(user_input: str) -> str:
-    """Converts user input to exact model format"""
-    if not user_input:
-        return user_input
-    return region_lookup.get(user_input.lower(), user_input)
+async def get_explainer(snapshot: ModelSnapshot, model_name: str) -> Any:
+    """
+    Returns the explainer for a model, loading it on first use when LOAD_EXPLAINERS=lazy
+    """
+    if model_name in snapshot.explainers:
+        return snapshot.explainers[model_name]
+    path = snapshot.artifact_paths['explainers'].get(model_name)
+    if path is None:
+        return None
+    
+    # Concurrent first requests share one load
+    async with snapshot.explainer_load_lock:
+        if model_name not in snapshot.explainers:
+            await asyncio.to_thread(import_model_libraries, True)
+            if snapshot.model_bundle is not None:
+                loader = lambda _: snapshot.model_bundle.explainer(model_name)
+            else:
+                loader = joblib.load
+            explainer = await load_artifact(f"explainer:{model_name}", loader, Path(path), snapshot.artifacts)
+            snapshot.explainers[model_name] = prepare_explainer(model_name, explainer, snapshot.models)
+    return snapshot.explainers[model_name]
+
+# Industry categories offered by the frontend dropdown
+CATEGORIES = [
+    'software', 'mobile', 'social', 'media', 'web', 'e-commerce', 
+    'biotechnology', 'curated', 'health', 'advertising', 'games', 
+    'enterprise', 'technology', 'marketing', 'analytics'
+]
+
+def build_catalog_responses(region_index: NameIndex, city_index: NameIndex) -> Dict[str, PrecomputedResponse]:
+    """
+    Serializes the dropdown lists once per loaded version of the lookup data
+    """
+    return {
+        'categories': PrecomputedResponse({"categories": CATEGORIES}),
+        'regions': PrecomputedResponse({"regions": sorted(region_index.names)}),
+        'cities': PrecomputedResponse({"cities": sorted(city_index.names)})
+    }
+
+# Served until the first version is active
+empty_catalog_responses = build_catalog_responses(NameIndex([]), NameIndex([]))
+
+def normalize_region(snapshot: ModelSnapshot, user_input: str) -> str:
+    """Converts user input to exact model format, closest known name for typos when FUZZY_MIN_SIMILARITY is set"""
+    return snapshot.region_index.normalize(user_input, FUZZY_MIN_SIMILARITY)
+
+def normalize_city(snapshot: ModelSnapshot, user_input: str) -> str:
+    """Converts user input to exact model format, closest known name for typos when FUZZY_MIN_SIMILARITY is set"""  
+    return snapshot.city_index.normalize(user_input, FUZZY_MIN_SIMILARITY)
+
+def fuzzy_replaced(index: NameIndex, user_input: str, normalized: str) -> bool:
+    """
+    True when normalization substituted a different known name rather than fixing the case
+    """
+    return bool(user_input) and normalized != user_input and index.exact(user_input) is None
+
+def start_executors():
+    """
+    Creates the thread pool shared by every model version
+    """
+    global executors
+    
+    executors = {
+        'thread': BoundedExecutor('thread', 'thread', INFERENCE_THREADS, INFERENCE_QUEUE_LIMIT)
+    }
+
+def start_process_pool(snapshot: ModelSnapshot):
+    """
+    Gives a snapshot the shared thread pool and, if enabled, its own process pool
+    Each worker process loads its own copy of the snapshot's process pool models and explainers,
+    bundle arrays are memory-mapped so the workers share their pages
+    """
+    snapshot.executors = {'thread': executors['thread']}
+    if EXPLAIN_PROCESSES > 0:
+        paths = snapshot.artifact_paths
+        process_models = {name: path for name, path in paths['models'].items() if name in PROCESS_POOL_MODELS}
+        snapshot.executors['process'] = BoundedExecutor(
+            'process', 'process', EXPLAIN_PROCESSES, EXPLAIN_QUEUE_LIMIT, initializer=init_worker,
+            initargs=(process_models, paths['explainers'], LOAD_EXPLAINERS == 'eager', paths['bundle'])
+        )
+
+def stop_executors():
+    """
+    Shuts down the shared thread pool
+    """
+    for executor in executors.values():
+        executor.shutdown()
+    executors.clear()
+
+def model_runner(snapshot: ModelSnapshot, model_name: str):
+    """
+    Returns the predict_proba callable for a model and the pool it runs on
+    """
+    if 'process' in snapshot.executors and model_name in PROCESS_POOL_MODELS:
+        return partial(predict_in_worker, model_name), snapshot.executors['process']
+    if model_name in snapshot.native_scorers:
+        scorer = snapshot.native_scorers[model_name]
+        return partial(predict_proba_native, scorer, snapshot.models[model_name]), snapshot.executors['thread']
+    return snapshot.models[model_name].predict_proba, snapshot.executors['thread']
+
+def profiled() -> bool:
+    """
+    True inside a profiled request, whose model work then runs inline on the profiled thread
+    """
+    return PROFILING_TOKEN is not None and profiling_active()
+
+def inline_predict(snapshot: ModelSnapshot, model_name: str, X: np.ndarray) -> np.ndarray:
+    """
+    predict_proba in the server process, bypassing the batcher and pools for profiled requests
+    """
+    if model_name in snapshot.native_scorers:
+        return predict_proba_native(snapshot.native_scorers[model_name], snapshot.models[model_name], X)
+    return snapshot.models[model_name].predict_proba(X)
+
+async def run_explainer(snapshot: ModelSnapshot, model_name: str, X: np.ndarray, options: Dict[str, Any]) -> Any:
+    """
+    Computes SHAP values on the process pool, or the thread pool when it is disabled
+    options holds the explanation budget (nsamples, background_size) for kernel explainers
+    """
+    explainer = snapshot.explainers[model_name]
+    # Closed form explanations take microseconds, a pool round trip would dominate
+    if isinstance(explainer, LinearShapExplainer):
+        return explainer.shap_values(X)
+    if profiled():
+        return explainer.shap_values(X, **options)
+    if 'process' in snapshot.executors:
+        return await snapshot.executors['process'].run(partial(explain_in_worker, model_name), X, options)
+    return await snapshot.executors['thread'].run(partial(explainer.shap_values, **options), X)
+
+def explanation_options(explainer: Any, nsamples: Optional[int], background_size: Optional[int]) -> Dict[str, Any]:
+    """
+    Validates a per request explanation budget against what the explainer supports
+    """
+    options = {}
+    if nsamples is not None:
+        if not isinstance(explainer, BudgetedKernelExplainer) and not is_kernel_explainer(explainer):
+            raise HTTPException(status_code=400, detail="nsamples only applies to kernel explainers")
+        options['nsamples'] = nsamples
+    if background_size is not None:
+        if not isinstance(explainer, BudgetedKernelExplainer):
+            raise HTTPException(status_code=400, detail="background_size only applies to budgeted kernel explainers")
+        if background_size not in explainer.background_sizes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"background_size must be one of {explainer.background_sizes}"
+            )
+        options['background_size'] = background_size
+    return options
+
+def overloaded(e: PoolSaturatedError) -> HTTPException:
+    """
+    Backpressure response for a saturated pool
+    """
+    logger.warning(f"Rejecting request: {str(e)}")
+    return HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
+
+def start_batchers(snapshot: ModelSnapshot):
+    """
+    Creates one micro-batcher per model in the snapshot
+    """
+    snapshot.batchers = {}
+    for name in snapshot.models:
+        predict_fn, executor = model_runner(snapshot, name)
+        snapshot.batchers[name] = MicroBatcher(predict_fn, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, executor)
+    for batcher in snapshot.batchers.values():
+        batcher.start()
+
+async def stop_batchers(snapshot: ModelSnapshot):
+    """
+    Stops the micro-batchers and fails any requests still queued
+    """
+    for batcher in snapshot.batchers.values():
+        await batcher.stop()
+    snapshot.batchers.clear()
+
+async def close_snapshot(snapshot: ModelSnapshot):
+    """
+    Stops a snapshot's micro-batchers and its process pool, the shared thread pool keeps running
+    """
+    await stop_batchers(snapshot)
+    process_pool = snapshot.executors.pop('process', None)
+    if process_pool is not None:
+        process_pool.shutdown()
+
+async def warmup_models(snapshot: ModelSnapshot):
+    """
+    Pushes a dummy startup through every model before the snapshot serves traffic
+    First calls pay for lazy setup: XGBoost predictor caches, worker process spawn and model load
+    """
+    record = {
+        'country_code': 'USA', 'region': 'SF Bay Area', 'city': 'San Francisco',
+        'category_list': 'Software', 'founded_year': 2010
+    }
+    row = snapshot.preprocessor.transform_single(record)
+    X = np.vstack([row] * max(1, WARMUP_BATCH_ROWS))
+    
+    for name in snapshot.models:
+        start = time.perf_counter()
+        predict_fn, executor = model_runner(snapshot, name)
+        
+        # Single row path through the micro-batcher, batch path straight to the pool
+        # A process pool runs the batch once on every worker, so each has spawned, loaded its models and scored
+        await snapshot.batchers[name].submit(row)
+        if executor.kind == 'process':
+            await executor.run_on_each_worker(predict_fn, X)
+        else:
+            await executor.run(predict_fn, X)
+        if name in snapshot.explainers:
+            await run_explainer(snapshot, name, row.reshape(1, -1), {})
+        
+        seconds = time.perf_counter() - start
+        snapshot.warmup[name] = {"seconds": round(seconds, 4), "explainer": name in snapshot.explainers}
+        logger.info(f"Warmed up {name} in {seconds:.3f}s")
+
+async def prepare_snapshot() -> Optional[ModelSnapshot]:
+    """
+    Loads a new snapshot, starts its pools and batchers and warms every model, without touching the active one
+    """
+    snapshot = await load_models()
+    if snapshot is None:
+        return None
+    try:
+        start_process_pool(snapshot)
+        start_batchers(snapshot)
+        if snapshot.models:
+            await warmup_models(snapshot)
+    except BaseException:
+        await close_snapshot(snapshot)
+        raise
+    return snapshot
 
-def normalize_city(user_input: str) -> str:
-    """Converts user input to exact model format"""  
-    if not user_input:
-        return user_input
-    return city_lookup.get(user_input.lower(), user_input)
+async def start_serving():
+    """
+    Loads artifacts, starts the pools and warms every model, then marks the API ready
+    """
+    start = time.perf_counter()
+    try:
+        start_executors()
+        snapshot = await prepare_snapshot()
+    except Exception as e:
+        startup_state['error'] = str(e)
+        raise
+    
+    startup_state['startup_seconds'] = round(time.perf_counter() - start, 4)
+    if snapshot is not None:
+        registry.activate(snapshot, startup_state['startup_seconds'])
+    startup_state['ready'] = snapshot is not None and bool(snapshot.models)
+    logger.info(f"Startup finished in {startup_state['startup_seconds']}s, ready: {startup_state['ready']}")
+
+def retire_in_background(snapshot: ModelSnapshot):
+    """
+    Closes a replaced snapshot once its in-flight requests finish, without holding up the caller
+    """
+    task = asyncio.create_task(registry.retire(snapshot, close_snapshot, RELOAD_DRAIN_SECONDS))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def reload_models(trigger: str) -> Dict[str, Any]:
+    """
+    Loads and warms the current artifacts as a new snapshot next to the serving one, then swaps it in
+    Requests keep being served by the previous snapshot until the swap, and the ones already holding it
+    finish on it. On failure the previous snapshot stays active
+    """
+    async with registry.reload_lock:
+        start = time.perf_counter()
+        try:
+            snapshot = await prepare_snapshot()
+            if snapshot is None or not snapshot.models:
+                if snapshot is not None:
+                    await close_snapshot(snapshot)
+                raise FileNotFoundError(f"No models found in {MODELS_DIR}")
+        except Exception as e:
+            metrics.inc('model_reloads_total', trigger=trigger, result='failed')
+            startup_state['last_reload_error'] = {
+                "trigger": trigger,
+                "failed_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                "error": str(e)
+            }
+            logger.error(f"Reload failed, keeping version "
+                         f"{registry.active.version if registry.active else None}: {str(e)}")
+            raise
+        
+        seconds = time.perf_counter() - start
+        previous = registry.activate(snapshot, seconds, trigger)
+        startup_state['ready'] = True
+        startup_state['error'] = None
+        startup_state['last_reload_error'] = None
+        # Cached outputs belong to the previous models
+        prediction_cache.clear()
+        if previous is not None:
+            retire_in_background(previous)
+        metrics.inc('model_reloads_total', trigger=trigger, result='ok')
+        return {
+            "version": snapshot.version,
+            "previous_version": previous.version if previous is not None else None,
+            "seconds": round(seconds, 4)
+        }
+
+async def watch_models():
+    """
+    Polls the model and dropdown files every MODEL_WATCH_SECONDS and reloads when they change
+    A change has to look the same on two consecutive polls, so files still being written are not loaded
+    """
+    fingerprint = partial(source_fingerprint, MODELS_DIR, DATA_DIR, USE_MODEL_BUNDLE)
+    loaded = await asyncio.to_thread(fingerprint)
+    pending = None
+    while True:
+        await asyncio.sleep(MODEL_WATCH_SECONDS)
+        try:
+            current = await asyncio.to_thread(fingerprint)
+        except OSError as e:
+            logger.warning(f"Model watcher could not read {MODELS_DIR}: {str(e)}")
+            continue
+        if current == loaded:
+            pending = None
+            continue
+        if current != pending:
+            pending = current
+            continue
+        
+        logger.info("Model files changed, reloading")
+        try:
+            await reload_models('watcher')
+        except Exception:
+            # Already logged, the same files are not retried until they change again
+            pass
+        loaded, pending = current, None
+
+def require_ready():
+    """
+    Rejects prediction requests until startup has finished
+    """
+    if not startup_state['ready']:
+        raise HTTPException(status_code=503, detail="Models not loaded", headers={"Retry-After": "1"})
+
+async def active_snapshot():
+    """
+    Dependency pinning the active model version for the whole request
+    """
+    require_ready()
+    with registry.acquire() as snapshot:
+        yield snapshot
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await load_models()
+    startup_task = None
+    watcher_task = None
+    if BACKGROUND_STARTUP:
+        startup_task = asyncio.create_task(start_serving())
+        # Failures are reported through /ready instead of stopping the server
+        startup_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    else:
+        await start_serving()
+    if MODEL_WATCH_SECONDS > 0:
+        watcher_task = asyncio.create_task(watch_models())
     yield
     # Shutdown
-    pass
+    for task in [startup_task, watcher_task] + list(background_tasks):
+        if task is not None and not task.done():
+            task.cancel()
+    startup_state['ready'] = False
+    for snapshot in [registry.active] + list(registry.retiring):
+        if snapshot is not None:
+            await close_snapshot(snapshot)
+    stop_executors()
 
 # FastAPI app w/ lifespan
 app = FastAPI(
@@ -151,6 +754,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Request counts and latency per route for /metrics
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
+if PROFILING_TOKEN is not None:
+    app.add_middleware(ProfilingMiddleware, token=PROFILING_TOKEN, output_dir=PROFILE_DIR)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -182,20 +791,59 @@ class PredictionResponse(BaseModel):
     prediction: int
     model_used: str
     confidence: str
+    # Known names a fuzzy match substituted for the input, None when the input was used as sent
+    normalized_region: Optional[str] = None
+    normalized_city: Optional[str] = None
 
 class ExplanationResponse(BaseModel):
     prediction: PredictionResponse
     feature_importance: Dict[str, float]
     top_factors: List[Dict[str, Any]]
+    # Units of the importances: log_odds for logistic and XGBoost, probability for the kernel explainers
+    output_space: str
+
+class BatchPredictionRequest(BaseModel):
+    startups: List[StartupFeatures]
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[PredictionResponse]
+    count: int
+
+class EnsembleResponse(BaseModel):
+    model_config = {'protected_namespaces': ()}
+    
+    success_probability: float
+    prediction: int
+    confidence: str
+    method: str
+    model_probabilities: Dict[str, float]
+    weights: Dict[str, float]
+    model_version: str
+    normalized_region: Optional[str] = None
+    normalized_city: Optional[str] = None
+
+class BatchEnsembleResponse(BaseModel):
+    predictions: List[EnsembleResponse]
+    count: int
 
-def preprocess_features(features: StartupFeatures) -> np.ndarray:
+def preprocess_features(snapshot: ModelSnapshot, features: StartupFeatures,
+                        fuzzy_matches: Optional[Dict[str, str]] = None) -> np.ndarray:
     """
     Preprocessess input features to match training data format
+    fuzzy_matches receives normalized_region/normalized_city for inputs a fuzzy match replaced
     """
     try:
         # Normalizes region and city to exact model format
-        normalized_region = normalize_region(features.region)
-        normalized_city = normalize_city(features.city)
+        start = time.perf_counter()
+        normalized_region = normalize_region(snapshot, features.region)
+        normalized_city = normalize_city(snapshot, features.city)
+        if fuzzy_matches is not None:
+            if fuzzy_replaced(snapshot.region_index, features.region, normalized_region):
+                fuzzy_matches['normalized_region'] = normalized_region
+            if fuzzy_replaced(snapshot.city_index, features.city, normalized_city):
+                fuzzy_matches['normalized_city'] = normalized_city
+        normalized = time.perf_counter()
+        metrics.observe('stage_duration_seconds', normalized - start, stage='normalize', model='none')
         
         # Converts Pydantic model to dictionary with correct field names
         feature_dict = {
@@ -207,13 +855,70 @@ def preprocess_features(features: StartupFeatures) -> np.ndarray:
         }
         
         # Uses the loaded preprocessor to transform the data
-        processed_features = preprocessor.transform_single(feature_dict)
+        processed_features = snapshot.preprocessor.transform_single(feature_dict)
+        metrics.observe('stage_duration_seconds', time.perf_counter() - normalized, stage='preprocess', model='none')
         return processed_features
         
     except Exception as e:
         logger.error(f"Error preprocessing features: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Preprocessing error: {str(e)}")
 
+def select_model_name(snapshot: ModelSnapshot, requested: Optional[str] = None) -> str:
+    """
+    Uses the requested model if given, otherwise XGBoost as default model
+    with a fallback to the first available model
+    """
+    models = snapshot.models
+    if requested is not None:
+        if requested not in models:
+            raise HTTPException(status_code=404, detail=f"Model '{requested}' not available, choose from {list(models.keys())}")
+        return requested
+    
+    model_name = 'xgboost'
+    if model_name not in models:
+        model_name = list(models.keys())[0]
+    return model_name
+
+async def score_model(snapshot: ModelSnapshot, model_name: str, X: np.ndarray) -> float:
+    """
+    Success probability of one encoded row, from the prediction cache or the model's micro-batcher
+    """
+    # Identical encoded inputs reuse the cached probability
+    cache_key = prediction_cache.make_key('predict', model_name, snapshot.model_versions.get(model_name, ''), X)
+    # Profiled requests skip the cache so the call tree shows the real work
+    probability = prediction_cache.get(cache_key) if not profiled() else None
+    if probability is None:
+        # Gets prediction, concurrent requests share one predict_proba call
+        with metrics.time('stage_duration_seconds', stage='inference', model=model_name):
+            if profiled():
+                probabilities = inline_predict(snapshot, model_name, X.reshape(1, -1))[0]
+            else:
+                probabilities = await snapshot.batchers[model_name].submit(X)
+        probability = float(probabilities[1])  # Probability of success (class 1)
+        prediction_cache.put(cache_key, probability)
+    return probability
+
+def confidence_level(probability: float) -> str:
+    return "high" if abs(probability - 0.5) > 0.3 else "medium" if abs(probability - 0.5) > 0.1 else "low"
+
+def build_prediction(probability: float, model_name: str,
+                     fuzzy_matches: Optional[Dict[str, str]] = None) -> PredictionResponse:
+    """
+    Converts a success probability into the API prediction response
+    """
+    prediction = int(probability > 0.5)
+    
+    # Determines confidence level
+    confidence = confidence_level(probability)
+    
+    return PredictionResponse(
+        success_probability=float(probability),
+        prediction=prediction,
+        model_used=model_name,
+        confidence=confidence,
+        **(fuzzy_matches or {})
+    )
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -221,87 +926,365 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    snapshot = registry.active
     return {
         "status": "healthy",
-        "models_loaded": len(models),
-        "explainers_loaded": len(explainers),
-        "preprocessor_loaded": preprocessor is not None,
+        "ready": startup_state['ready'],
+        "model_version": snapshot.version if snapshot is not None else None,
+        "models_loaded": len(snapshot.models) if snapshot is not None else 0,
+        "explainers_loaded": len(snapshot.explainers) if snapshot is not None else 0,
+        "preprocessor_loaded": snapshot is not None and snapshot.preprocessor is not None,
+        "micro_batching": {name: batcher.stats() for name, batcher in snapshot.batchers.items()} if snapshot else {},
+        "executors": {name: executor.stats() for name, executor in (snapshot.executors if snapshot else executors).items()},
+        "prediction_cache": prediction_cache.stats(),
         "expected_features": [
             "country_code", "region", "city", "category_list", "founded_year"
         ]
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe, 503 until every model is loaded and warmed up
+    Reports the serving version's per artifact load and per model warmup timings
+    """
+    snapshot = registry.active
+    body = {
+        "ready": startup_state['ready'],
+        "startup_seconds": startup_state['startup_seconds'],
+        "load_explainers": LOAD_EXPLAINERS,
+        "model_version": snapshot.version if snapshot is not None else None,
+        "artifacts": snapshot.artifacts if snapshot is not None else {},
+        "warmup": snapshot.warmup if snapshot is not None else {},
+        "error": startup_state['error'],
+        "last_reload_error": startup_state['last_reload_error']
+    }
+    if not startup_state['ready']:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+def component_metrics():
+    """
+    Cache, micro-batching and pool counters read at scrape time, as (name, type, labels, value)
+    """
+    cache = prediction_cache.stats()
+    yield 'prediction_cache_hits_total', 'counter', {}, cache['hits']
+    yield 'prediction_cache_misses_total', 'counter', {}, cache['misses']
+    yield 'prediction_cache_evictions_total', 'counter', {}, cache['evictions']
+    yield 'prediction_cache_entries', 'gauge', {}, cache['size']
+    
+    snapshot = registry.active
+    batcher_stats = {name: batcher.stats() for name, batcher in snapshot.batchers.items()} if snapshot else {}
+    for name, stats in batcher_stats.items():
+        yield 'micro_batches_total', 'counter', {'model': name}, stats['batches_run']
+    for name, stats in batcher_stats.items():
+        yield 'micro_batch_rows_total', 'counter', {'model': name}, stats['rows_scored']
+    for name, stats in batcher_stats.items():
+        yield 'micro_batch_queued', 'gauge', {'model': name}, stats['queued']
+    
+    pools = snapshot.executors if snapshot is not None else executors
+    executor_stats = {name: executor.stats() for name, executor in pools.items()}
+    for name, stats in executor_stats.items():
+        yield 'pool_running', 'gauge', {'pool': name}, stats['running']
+    for name, stats in executor_stats.items():
+        yield 'pool_queue_depth', 'gauge', {'pool': name}, stats['queue_depth']
+    for name, stats in executor_stats.items():
+        yield 'pool_completed_total', 'counter', {'pool': name}, stats['completed']
+    for name, stats in executor_stats.items():
+        yield 'pool_failed_total', 'counter', {'pool': name}, stats['failed']
+    for name, stats in executor_stats.items():
+        yield 'pool_rejected_total', 'counter', {'pool': name}, stats['rejected']
+    
+    yield 'ready', 'gauge', {}, 1 if startup_state['ready'] else 0
+    yield 'model_snapshots_retiring', 'gauge', {}, len(registry.retiring)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Prometheus text exposition of the per stage histograms, request counters and component stats
+    """
+    return PlainTextResponse(metrics.render(component_metrics()), media_type="text/plain; version=0.0.4")
+
+def require_profiling_token(token: Optional[str]):
+    """
+    Profiles are only readable with the profiling token, and only when profiling is enabled
+    """
+    if PROFILING_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled, set PROFILING_TOKEN to enable it")
+    if token is None or not hmac.compare_digest(token, PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token is required")
+
+@app.get("/debug/profiles")
+async def get_profiles(x_profile_token: Optional[str] = Header(None)):
+    """
+    Ids of the saved request profiles, newest first
+    """
+    require_profiling_token(x_profile_token)
+    return {"profiles": list_profiles(PROFILE_DIR)}
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    Call tree summary of one profiled request, the matching .prof file sits next to it in PROFILE_DIR
+    """
+    require_profiling_token(x_profile_token)
+    summary = load_profile(PROFILE_DIR, profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return PlainTextResponse(summary)
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_success(features: StartupFeatures):
+async def predict_success(features: StartupFeatures, model: Optional[str] = None,
+                          snapshot: ModelSnapshot = Depends(active_snapshot)):
     """
     Predicts startup success probability
     """
     try:
-        if not models:
-            raise HTTPException(status_code=503, detail="Models not loaded")
-        
         # Preprocess features
-        X = preprocess_features(features)
-        X = X.reshape(1, -1)  # Ensure 2D array for prediction
+        fuzzy_matches = {}
+        X = preprocess_features(snapshot, features, fuzzy_matches)
         
-        # Uses XGBoost as default model
-        model_name = 'xgboost'
-        if model_name not in models:
-            model_name = list(models.keys())[0]  # Use first available model
+        model_name = select_model_name(snapshot, model)
         
-        model = models[model_name]
+        probability = await score_model(snapshot, model_name, X)
         
-        # Gets prediction
-        probability = model.predict_proba(X)[0][1]  # Probability of success (class 1)
-        prediction = int(probability > 0.5)
+        with metrics.time('stage_duration_seconds', stage='serialization', model=model_name):
+            return build_prediction(probability, model_name, fuzzy_matches)
         
-        # Determines confidence level
-        confidence = "high" if abs(probability - 0.5) > 0.3 else "medium" if abs(probability - 0.5) > 0.1 else "low"
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        metrics.inc('errors_total', endpoint='/predict', kind='overloaded')
+        raise overloaded(e)
+    except Exception as e:
+        metrics.inc('errors_total', endpoint='/predict', kind='exception')
+        logger.error(f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest, model: Optional[str] = None,
+                        snapshot: ModelSnapshot = Depends(active_snapshot)):
+    """
+    Predicts success probabilities for a list of startups in one model call
+    Takes the same optional model parameter as /predict
+    """
+    if len(request.startups) > MAX_BATCH_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.startups)} records exceeds limit of {MAX_BATCH_RECORDS}"
+        )
+    # An unknown model is a 404 even for an empty batch, like /predict
+    model_name = select_model_name(snapshot, model)
+    if not request.startups:
+        return BatchPredictionResponse(predictions=[], count=0)
+    
+    try:
+        # Preprocess all records into one feature matrix, off the event loop
+        fuzzy_matches = [{} for _ in request.startups]
+        X = await snapshot.executors['thread'].run(
+            lambda: np.vstack([preprocess_features(snapshot, features, matches)
+                               for features, matches in zip(request.startups, fuzzy_matches)])
+        )
         
-        return PredictionResponse(
-            success_probability=float(probability),
-            prediction=prediction,
-            model_used=model_name,
-            confidence=confidence
+        predict_fn, executor = model_runner(snapshot, model_name)
+        with metrics.time('stage_duration_seconds', stage='batch_inference', model=model_name):
+            probabilities = (await executor.run(predict_fn, X))[:, 1]
+        
+        with metrics.time('stage_duration_seconds', stage='batch_serialization', model=model_name):
+            predictions = [build_prediction(probability, model_name, matches)
+                           for probability, matches in zip(probabilities, fuzzy_matches)]
+            return BatchPredictionResponse(predictions=predictions, count=len(predictions))
+        
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        metrics.inc('errors_total', endpoint='/predict/batch', kind='overloaded')
+        raise overloaded(e)
+    except Exception as e:
+        metrics.inc('errors_total', endpoint='/predict/batch', kind='exception')
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+def ensemble_settings(snapshot: ModelSnapshot, models: Optional[str], method: Optional[str],
+                      weights: Optional[str]):
+    """
+    Resolves the models to score and the combination rule of an ensemble request
+    """
+    if models:
+        names = list(dict.fromkeys(select_model_name(snapshot, name.strip()) for name in models.split(',')))
+    else:
+        names = list(snapshot.models)
+    method = method or ENSEMBLE_METHOD
+    try:
+        parsed = parse_weights(weights) if weights is not None else ENSEMBLE_WEIGHTS
+        # Rejects weights that leave nothing to combine before any model runs
+        ensemble_weights(names, method, parsed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return names, method, parsed
+
+def build_ensemble(snapshot: ModelSnapshot, probabilities: Dict[str, float], method: str,
+                   weights: Dict[str, float], fuzzy_matches: Optional[Dict[str, str]] = None) -> EnsembleResponse:
+    combined, used = combine(probabilities, method, weights)
+    score = float(combined[0])
+    return EnsembleResponse(
+        success_probability=score,
+        prediction=int(score > 0.5),
+        confidence=confidence_level(score),
+        method=method,
+        model_probabilities={name: float(probability) for name, probability in probabilities.items()},
+        weights=used,
+        model_version=snapshot.version,
+        **(fuzzy_matches or {})
+    )
+
+@app.post("/predict/ensemble", response_model=EnsembleResponse)
+async def predict_ensemble(
+    features: StartupFeatures,
+    models: Optional[str] = None,
+    method: Optional[str] = Query(None, pattern="^(mean|weighted|vote)$"),
+    weights: Optional[str] = None,
+    snapshot: ModelSnapshot = Depends(active_snapshot)
+):
+    """
+    Scores one startup with every loaded model (or the comma separated models) and combines the scores
+    Features are encoded once and the models run concurrently, each through its own micro-batcher and pool
+    method overrides ENSEMBLE_METHOD, weights ("xgboost=2,svm=1") override ENSEMBLE_WEIGHTS
+    """
+    names, method, parsed_weights = ensemble_settings(snapshot, models, method, weights)
+    try:
+        fuzzy_matches = {}
+        X = preprocess_features(snapshot, features, fuzzy_matches)
+        with metrics.time('stage_duration_seconds', stage='ensemble_inference', model='ensemble'):
+            scores = await asyncio.gather(*[score_model(snapshot, name, X) for name in names])
+        
+        with metrics.time('stage_duration_seconds', stage='serialization', model='ensemble'):
+            return build_ensemble(snapshot, dict(zip(names, scores)), method, parsed_weights, fuzzy_matches)
+        
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        metrics.inc('errors_total', endpoint='/predict/ensemble', kind='overloaded')
+        raise overloaded(e)
+    except Exception as e:
+        metrics.inc('errors_total', endpoint='/predict/ensemble', kind='exception')
+        logger.error(f"Ensemble prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Ensemble prediction failed: {str(e)}")
+
+@app.post("/predict/batch/ensemble", response_model=BatchEnsembleResponse)
+async def predict_batch_ensemble(
+    request: BatchPredictionRequest,
+    models: Optional[str] = None,
+    method: Optional[str] = Query(None, pattern="^(mean|weighted|vote)$"),
+    weights: Optional[str] = None,
+    snapshot: ModelSnapshot = Depends(active_snapshot)
+):
+    """
+    Ensemble scores for a list of startups: one shared feature matrix, every model scored on it concurrently
+    """
+    if len(request.startups) > MAX_BATCH_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.startups)} records exceeds limit of {MAX_BATCH_RECORDS}"
+        )
+    names, method, parsed_weights = ensemble_settings(snapshot, models, method, weights)
+    if not request.startups:
+        return BatchEnsembleResponse(predictions=[], count=0)
+    
+    try:
+        fuzzy_matches = [{} for _ in request.startups]
+        X = await snapshot.executors['thread'].run(
+            lambda: np.vstack([preprocess_features(snapshot, features, matches)
+                               for features, matches in zip(request.startups, fuzzy_matches)])
         )
         
+        # Each model runs on its own pool, so the wall clock is close to the slowest model
+        runners = [model_runner(snapshot, name) for name in names]
+        with metrics.time('stage_duration_seconds', stage='batch_ensemble_inference', model='ensemble'):
+            outputs = await asyncio.gather(*[executor.run(predict_fn, X) for predict_fn, executor in runners])
+        probabilities = {name: output[:, 1] for name, output in zip(names, outputs)}
+        combined, used = combine(probabilities, method, parsed_weights)
+        
+        with metrics.time('stage_duration_seconds', stage='batch_serialization', model='ensemble'):
+            predictions = [
+                EnsembleResponse(
+                    success_probability=float(score),
+                    prediction=int(score > 0.5),
+                    confidence=confidence_level(float(score)),
+                    method=method,
+                    model_probabilities={name: float(probabilities[name][row]) for name in names},
+                    weights=used,
+                    model_version=snapshot.version,
+                    **fuzzy_matches[row]
+                )
+                for row, score in enumerate(combined)
+            ]
+            return BatchEnsembleResponse(predictions=predictions, count=len(predictions))
+        
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        metrics.inc('errors_total', endpoint='/predict/batch/ensemble', kind='overloaded')
+        raise overloaded(e)
     except Exception as e:
-        logger.error(f"Prediction error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+        metrics.inc('errors_total', endpoint='/predict/batch/ensemble', kind='exception')
+        logger.error(f"Batch ensemble prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch ensemble prediction failed: {str(e)}")
 
 @app.post("/predict/explain", response_model=ExplanationResponse)
-async def predict_with_explanation(features: StartupFeatures):
+async def predict_with_explanation(
+    features: StartupFeatures,
+    model: Optional[str] = None,
+    nsamples: Optional[int] = Query(None, ge=10, le=MAX_EXPLAIN_NSAMPLES),
+    background_size: Optional[int] = Query(None, ge=1),
+    snapshot: ModelSnapshot = Depends(active_snapshot)
+):
     """
     Predict startup success with SHAP explanations
+    nsamples/background_size override the explanation budget of kernel explainers (SVM)
     """
     try:
-        if not models or not explainers:
-            raise HTTPException(status_code=503, detail="Models or explainers not loaded")
-        
-        # Gets basic prediction
-        prediction_response = await predict_success(features)
+        # Gets basic prediction from the same model version
+        prediction_response = await predict_success(features, model, snapshot)
         
         # Preprocess features for SHAP
-        X = preprocess_features(features)
+        X = preprocess_features(snapshot, features)
         X = X.reshape(1, -1)
         
         # Uses same model as prediction
         model_name = prediction_response.model_used
-        explainer = explainers.get(model_name)
+        explainer = await get_explainer(snapshot, model_name)
         
         if not explainer:
             raise HTTPException(status_code=503, detail=f"Explainer for {model_name} not available")
         
-        # Gets SHAP values
-        shap_values = explainer.shap_values(X)
+        options = explanation_options(explainer, nsamples, background_size)
+        output_space = explanation_output_space(explainer)
+        
+        cache_kind = f"explain:{options.get('nsamples', '')}:{options.get('background_size', '')}"
+        cache_key = prediction_cache.make_key(cache_kind, model_name, snapshot.model_versions.get(model_name, ''), X)
+        cached = prediction_cache.get(cache_key) if not profiled() else None
+        if cached is not None:
+            feature_importance, top_factors = cached
+            return ExplanationResponse(
+                prediction=prediction_response,
+                feature_importance=feature_importance,
+                top_factors=top_factors,
+                output_space=output_space
+            )
+        
+        # Gets SHAP values off the event loop
+        with metrics.time('stage_duration_seconds', stage='explanation', model=model_name):
+            shap_values = await run_explainer(snapshot, model_name, X, options)
+        serialization_start = time.perf_counter()
         
         # Handles different SHAP output formats
         if isinstance(shap_values, list):
             shap_values = shap_values[1]  # Use positive class for binary classification
         
         # Creates feature importance dictionary
-        if len(feature_columns) == len(shap_values[0]):
-            feature_importance = dict(zip(feature_columns, shap_values[0]))
+        if len(snapshot.feature_columns) == len(shap_values[0]):
+            feature_importance = dict(zip(snapshot.feature_columns, shap_values[0]))
         else:
             # Fallback to generic names if feature names don't match
             feature_importance = {f"feature_{i}": val for i, val in enumerate(shap_values[0])}
@@ -317,55 +1300,123 @@ async def predict_with_explanation(features: StartupFeatures):
                 "impact": "positive" if importance > 0 else "negative"
             })
         
-        return ExplanationResponse(
+        feature_importance = {name: float(value) for name, value in feature_importance.items()}
+        prediction_cache.put(cache_key, (feature_importance, top_factors))
+        
+        response = ExplanationResponse(
             prediction=prediction_response,
             feature_importance=feature_importance,
-            top_factors=top_factors
+            top_factors=top_factors,
+            output_space=output_space
         )
+        metrics.observe('stage_duration_seconds', time.perf_counter() - serialization_start,
+                        stage='explanation_serialization', model=model_name)
+        return response
         
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        metrics.inc('errors_total', endpoint='/predict/explain', kind='overloaded')
+        raise overloaded(e)
     except Exception as e:
+        metrics.inc('errors_total', endpoint='/predict/explain', kind='exception')
         logger.error(f"Explanation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Explanation failed: {str(e)}")
 
 @app.get("/models")
 async def list_models():
     """
-    Lists available models and their status
+    Lists available models and their status, with the active version and the reload history
     """
+    snapshot = registry.active
+    if snapshot is None:
+        return {"active_version": None, "available_models": [], "preprocessor_loaded": False,
+                "reloads": list(registry.history)}
     return {
-        "available_models": list(models.keys()),
-        "available_explainers": list(explainers.keys()),
-        "feature_columns_count": len(feature_columns),
-        "preprocessor_loaded": preprocessor is not None
+        "active_version": snapshot.version,
+        "loaded_at": snapshot.describe()['loaded_at'],
+        "available_models": list(snapshot.models.keys()),
+        "bundle_version": snapshot.model_bundle.version if snapshot.model_bundle is not None else None,
+        "available_explainers": list(snapshot.artifact_paths['explainers'].keys()),
+        "loaded_explainers": list(snapshot.explainers.keys()),
+        "model_versions": snapshot.model_versions,
+        "native_scorers": list(snapshot.native_scorers.keys()),
+        "feature_columns_count": len(snapshot.feature_columns),
+        "preprocessor_loaded": snapshot.preprocessor is not None,
+        "retiring_versions": [retiring.describe() for retiring in registry.retiring],
+        "reloads": list(registry.history)
     }
 
+@app.post("/admin/reload")
+async def reload_endpoint(x_admin_token: Optional[str] = Header(None)):
+    """
+    Loads and warms the current model files as a new version, then swaps it in without dropping requests
+    """
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Reloading is disabled, set ADMIN_TOKEN to enable it")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="A valid X-Admin-Token is required")
+    if registry.reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A reload is already in progress")
+    try:
+        return await reload_models('admin')
+    except Exception as e:
+        active = registry.active.version if registry.active is not None else None
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving {active}: {str(e)}")
+
 @app.get("/categories")
-async def get_available_categories():
+async def get_available_categories(request: Request):
     """
     Returns the list of available categories for the frontend
     """
-    categories = [
-        'software', 'mobile', 'social', 'media', 'web', 'e-commerce', 
-        'biotechnology', 'curated', 'health', 'advertising', 'games', 
-        'enterprise', 'technology', 'marketing', 'analytics'
-    ]
-    return {"categories": categories}
+    return catalog_responses()['categories'].respond(request)
+
+def catalog_responses() -> Dict[str, PrecomputedResponse]:
+    """
+    Dropdown payloads of the active version, empty lists before the first one is loaded
+    """
+    return registry.active.catalog_responses if registry.active is not None else empty_catalog_responses
+
+def autocomplete(index: NameIndex, key: str, prefix: str, limit: int, offset: int) -> Dict[str, Any]:
+    """
+    One page of the names starting with prefix
+    """
+    names, total = index.prefix(prefix, limit, offset)
+    return {key: names, "prefix": prefix, "total": total, "offset": offset, "limit": limit}
 
 @app.get("/regions")
-async def get_available_regions():
+async def get_available_regions(
+    request: Request,
+    prefix: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_AUTOCOMPLETE_LIMIT),
+    offset: int = Query(0, ge=0)
+):
     """
     Returns the list of available regions for the frontend dropdown
+    Precomputed bytes with an ETag, 304 when If-None-Match is current
+    With prefix, one page of the regions starting with it (case INSENSITIVE) for autocomplete
     """
-    regions = sorted(list(region_lookup.values()))
-    return {"regions": regions}
+    if prefix is not None:
+        index = registry.active.region_index if registry.active is not None else NameIndex([])
+        return autocomplete(index, "regions", prefix, limit, offset)
+    return catalog_responses()['regions'].respond(request)
 
 @app.get("/cities") 
-async def get_available_cities():
+async def get_available_cities(
+    request: Request,
+    prefix: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_AUTOCOMPLETE_LIMIT),
+    offset: int = Query(0, ge=0)
+):
     """
     Returns the list of available cities for the frontend dropdown
+    Precomputed bytes with an ETag, 304 when If-None-Match is current
+    With prefix, one page of the cities starting with it (case INSENSITIVE) for autocomplete
     """
-    cities = sorted(list(city_lookup.values()))
-    return {"cities": cities}
+    if prefix is not None:
+        index = registry.active.city_index if registry.active is not None else NameIndex([])
+        return autocomplete(index, "cities", prefix, limit, offset)
+    return catalog_responses()['cities'].respond(request)
 
 if __name__ == "__main__":
     import uvicorn
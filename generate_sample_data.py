@@ -1,85 +1,215 @@
 """
 Generate sample startup data for testing the ML pipeline
+
+Rows are generated and written in chunks, so memory stays flat from thousands to
+tens of millions of rows. Every chunk draws from its own generator seeded with
+(seed, chunk index), so the output is identical for a given seed and chunk size
+no matter how many worker processes produce it. City, region and category
+cardinality grows with the row count
+
+Usage: python generate_sample_data.py [--rows 5000] [--seed 42] [--chunk-size 100000]
+                                      [--output data/raw/startups_data.csv] [--workers 4]
 """
+import argparse
+import sys
+import time
 import pandas as pd
 import numpy as np
-import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Set
 
-# Set random seed for reproducibility
-np.random.seed(42)
-
-# Create data directories
 project_root = Path(__file__).parent
-data_dir = project_root / "data"
-raw_dir = data_dir / "raw"
-raw_dir.mkdir(parents=True, exist_ok=True)
-
-print("Generating sample startup data...")
-
-# Generate sample data with similar structure to Crunchbase
-n_samples = 5000  # Generate 5000 sample records
-
-# Define features matching the model expectations
-data = {
-    'name': [f'Startup_{i}' for i in range(n_samples)],
-    'founded_at': np.random.choice(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], n_samples),
-    'founded_month': np.random.randint(1, 13, n_samples),
-    'founded_year': np.random.choice(range(1995, 2015), n_samples),
-    'founded_quarter': np.random.randint(1, 5, n_samples),
-    'status': np.random.choice(['acquired', 'operating', 'closed'], n_samples, p=[0.08, 0.78, 0.14]),
-    'country_code': np.random.choice(['USA', 'GBR', 'CAN', 'IND', 'DEU', 'FRA', 'CHN', 'JPN', 'AUS', 'NLD'], n_samples, p=[0.75, 0.05, 0.03, 0.03, 0.02, 0.02, 0.02, 0.02, 0.02, 0.04]),
-    'state_code': np.random.choice(['CA', 'NY', 'MA', 'TX', 'WA', 'IL', 'PA', 'NC', 'GA', 'CO', 'Other'], n_samples),
-    'city': np.random.choice(['San Francisco', 'New York', 'Boston', 'Austin', 'Seattle', 'Chicago', 'Los Angeles', 'Denver', 'Atlanta', 'Other'], n_samples),
-    'region': np.random.choice(['Northern America', 'Western Europe', 'Eastern Asia', 'Southern Asia', 'Other'], n_samples),
-    'category_code': np.random.choice(['software', 'web', 'mobile', 'enterprise', 'analytics', 'photo_video', 'search', 'medical', 'finance', 'clean_tech', 'hospitality', 'hardware', 'advertising', 'network_hosting', 'public_relations', 'games_video', 'news', 'nanotech', 'ecommerce', 'manufacturing', 'education', 'semiconductor', 'biotech', 'consulting', 'fashion'], n_samples),
-    'funding_total_usd': np.random.lognormal(mean=3.5, sigma=2.5, size=n_samples).astype(int),
-    'funding_rounds': np.random.choice(range(0, 8), n_samples),
-    'founded_days': np.random.randint(0, 365, n_samples),
-    'age_first_milestone_year': np.random.randint(0, 20, n_samples),
-    'age_last_milestone_year': np.random.randint(0, 20, n_samples),
-    'age_first_funding_year': np.random.randint(0, 20, n_samples),
-}
-
-# Create DataFrame
-df = pd.DataFrame(data)
-
-# Ensure status distribution is realistic
-acquired_mask = (df['founded_year'] < 2010) & (np.random.random(n_samples) < 0.15)
-df.loc[acquired_mask, 'status'] = 'acquired'
-df.loc[~acquired_mask & (np.random.random(n_samples) < 0.3), 'status'] = 'closed'
-df.loc[~acquired_mask & (df['status'] != 'closed'), 'status'] = 'operating'
-
-# Add some missing values to be more realistic
-missing_rate = 0.05
-for col in ['state_code', 'city', 'age_first_funding_year']:
-    missing_indices = np.random.choice(n_samples, size=int(n_samples * missing_rate), replace=False)
-    df.loc[missing_indices, col] = np.nan
-
-print(f"Generated {n_samples} sample records")
-print(f"Status distribution:\n{df['status'].value_counts()}")
-print(f"Sample data shape: {df.shape}")
-
-# Save the raw data
-output_path = raw_dir / "startups_data.csv"
-df.to_csv(output_path, index=False, encoding='latin-1')
-print(f"\nSaved sample data to: {output_path}")
-
-# Also create sample unique cities and regions for the dropdown
-unique_regions = df['region'].unique()
-unique_cities = df[df['city'].notna()]['city'].unique()
-
-processed_dir = data_dir / "processed"
-processed_dir.mkdir(parents=True, exist_ok=True)
-
-regions_df = pd.DataFrame({'region': sorted(unique_regions)})
-cities_df = pd.DataFrame({'city': sorted(unique_cities)})
-
-regions_df.to_csv(processed_dir / "unique_regions.csv", index=False)
-cities_df.to_csv(processed_dir / "unique_cities.csv", index=False)
-
-print(f"Saved {len(regions_df)} regions to {processed_dir / 'unique_regions.csv'}")
-print(f"Saved {len(cities_df)} cities to {processed_dir / 'unique_cities.csv'}")
-
-print("\n✓ Sample data generation complete!")
-print("You can now run the notebooks to train the models.")
+sys.path.insert(0, str(project_root))
+
+from src.data_utils import ChunkWriter
+
+# Initial status draw, then adjusted below like the original generator
+STATUSES = ['acquired', 'operating', 'closed']
+STATUS_WEIGHTS = [0.08, 0.78, 0.14]
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+COUNTRIES = ['USA', 'GBR', 'CAN', 'IND', 'DEU', 'FRA', 'CHN', 'JPN', 'AUS', 'NLD']
+COUNTRY_WEIGHTS = [0.75, 0.05, 0.03, 0.03, 0.02, 0.02, 0.02, 0.02, 0.02, 0.04]
+STATES = ['CA', 'NY', 'MA', 'TX', 'WA', 'IL', 'PA', 'NC', 'GA', 'CO', 'Other']
+BASE_CITIES = ['San Francisco', 'New York', 'Boston', 'Austin', 'Seattle', 'Chicago', 'Los Angeles', 'Denver',
+               'Atlanta', 'Other']
+BASE_REGIONS = ['Northern America', 'Western Europe', 'Eastern Asia', 'Southern Asia', 'Other']
+BASE_CATEGORIES = ['software', 'web', 'mobile', 'enterprise', 'analytics', 'photo_video', 'search', 'medical',
+                   'finance', 'clean_tech', 'hospitality', 'hardware', 'advertising', 'network_hosting',
+                   'public_relations', 'games_video', 'news', 'nanotech', 'ecommerce', 'manufacturing',
+                   'education', 'semiconductor', 'biotech', 'consulting', 'fashion']
+
+# Columns with injected missing values, numeric ones are generated as float so every chunk shares one schema
+MISSING_COLUMNS = ['state_code', 'city', 'age_first_funding_year']
+MISSING_RATE = 0.05
+
+def build_catalog(n_rows: int, n_cities: Optional[int] = None, n_regions: Optional[int] = None,
+                  n_categories: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    City, region and category names, growing with n_rows beyond the base lists
+    5,000 rows keep the base lists, 1M rows give ~2,000 cities, 10 regions and 50 categories
+    """
+    n_cities = n_cities or max(len(BASE_CITIES), n_rows // 500)
+    n_regions = n_regions or max(len(BASE_REGIONS), n_rows // 100000)
+    n_categories = n_categories or max(len(BASE_CATEGORIES), n_rows // 20000)
+
+    def grow(base: List[str], size: int, prefix: str) -> List[str]:
+        return base[:size] + [f"{prefix}_{i}" for i in range(max(0, size - len(base)))]
+
+    return {
+        'city': grow(BASE_CITIES, n_cities, 'City'),
+        'region': grow(BASE_REGIONS, n_regions, 'Region'),
+        'category_code': grow(BASE_CATEGORIES, n_categories, 'category')
+    }
+
+def _zipf_choice(rng: np.random.Generator, values: List[str], base_size: int, size: int) -> np.ndarray:
+    """
+    Draws values with 1/rank weights, so large catalogs have a few dense and many sparse entries
+    Uniform while the catalog is no larger than its base list, like the original sample data
+    """
+    if len(values) <= base_size:
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+    weights = 1.0 / np.arange(1, len(values) + 1)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+def generate_chunk(chunk_index: int, start: int, size: int, seed: int, catalog: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    Generates rows start..start+size, deterministic for (seed, chunk_index)
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+
+    # Define features matching the model expectations
+    df = pd.DataFrame({
+        'name': [f'Startup_{i}' for i in range(start, start + size)],
+        'founded_at': np.asarray(MONTHS, dtype=object)[rng.integers(0, 12, size)],
+        'founded_month': rng.integers(1, 13, size),
+        'founded_year': rng.integers(1995, 2015, size),
+        'founded_quarter': rng.integers(1, 5, size),
+        'status': rng.choice(np.asarray(STATUSES, dtype=object), size, p=STATUS_WEIGHTS),
+        'country_code': rng.choice(np.asarray(COUNTRIES, dtype=object), size, p=COUNTRY_WEIGHTS),
+        'state_code': np.asarray(STATES, dtype=object)[rng.integers(0, len(STATES), size)],
+        'city': _zipf_choice(rng, catalog['city'], len(BASE_CITIES), size),
+        'region': _zipf_choice(rng, catalog['region'], len(BASE_REGIONS), size),
+        'category_code': _zipf_choice(rng, catalog['category_code'], len(BASE_CATEGORIES), size),
+        'funding_total_usd': rng.lognormal(mean=3.5, sigma=2.5, size=size).astype(np.int64),
+        'funding_rounds': rng.integers(0, 8, size),
+        'founded_days': rng.integers(0, 365, size),
+        'age_first_milestone_year': rng.integers(0, 20, size),
+        'age_last_milestone_year': rng.integers(0, 20, size),
+        'age_first_funding_year': rng.integers(0, 20, size).astype(np.float64),
+    })
+
+    # Ensure status distribution is realistic, rows drawn as closed stay closed (~35% closed overall)
+    acquired_mask = (df['founded_year'] < 2010).to_numpy() & (rng.random(size) < 0.15)
+    df.loc[acquired_mask, 'status'] = 'acquired'
+    df.loc[~acquired_mask & (rng.random(size) < 0.3), 'status'] = 'closed'
+    df.loc[~acquired_mask & (df['status'] != 'closed').to_numpy(), 'status'] = 'operating'
+
+    # Add some missing values to be more realistic
+    for col in MISSING_COLUMNS:
+        df.loc[rng.random(size) < MISSING_RATE, col] = np.nan
+    return df
+
+def _chunk_bounds(n_rows: int, chunk_size: int):
+    for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+        yield chunk_index, start, min(chunk_size, n_rows - start)
+
+def generate(output_path: Path, n_rows: int, seed: int = 42, chunk_size: int = 100000, workers: int = 1,
+             catalog: Optional[Dict[str, List[str]]] = None) -> Dict[str, object]:
+    """
+    Streams n_rows generated rows to a CSV or Parquet file chunk by chunk
+    With workers > 1 chunks are generated in a process pool, at most 2 per worker in flight
+    Returns row/chunk counts, seconds, the status counts and the regions and cities written
+    """
+    catalog = catalog or build_catalog(n_rows)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # latin-1 like the original sample data and the loaders that read it
+    writer = ChunkWriter(output_path, encoding='latin-1')
+    status_counts = pd.Series(dtype='int64')
+    regions: Set[str] = set()
+    cities: Set[str] = set()
+    rows = 0
+    chunks = 0
+    start_time = time.perf_counter()
+
+    def write(df: pd.DataFrame) -> None:
+        nonlocal status_counts, rows, chunks
+        writer.write(df)
+        status_counts = status_counts.add(df['status'].value_counts(), fill_value=0)
+        regions.update(df['region'].dropna().unique())
+        cities.update(df['city'].dropna().unique())
+        rows += len(df)
+        chunks += 1
+        print(f"   {rows}/{n_rows} rows ({rows / (time.perf_counter() - start_time):.0f} rows/sec)")
+
+    try:
+        if workers <= 1:
+            for chunk_index, start, size in _chunk_bounds(n_rows, chunk_size):
+                write(generate_chunk(chunk_index, start, size, seed, catalog))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for chunk_index, start, size in _chunk_bounds(n_rows, chunk_size):
+                    if len(in_flight) >= 2 * workers:
+                        write(in_flight.popleft().result())
+                    in_flight.append(pool.submit(generate_chunk, chunk_index, start, size, seed, catalog))
+                while in_flight:
+                    write(in_flight.popleft().result())
+    finally:
+        writer.close()
+
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": time.perf_counter() - start_time,
+        "status_counts": status_counts.astype('int64'),
+        "regions": sorted(regions),
+        "cities": sorted(cities)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic startup data")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows per generated and written chunk")
+    parser.add_argument("--output", default=None, help=".csv or .parquet file (default data/raw/startups_data.csv)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks")
+    parser.add_argument("--cities", type=int, default=None, help="City cardinality (default grows with --rows)")
+    parser.add_argument("--regions", type=int, default=None, help="Region cardinality (default grows with --rows)")
+    parser.add_argument("--categories", type=int, default=None, help="Category cardinality (default grows with --rows)")
+    parser.add_argument("--skip-dropdowns", action="store_true", help="Don't rewrite data/processed dropdown CSVs")
+    args = parser.parse_args()
+
+    # Create data directories
+    data_dir = project_root / "data"
+    output_path = Path(args.output) if args.output else data_dir / "raw" / "startups_data.csv"
+    catalog = build_catalog(args.rows, args.cities, args.regions, args.categories)
+
+    print(f"Generating {args.rows} sample startup records (seed {args.seed}, "
+          f"{len(catalog['city'])} cities, {len(catalog['region'])} regions, "
+          f"{len(catalog['category_code'])} categories)...")
+    report = generate(output_path, args.rows, args.seed, args.chunk_size, args.workers, catalog)
+
+    print(f"Generated {report['rows']} sample records in {report['chunks']} chunks, "
+          f"{report['seconds']:.1f}s ({report['rows'] / report['seconds']:.0f} rows/sec)")
+    print(f"Status distribution:\n{report['status_counts']}")
+    print(f"\nSaved sample data to: {output_path}")
+
+    # Also create sample unique cities and regions for the dropdown
+    if not args.skip_dropdowns:
+        processed_dir = data_dir / "processed"
+        processed_dir.mkdir(parents=True, exist_ok=True)
+
+        regions_df = pd.DataFrame({'region': report['regions']})
+        cities_df = pd.DataFrame({'city': report['cities']})
+
+        regions_df.to_csv(processed_dir / "unique_regions.csv", index=False)
+        cities_df.to_csv(processed_dir / "unique_cities.csv", index=False)
+
+        print(f"Saved {len(regions_df)} regions to {processed_dir / 'unique_regions.csv'}")
+        print(f"Saved {len(cities_df)} cities to {processed_dir / 'unique_cities.csv'}")
+
+    print("\n✓ Sample data generation complete!")
+    print("You can now run the notebooks to train the models.")
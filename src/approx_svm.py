@@ -0,0 +1,157 @@
+"""
+Approximate RBF SVM: a Nystroem feature map feeding a linear classifier
+
+The exact SVC keeps thousands of support vectors on the SMOTE resampled training set and
+pays for every one of them per row, plus libsvm's pairwise Platt coupling. The Nystroem map
+projects onto a fixed set of landmark rows with the same kernel and gamma, and a balanced
+logistic regression on those features gives calibrated probabilities directly, so scoring
+costs n_components kernel evaluations regardless of the training set size
+
+Usage: python -m src.approx_svm [--components 100,300,1000] [--repeats 50]
+Compares the saved svm and svm_approx pickles (plus any extra component counts) on the
+held out split train_models.py uses, writes results/models/svm_approx_report.json
+"""
+import argparse
+import json
+import sys
+import time
+import joblib
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPONENTS = 300
+BENCHMARK_BATCH_SIZES = (1, 64, 1000)
+REPORT_FILE = 'svm_approx_report.json'
+
+def build_approx_svm(X_train: np.ndarray, n_components: int = DEFAULT_COMPONENTS) -> Any:
+    """
+    Returns the unfitted Nystroem + LogisticRegression pipeline
+    gamma matches SVC(gamma='scale'), so both variants approximate the same kernel
+    """
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    gamma = 1.0 / (X_train.shape[1] * X_train.var())
+    return Pipeline([
+        ('feature_map', Nystroem(kernel='rbf', gamma=gamma, n_components=min(n_components, len(X_train)),
+                                 random_state=42)),
+        ('classifier', LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced'))
+    ])
+
+def kernel_rows(model: Any) -> int:
+    """
+    Kernel evaluations per scored row: support vectors or Nystroem landmarks
+    """
+    if hasattr(model, 'support_vectors_'):
+        return len(model.support_vectors_)
+    return len(model.steps[0][1].components_)
+
+def compare_variants(models: Dict[str, Any], X_test: np.ndarray, y_test: np.ndarray,
+                     reference: str = 'svm', batch_sizes: Sequence[int] = BENCHMARK_BATCH_SIZES,
+                     repeats: int = 50) -> Dict[str, Any]:
+    """
+    Accuracy, ROC AUC, agreement with the reference model and median predict_proba latency
+    (sklearn and native scorer) per batch size for each model
+    """
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from src.model_export import benchmark, compile_model
+
+    probabilities = {name: model.predict_proba(X_test)[:, 1] for name, model in models.items()}
+    report = {}
+    for name, model in models.items():
+        positive = probabilities[name]
+        entry = {
+            "kernel_rows": kernel_rows(model),
+            "accuracy": float(accuracy_score(y_test, positive > 0.5)),
+            "roc_auc": float(roc_auc_score(y_test, positive))
+        }
+        if reference in probabilities and name != reference:
+            entry["agreement"] = float(np.mean((positive > 0.5) == (probabilities[reference] > 0.5)))
+            entry["mean_abs_dp"] = float(np.mean(np.abs(positive - probabilities[reference])))
+
+        scorer = compile_model(model)
+        latency = {}
+        for batch_size in batch_sizes:
+            X_batch = X_test[:batch_size]
+            # The exact SVM is slow on large batches, so those get fewer repeats
+            count = max(3, repeats // max(1, batch_size // 64))
+            latency[str(batch_size)] = {
+                "sklearn_ms": benchmark(model.predict_proba, X_batch, count) * 1000.0,
+                "native_ms": benchmark(scorer.predict_proba, X_batch, count) * 1000.0
+            }
+        entry["latency"] = latency
+        report[name] = entry
+    return report
+
+def write_report(report: Dict[str, Any], models_dir: Path, meta: Optional[Dict[str, Any]] = None) -> Path:
+    path = Path(models_dir) / REPORT_FILE
+    content = {
+        "meta": {"created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), **(meta or {})},
+        "models": report
+    }
+    path.write_text(json.dumps(content, indent=2))
+    logger.info(f"SVM comparison saved to {path}")
+    return path
+
+def print_report(report: Dict[str, Any]) -> None:
+    batch_sizes = list(next(iter(report.values()))["latency"])
+    header = " ".join(f"{f'{size} rows ms':>13}" for size in batch_sizes)
+    print(f"   {'model':<16} {'kernel':>7} {'accuracy':>9} {'auc':>7} {'agree':>7} {header}")
+    for name, entry in report.items():
+        agreement = f"{entry['agreement']:.1%}" if "agreement" in entry else "-"
+        latencies = " ".join(f"{entry['latency'][size]['native_ms']:>13.3f}" for size in batch_sizes)
+        print(f"   {name:<16} {entry['kernel_rows']:>7} {entry['accuracy']:>9.4f} {entry['roc_auc']:>7.4f} "
+              f"{agreement:>7} {latencies}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the approximate SVM with the exact one")
+    parser.add_argument("--models-dir", default=None, help="Directory with the svm pickles (default results/models)")
+    parser.add_argument("--components", default="",
+                        help="Extra comma separated Nystroem sizes to fit and compare, e.g. 100,1000")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per single row benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    # Pickles reference src.*, not __main__
+    from src.approx_svm import build_approx_svm, compare_variants, print_report, write_report
+    from src.data_loader import load_raw_data
+    from src.data_preprocessing import StartupDataProcessor
+    from sklearn.model_selection import train_test_split
+
+    models_dir = Path(args.models_dir) if args.models_dir else project_root / "results" / "models"
+    processor = StartupDataProcessor.load(str(models_dir / 'preprocessor.pkl'))
+    df = load_raw_data(project_root / "data" / "raw" / "startups_data.csv")
+    X = processor.transform(df)
+    y = (df['status'] == 'acquired').to_numpy(dtype=np.int64)
+    # Same split as train_models.py, so the test rows were never seen in training
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    models = {}
+    for name, filename in (('svm', 'svm_rbf_best.pkl'), ('svm_approx', 'svm_approx_best.pkl')):
+        if (models_dir / filename).exists():
+            models[name] = joblib.load(models_dir / filename)
+        else:
+            print(f"{filename} not found, train it with: python train_models.py --models {name}")
+
+    components = [int(size) for size in args.components.split(',') if size]
+    if components:
+        from imblearn.over_sampling import SMOTE
+        X_train, y_train = SMOTE(random_state=42).fit_resample(X_train, y_train)
+        for n_components in components:
+            start = time.perf_counter()
+            models[f"nystroem_{n_components}"] = build_approx_svm(X_train, n_components).fit(X_train, y_train)
+            print(f"Fitted nystroem_{n_components} in {time.perf_counter() - start:.1f}s")
+    if not models:
+        sys.exit(1)
+
+    report = compare_variants(models, X_test, y_test, repeats=args.repeats)
+    print_report(report)
+    path = write_report(report, models_dir, {"test_rows": len(X_test)})
+    print(f"\nSaved report to {path}")
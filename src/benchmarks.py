@@ -0,0 +1,238 @@
+"""
+Benchmark suite for the preprocessing, inference and explanation hot paths
+
+Covers batch transform throughput, transform_single latency, predict_proba per
+model at batch sizes 1-10k, shap_values per explainer and end-to-end /predict and
+/predict/explain through an in-process test client. Inputs come from the seeded
+generate_sample_data.py generator, so runs are reproducible
+
+Usage: python -m src.benchmarks [--quick] [--save-baseline] [--threshold 0.2]
+Results go to results/benchmarks/latest.json and are compared against
+results/benchmarks/baseline.json, exiting 1 when any p50 regresses past the threshold
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.data_utils import API_COLUMNS, synthetic_frame
+
+logger = logging.getLogger(__name__)
+
+TRANSFORM_SIZES = [1000, 10000, 100000]
+PREDICT_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+def time_calls(fn: Callable[[int], Any], repeats: int, warmup: int = 3) -> Dict[str, float]:
+    """
+    Calls fn(i) repeats times after warmup calls, returns latency percentiles in milliseconds
+    """
+    for i in range(warmup):
+        fn(i)
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(i)
+        timings[i] = time.perf_counter() - start
+    timings *= 1000.0
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "mean_ms": float(timings.mean()),
+        "repeats": repeats
+    }
+
+def load_artifacts(models_dir: Path) -> Dict[str, Any]:
+    """
+    Preprocessor, predict_proba callables and explainers as the API serves them, from the bundle or pickles
+    """
+    from src.bulk_score import MODEL_FILES, load_scoring_artifacts
+    from src.model_bundle import latest_bundle_dir, load_bundle
+
+    explainers = {}
+    bundle_dir = latest_bundle_dir(models_dir)
+    if bundle_dir is not None:
+        bundle = load_bundle(bundle_dir, verify=False)
+        names = list(bundle.models)
+        explainers = {name: bundle.explainer(name) for name in bundle.explainer_names}
+    else:
+        names = [name for name, filename in MODEL_FILES.items() if (models_dir / filename).exists()]
+        for name in names:
+            path = models_dir / f"{name}_explainer.pkl"
+            if path.exists():
+                explainers[name] = joblib.load(path)
+    processor, predictors = load_scoring_artifacts(models_dir, names, verify=False)
+    return {"processor": processor, "predictors": predictors, "explainers": explainers}
+
+def bench_transform(processor: Any, frames: Dict[int, pd.DataFrame], repeats: int) -> Dict[str, Any]:
+    results = {}
+    for n_rows, df in frames.items():
+        stats = time_calls(lambda _: processor.transform(df), max(3, repeats // max(1, n_rows // 1000)))
+        stats["rows_per_sec"] = n_rows / (stats["p50_ms"] / 1000.0)
+        results[f"transform[{n_rows}]"] = stats
+    return results
+
+def bench_transform_single(processor: Any, df: pd.DataFrame, repeats: int) -> Dict[str, Any]:
+    records = df[API_COLUMNS].to_dict(orient='records')
+    return {"transform_single": time_calls(lambda i: processor.transform_single(records[i % len(records)]), repeats)}
+
+def bench_predict(predictors: Dict[str, Callable], X: np.ndarray, repeats: int) -> Dict[str, Any]:
+    results = {}
+    for name, predict_fn in predictors.items():
+        for batch_size in PREDICT_BATCH_SIZES:
+            X_batch = X[:batch_size]
+            stats = time_calls(lambda _: predict_fn(X_batch), max(3, repeats // max(1, batch_size // 100)))
+            stats["rows_per_sec"] = batch_size / (stats["p50_ms"] / 1000.0)
+            results[f"predict_proba[{name},{batch_size}]"] = stats
+    return results
+
+def bench_explainers(explainers: Dict[str, Any], X: np.ndarray, repeats: int) -> Dict[str, Any]:
+    results = {}
+    for name, explainer in explainers.items():
+        # Kernel explanations take seconds, so they get fewer repeats
+        count = repeats if not name.startswith('svm') else max(3, repeats // 20)
+        results[f"shap_values[{name}]"] = time_calls(lambda i: explainer.shap_values(X[i % len(X)].reshape(1, -1)),
+                                                     count, warmup=1)
+    return results
+
+def bench_api(df: pd.DataFrame, models: List[str], repeats: int) -> Dict[str, Any]:
+    """
+    End-to-end requests through the FastAPI test client, with the prediction cache off so every call does the work
+    """
+    from fastapi.testclient import TestClient
+    from app import app as api
+    from src.prediction_cache import PredictionCache
+
+    payloads = [
+        {**record, 'founded_year': int(record['founded_year'])}
+        for record in df[API_COLUMNS].dropna().to_dict(orient='records')
+    ]
+    results = {}
+    # The app reads its environment once at import, so the settings are swapped on the module and restored after
+    settings = {'prediction_cache': api.prediction_cache, 'BACKGROUND_STARTUP': api.BACKGROUND_STARTUP}
+    api.prediction_cache = PredictionCache(0, 0)
+    api.BACKGROUND_STARTUP = False
+    try:
+        with TestClient(api.app) as client:
+            def post(path: str, i: int, params: Optional[Dict[str, str]] = None) -> None:
+                response = client.post(path, json=payloads[i % len(payloads)], params=params)
+                response.raise_for_status()
+
+            results["api:/predict"] = time_calls(lambda i: post("/predict", i), repeats)
+            for name in models:
+                count = repeats if not name.startswith('svm') else max(3, repeats // 20)
+                results[f"api:/predict/explain[{name}]"] = time_calls(
+                    lambda i: post("/predict/explain", i, {"model": name}), count, warmup=1
+                )
+    finally:
+        for name, value in settings.items():
+            setattr(api, name, value)
+    return results
+
+def run_suite(models_dir: Path, seed: int = 42, quick: bool = False, include_api: bool = True) -> Dict[str, Any]:
+    """
+    Runs every benchmark, returns {"meta": ..., "benchmarks": {name: stats}}
+    """
+    repeats = 20 if quick else 200
+    sizes = TRANSFORM_SIZES[:2] if quick else TRANSFORM_SIZES
+    frames = {n_rows: synthetic_frame(n_rows, seed) for n_rows in sizes}
+    largest = frames[max(sizes)]
+
+    artifacts = load_artifacts(models_dir)
+    processor = artifacts["processor"]
+    X = processor.transform(largest)
+    X = X[~np.isnan(X).any(axis=1)]
+    if len(X) < max(PREDICT_BATCH_SIZES):
+        X = np.resize(X, (max(PREDICT_BATCH_SIZES), X.shape[1]))
+
+    benchmarks = {}
+    benchmarks.update(bench_transform(processor, frames, repeats))
+    benchmarks.update(bench_transform_single(processor, frames[min(sizes)], repeats * 10))
+    benchmarks.update(bench_predict(artifacts["predictors"], X, repeats))
+    benchmarks.update(bench_explainers(artifacts["explainers"], X, repeats))
+    if include_api:
+        benchmarks.update(bench_api(frames[min(sizes)], list(artifacts["predictors"]), repeats))
+
+    return {
+        "meta": {
+            "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "seed": seed,
+            "quick": quick,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "benchmarks": benchmarks
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Returns one row per benchmark in both runs, regressed when p50 grew by more than threshold
+    """
+    rows = []
+    for name, stats in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before = baseline["benchmarks"][name]["p50_ms"]
+        ratio = stats["p50_ms"] / before if before > 0 else 1.0
+        rows.append({"name": name, "baseline_ms": before, "current_ms": stats["p50_ms"],
+                     "ratio": ratio, "regressed": ratio > 1.0 + threshold})
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing, inference and explanations")
+    parser.add_argument("--models-dir", default=None, help="Directory with the bundle or pickles (default results/models)")
+    parser.add_argument("--output-dir", default=None, help="Where results are saved (default results/benchmarks)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quick", action="store_true", help="Fewer repeats and sizes, for a fast smoke run")
+    parser.add_argument("--no-api", action="store_true", help="Skip the end-to-end test client benchmarks")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    # Keeps the per call transform lines out of the timings
+    logging.getLogger('src.data_preprocessing').setLevel(logging.WARNING)
+    logging.getLogger('shap').setLevel(logging.WARNING)
+    from src.benchmarks import compare, run_suite
+
+    models_dir = Path(args.models_dir) if args.models_dir else project_root / "results" / "models"
+    output_dir = Path(args.output_dir) if args.output_dir else project_root / "results" / "benchmarks"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    report = run_suite(models_dir, args.seed, args.quick, include_api=not args.no_api)
+    (output_dir / "latest.json").write_text(json.dumps(report, indent=2))
+
+    print(f"{'benchmark':<36} {'p50 ms':>10} {'p99 ms':>10} {'rows/sec':>12}")
+    for name, stats in report["benchmarks"].items():
+        throughput = f"{stats['rows_per_sec']:>12.0f}" if "rows_per_sec" in stats else f"{'':>12}"
+        print(f"{name:<36} {stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f} {throughput}")
+
+    baseline_path = output_dir / "baseline.json"
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"\nSaved baseline to {baseline_path}")
+    elif baseline_path.exists():
+        rows = compare(report, json.loads(baseline_path.read_text()), args.threshold)
+        regressions = [row for row in rows if row["regressed"]]
+        print(f"\nCompared {len(rows)} benchmarks against {baseline_path} (threshold +{args.threshold:.0%})")
+        for row in regressions:
+            print(f"   REGRESSION {row['name']}: {row['baseline_ms']:.3f}ms -> {row['current_ms']:.3f}ms "
+                  f"({row['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("   No regressions")
+    else:
+        print(f"\nNo baseline at {baseline_path}, run with --save-baseline to create one")
@@ -0,0 +1,197 @@
+"""
+Streaming bulk scorer for CSV/Parquet files larger than memory
+
+Reads the input in chunks (read_csv chunksize or Parquet record batches), runs
+StartupDataProcessor.transform and every requested model on each chunk and
+appends the probabilities to the output, so memory stays bounded by the chunk
+size times the number of chunks in flight
+
+Usage: python -m src.bulk_score input.csv output.parquet [--models xgboost logistic] [--workers 4]
+Parquet input/output needs pyarrow
+"""
+import argparse
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.data_preprocessing import StartupDataProcessor
+from src.data_utils import ChunkWriter
+from src.model_bundle import latest_bundle_dir, load_bundle
+from src.model_export import predict_proba_native
+
+logger = logging.getLogger(__name__)
+
+# Raw columns transform reads, category_list falls back to the Crunchbase category_code
+INPUT_COLUMNS = ['country_code', 'region', 'city', 'category_list', 'founded_year']
+
+# Models that score rows with a missing founding year, the others get NaN for those rows
+NAN_TOLERANT_MODELS = {'xgboost'}
+
+MODEL_FILES = {
+    'logistic': 'logistic_regression_best.pkl',
+    'xgboost': 'xgboost_best.pkl',
+    'svm': 'svm_rbf_best.pkl',
+    'svm_approx': 'svm_approx_best.pkl'
+}
+
+def load_scoring_artifacts(models_dir: Path, model_names: List[str],
+                           verify: bool = True) -> Tuple[StartupDataProcessor, Dict[str, Any]]:
+    """
+    Returns the preprocessor and a predict_proba callable per model
+    Uses the latest bundle (memory-mapped) when one exists, otherwise the loose pickles
+    """
+    models_dir = Path(models_dir)
+    bundle_dir = latest_bundle_dir(models_dir)
+    predictors = {}
+
+    if bundle_dir is not None:
+        bundle = load_bundle(bundle_dir, verify=verify)
+        for name in model_names:
+            if name not in bundle.models:
+                raise ValueError(f"Model '{name}' not in bundle {bundle.version}, choose from {list(bundle.models)}")
+            predictors[name] = lambda X, name=name: predict_proba_native(bundle.scorers[name], bundle.models[name], X)
+        return bundle.preprocessor, predictors
+
+    for name in model_names:
+        if name not in MODEL_FILES:
+            raise ValueError(f"Unknown model '{name}', choose from {list(MODEL_FILES)}")
+        predictors[name] = joblib.load(models_dir / MODEL_FILES[name]).predict_proba
+    return StartupDataProcessor.load(str(models_dir / 'preprocessor.pkl')), predictors
+
+def iter_chunks(path: Path, chunksize: int, columns: List[str], encoding: str = 'latin-1') -> Iterator[pd.DataFrame]:
+    """
+    Yields the input file chunksize rows at a time, reading only the listed columns that exist
+    """
+    wanted = set(columns)
+    if Path(path).suffix.lower() == '.parquet':
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        present = [name for name in parquet.schema_arrow.names if name in wanted]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=present):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, encoding=encoding, usecols=lambda name: name in wanted)
+
+def score_chunk(chunk: pd.DataFrame, processor: StartupDataProcessor, predictors: Dict[str, Any],
+                keep_columns: List[str]) -> pd.DataFrame:
+    """
+    Transforms one chunk and returns the kept columns plus a probability and prediction per model
+    """
+    if 'category_list' not in chunk.columns:
+        chunk = chunk.assign(category_list=chunk['category_code'].astype(str))
+    X = processor.transform(chunk)
+    complete = ~np.isnan(X).any(axis=1)
+
+    # Kept columns are written as strings so every chunk shares one output schema
+    result = pd.DataFrame({
+        column: chunk[column].astype('string') for column in keep_columns if column in chunk.columns
+    })
+    for name, predict_fn in predictors.items():
+        probability = np.full(len(X), np.nan)
+        rows = np.ones(len(X), dtype=bool) if name in NAN_TOLERANT_MODELS else complete
+        if rows.any():
+            probability[rows] = predict_fn(X[rows])[:, 1]
+        prediction = pd.array((probability > 0.5).astype(np.int8), dtype='Int8')
+        prediction[~rows] = pd.NA
+        result[f'{name}_probability'] = probability
+        result[f'{name}_prediction'] = prediction
+    return result
+
+# Artifacts loaded once inside each worker process
+_worker_state: Dict[str, Any] = {}
+
+def _init_worker(models_dir: str, model_names: List[str], keep_columns: List[str]) -> None:
+    # The parent already verified the bundle hashes, the arrays are shared through the page cache
+    logging.getLogger('src.data_preprocessing').setLevel(logging.WARNING)
+    processor, predictors = load_scoring_artifacts(Path(models_dir), model_names, verify=False)
+    _worker_state.update(processor=processor, predictors=predictors, keep_columns=keep_columns)
+
+def _score_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    return score_chunk(chunk, _worker_state['processor'], _worker_state['predictors'], _worker_state['keep_columns'])
+
+def score_file(input_path: Path, output_path: Path, models_dir: Path, model_names: List[str],
+               keep_columns: Optional[List[str]] = None, chunksize: int = 50000, workers: int = 1,
+               encoding: str = 'latin-1') -> Dict[str, Any]:
+    """
+    Scores input_path into output_path chunk by chunk, returns rows, chunks, seconds and rows/sec
+    With workers > 1 chunks are scored in a process pool, at most 2 chunks per worker in flight
+    Output rows keep the input order
+    """
+    keep_columns = list(keep_columns or [])
+    columns = INPUT_COLUMNS + ['category_code'] + keep_columns
+    start = time.perf_counter()
+    rows = 0
+    chunks = 0
+    writer = ChunkWriter(output_path)
+
+    try:
+        if workers <= 1:
+            processor, predictors = load_scoring_artifacts(models_dir, model_names)
+            for chunk in iter_chunks(input_path, chunksize, columns, encoding):
+                writer.write(score_chunk(chunk, processor, predictors, keep_columns))
+                rows += len(chunk)
+                chunks += 1
+                logger.info(f"Scored {rows} rows ({rows / (time.perf_counter() - start):.0f} rows/sec)")
+        else:
+            # Loads once up front so a bad bundle or model name fails before the pool starts
+            load_scoring_artifacts(models_dir, model_names)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(models_dir), model_names, keep_columns)) as pool:
+                in_flight = deque()
+                for chunk in iter_chunks(input_path, chunksize, columns, encoding):
+                    if len(in_flight) >= 2 * workers:
+                        scored = in_flight.popleft().result()
+                        writer.write(scored)
+                        rows += len(scored)
+                        chunks += 1
+                        logger.info(f"Scored {rows} rows ({rows / (time.perf_counter() - start):.0f} rows/sec)")
+                    in_flight.append(pool.submit(_score_in_worker, chunk))
+                while in_flight:
+                    scored = in_flight.popleft().result()
+                    writer.write(scored)
+                    rows += len(scored)
+                    chunks += 1
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of startups in bounded memory")
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--models-dir", default=None, help="Directory with the bundle or pickles (default results/models)")
+    parser.add_argument("--models", nargs="+", default=['xgboost'], help="Models to score with")
+    parser.add_argument("--keep-columns", nargs="*", default=['name'], help="Input columns copied to the output")
+    parser.add_argument("--chunksize", type=int, default=50000, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes scoring chunks")
+    parser.add_argument("--encoding", default='latin-1', help="CSV input encoding")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Keeps the per chunk transform lines out of the progress log
+    logging.getLogger('src.data_preprocessing').setLevel(logging.WARNING)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    # Worker processes import src.bulk_score, not __main__
+    from src.bulk_score import score_file
+
+    models_dir = Path(args.models_dir) if args.models_dir else project_root / "results" / "models"
+    report = score_file(Path(args.input), Path(args.output), models_dir, args.models,
+                        args.keep_columns, args.chunksize, args.workers, args.encoding)
+    print(f"Scored {report['rows']} rows in {report['chunks']} chunks, {report['seconds']:.1f}s "
+          f"({report['rows_per_sec']} rows/sec) -> {args.output}")
@@ -0,0 +1,67 @@
+"""
+Typed loader for the raw Crunchbase CSV, shared by training, preprocessing and dropdown extraction
+
+Reads only the columns the pipeline uses, with explicit dtypes so nothing is inferred:
+region, city, country_code and status become categoricals, founded_year float64 (NaN when missing)
+"""
+import importlib.util
+import pandas as pd
+import logging
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RAW_DTYPES = {
+    'name': object,
+    'status': 'category',
+    'country_code': 'category',
+    'region': 'category',
+    'city': 'category',
+    'category_code': object,
+    'founded_year': 'float64'
+}
+
+# Columns StartupDataProcessor.fit/transform, the training labels and the dropdowns read
+PIPELINE_COLUMNS = ['status', 'country_code', 'region', 'city', 'category_code', 'founded_year']
+
+def _read_options(columns: Optional[List[str]], engine: Optional[str]) -> dict:
+    """
+    Builds the shared read_csv arguments, falling back to the C parser without pyarrow
+    """
+    columns = list(columns or PIPELINE_COLUMNS)
+    if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+        logger.warning("pyarrow is not installed, reading with the C parser")
+        engine = None
+    return {
+        'usecols': columns,
+        'dtype': {column: RAW_DTYPES[column] for column in columns if column in RAW_DTYPES},
+        'engine': engine or 'c'
+    }
+
+def load_raw_data(path: Path, columns: Optional[List[str]] = None, engine: Optional[str] = None,
+                  encoding: str = 'latin-1') -> pd.DataFrame:
+    """
+    Reads the raw startups CSV once with explicit dtypes
+        columns: Columns to read (default PIPELINE_COLUMNS)
+        engine: 'pyarrow' for the multithreaded pyarrow parser, default the C parser
+        Returns a typed DataFrame with category_list derived from category_code
+    """
+    options = _read_options(columns, engine)
+    df = pd.read_csv(path, encoding=encoding, **options)
+    if 'category_code' in df.columns:
+        # Same string form train_models.py always used (missing codes become 'nan')
+        df['category_list'] = df['category_code'].astype(str)
+
+    memory_mb = df.memory_usage(deep=True).sum() / 1e6
+    logger.info(f"Loaded {len(df)} records ({len(df.columns)} columns, {memory_mb:.1f} MB) from {path}")
+    return df
+
+def iter_raw_data(path: Path, chunksize: int, columns: Optional[List[str]] = None,
+                  encoding: str = 'latin-1') -> Iterator[pd.DataFrame]:
+    """
+    Yields the raw CSV chunksize rows at a time with the same dtypes as load_raw_data
+    Categories are per chunk, so only category values (not codes) are comparable across chunks
+    """
+    options = _read_options(columns, None)
+    yield from pd.read_csv(path, encoding=encoding, chunksize=chunksize, **options)
@@ -6,10 +6,19 @@ from pathlib import Path
 import logging
 from typing import Dict, List, Optional, Tuple, Any
 
+from src.data_loader import iter_raw_data, load_raw_data
+
 # Sets up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Economic eras by founding year (inclusive bounds), missing and out of range years count as recovery
+ECONOMIC_ERAS = [
+    ('era_dotcom_era', 1995, 2000),
+    ('era_post_crash', 2001, 2008),
+    ('era_recovery', 2009, 2015)
+]
+
 class StartupDataProcessor:
     """
     Preprocessing pipeline that replicates methodology
@@ -83,10 +92,10 @@ class StartupDataProcessor:
         logger.info("Fitting StartupDataProcessor on training data...")
         
         # Creates geographic density mappings
-        region_counts = df['region'].value_counts()
+        region_counts = self._value_counts(df['region']).sort_values(ascending=False)
         self.region_density_mapping = self.create_density_tiers(region_counts, n_tiers=5)
         
-        city_counts = df['city'].value_counts()
+        city_counts = self._value_counts(df['city']).sort_values(ascending=False)
         self.city_density_mapping = self.create_density_tiers(city_counts, n_tiers=5)
         
         logger.info(f"Created region density mapping for {len(self.region_density_mapping)} regions")
@@ -98,6 +107,91 @@ class StartupDataProcessor:
         
         logger.info(f"Founding year statistics - Mean: {self.founding_year_mean:.1f}, Std: {self.founding_year_std:.1f}")
         
+        return self._finish_fit()
+    
+    def partial_fit(self, df: pd.DataFrame) -> 'StartupDataProcessor':
+        """
+        Accumulates one chunk of training data for an out-of-core fit
+        Call finalize_fit() after the last chunk: the tier maps match fit() on the concatenated chunks
+        exactly, the founding year statistics to floating point rounding
+        """
+        state = getattr(self, '_fit_state', None)
+        if state is None:
+            state = self._fit_state = {
+                'region_counts': {}, 'city_counts': {}, 'year_count': 0, 'year_mean': 0.0, 'year_m2': 0.0
+            }
+        
+        # Counts stay in first appearance order, which value_counts breaks count ties by
+        for column in ('region', 'city'):
+            counts = state[f'{column}_counts']
+            for value, count in self._value_counts(df[column]).items():
+                counts[value] = counts.get(value, 0) + int(count)
+        
+        # Merges the chunk mean and sum of squared deviations into the running ones (Chan et al.)
+        years = df['founded_year'].dropna().to_numpy(dtype=np.float64)
+        if len(years) > 0:
+            chunk_mean = years.mean()
+            chunk_m2 = float(((years - chunk_mean) ** 2).sum())
+            total = state['year_count'] + len(years)
+            delta = chunk_mean - state['year_mean']
+            state['year_m2'] += chunk_m2 + delta ** 2 * state['year_count'] * len(years) / total
+            state['year_mean'] += delta * len(years) / total
+            state['year_count'] = total
+        return self
+    
+    def finalize_fit(self) -> 'StartupDataProcessor':
+        """
+        Builds the density tiers and founding year statistics from the partial_fit chunks
+        """
+        state = getattr(self, '_fit_state', None)
+        if state is None:
+            raise ValueError("finalize_fit() called before partial_fit()")
+        
+        logger.info(f"Finalizing StartupDataProcessor fit on {state['year_count']} founding years...")
+        self.region_density_mapping = self.create_density_tiers(
+            self._merged_counts(state['region_counts'], 'region'), n_tiers=5
+        )
+        self.city_density_mapping = self.create_density_tiers(
+            self._merged_counts(state['city_counts'], 'city'), n_tiers=5
+        )
+        
+        # Sample standard deviation (ddof=1), NaN below two values like pandas
+        count = state['year_count']
+        self.founding_year_mean = state['year_mean'] if count > 0 else np.nan
+        self.founding_year_std = float(np.sqrt(state['year_m2'] / (count - 1))) if count > 1 else np.nan
+        
+        del self._fit_state
+        return self._finish_fit()
+    
+    @staticmethod
+    def _value_counts(values: pd.Series) -> pd.Series:
+        """
+        value_counts(sort=False) in first appearance order, also for categorical columns
+        """
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            return values.value_counts(sort=False)
+        
+        # Categorical value_counts follows category order and lists unused categories, so count the codes
+        codes = values.cat.codes.to_numpy()
+        codes = codes[codes >= 0]
+        order = pd.unique(codes)
+        counts = np.bincount(codes, minlength=len(values.cat.categories))[order]
+        index = pd.Index(values.cat.categories.take(order).astype(object), name=values.name)
+        return pd.Series(counts.astype('int64'), index=index, name='count')
+    
+    @staticmethod
+    def _merged_counts(counts: Dict[Any, int], column: str) -> pd.Series:
+        """
+        Rebuilds df[column].value_counts() from counts kept in first appearance order
+        """
+        series = pd.Series(list(counts.values()), index=pd.Index(list(counts.keys()), name=column),
+                           name='count', dtype='int64')
+        return series.sort_values(ascending=False)
+    
+    def _finish_fit(self) -> 'StartupDataProcessor':
+        """
+        Sets the feature columns and compiles the single record encoder once the mappings are fitted
+        """
         # Defines expected feature columns after transformation (MATCHES MODEL EXACTLY)
         self.feature_columns = [
             # Geographic features (3)
@@ -117,88 +211,117 @@ class StartupDataProcessor:
         ]
         
         logger.info(f"Expected {len(self.feature_columns)} features after preprocessing")
+        
+        # Compiles the lookup tables used by transform_single
+        self.record_encoder = RecordEncoder(self)
         return self
     
     def transform_single(self, data: Dict[str, Any]) -> np.ndarray:
         """
         Transforms a single startup record for API predictions
+        Skips the DataFrame path entirely, output matches transform(df)[0]
+        """
+        encoder = getattr(self, 'record_encoder', None)
+        if encoder is None:
+            # Preprocessors pickled before the encoder existed compile it on first use
+            encoder = self.record_encoder = RecordEncoder(self)
+        return encoder.encode(data)
+    
+    def _density_tiers(self, values: pd.Series, mapping: pd.Series) -> np.ndarray:
         """
-        # Converts to DataFrame for consistent processing
-        df = pd.DataFrame([data])
-        return self.transform(df)[0]
+        Looks up density tiers for a column, unknown values fall into tier 5
+        """
+        tiers = np.full(len(values), 5.0)
+        if len(mapping) == 0:
+            return tiers
+        
+        # Resolves every value to its mapping position in one hash lookup
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Looks up each category once and gathers by code, missing values (code -1) stay unknown
+            category_positions = np.append(pd.Index(mapping.index).get_indexer(values.cat.categories), -1)
+            positions = category_positions[values.cat.codes.to_numpy()]
+        else:
+            positions = pd.Index(mapping.index).get_indexer(values)
+        known = positions >= 0
+        tiers[known] = np.asarray(mapping, dtype=np.float64)[positions[known]]
+        return tiers
+    
+    def _encode_categories(self, category_list: pd.Series) -> np.ndarray:
+        """
+        Multi-label encodes the top categories in a single pass over all tokens
+        """
+        # Category strings repeat heavily, so only distinct values get tokenized
+        codes, uniques = pd.factorize(category_list.to_numpy(dtype=object))
+        encoded = np.zeros((len(uniques) + 1, len(self.top_categories)))
+
+        # Same tokenization as clean_and_extract_categories, but columnar
+        tokens = (
+            pd.Series(uniques, dtype=object)
+            .str.replace('|', ' ', regex=False)
+            .str.lower()
+            .str.split()
+            .explode()
+        )
+
+        # Exploded index is the unique value position, the indexer gives the category slot
+        slots = pd.Index(self.top_categories).get_indexer(tokens.to_numpy())
+        matched = slots >= 0
+        encoded[tokens.index.to_numpy()[matched], slots[matched]] = 1.0
+
+        # Missing values get code -1, which selects the trailing all-zero row
+        return encoded[codes]
+    
+    def _encode_eras(self, founded_year: np.ndarray) -> np.ndarray:
+        """
+        One-hot encodes economic eras (dotcom_era, post_crash, recovery)
+        """
+        # Missing and out-of-range years default to recovery, as in assign_economic_era
+        era_index = np.select(
+            [(founded_year >= start) & (founded_year <= end) for _, start, end in ECONOMIC_ERAS[:-1]],
+            list(range(len(ECONOMIC_ERAS) - 1)),
+            default=len(ECONOMIC_ERAS) - 1
+        )
+        eras = np.zeros((len(founded_year), len(ECONOMIC_ERAS)))
+        eras[np.arange(len(founded_year)), era_index] = 1.0
+        return eras
     
     def transform(self, df: pd.DataFrame) -> np.ndarray:
         """
         Transforms data using fitted mappings
+        Columnar rewrite of the original row by row transform, returns a float64 matrix
         """
         logger.info(f"Transforming {len(df)} startup records...")
         
-        # Creates a copy to AVOID modifying original *IMPORTANT*
-        df_processed = df.copy()
-        
         # 1. GEOGRAPHIC FEATURE ENGINEERING
-        # Region startup density (5 tier ranking system)
-        df_processed['region_startup_density'] = df_processed['region'].map(self.region_density_mapping)
-    
-        # Fill unknown regions with tier 5 (lowest density)
-        df_processed['region_startup_density'].fillna(5, inplace=True)
-        
-        # City startup density (5 tier ranking system) 
-        df_processed['city_startup_density'] = df_processed['city'].map(self.city_density_mapping)
-        
-        # Fill unknown cities with tier 5 (lowest density)
-        df_processed['city_startup_density'].fillna(5, inplace=True)
-        
-        # USA binary flag
-        df_processed['is_usa'] = (df_processed['country_code'] == 'USA').astype(int)
+        columns = {
+            'region_startup_density': self._density_tiers(df['region'], self.region_density_mapping),
+            'city_startup_density': self._density_tiers(df['city'], self.city_density_mapping),
+            'is_usa': (df['country_code'] == 'USA').to_numpy(dtype=np.float64),
+        }
         
         # 2. INDUSTRY FEATURE ENGINEERING
-        # Cleans and extract categories
-        df_processed['categories_clean'] = df_processed['category_list'].apply(self.clean_and_extract_categories)
-        
-        # Creates binary features for top categories
-        for category in self.top_categories:
-            df_processed[f'category_{category}'] = df_processed['categories_clean'].apply(
-                lambda x: 1 if category in x else 0
-            )
+        categories = self._encode_categories(df['category_list'])
+        for slot, category in enumerate(self.top_categories):
+            columns[f'category_{category}'] = categories[:, slot]
         
         # 3. TEMPORAL FEATURE ENGINEERING
-        # Standardized founding year
-        df_processed['founded_year_std'] = (
-            df_processed['founded_year'] - self.founding_year_mean
-        ) / self.founding_year_std
-        
-        # Economic era classification
-        df_processed['economic_era'] = df_processed['founded_year'].apply(self.assign_economic_era)
-        
-        # Creates era dummy variables
-        era_dummies = pd.get_dummies(df_processed['economic_era'], prefix='era')
-        df_processed = pd.concat([df_processed, era_dummies], axis=1)
-        
-        # Ensures all expected era columns exist
-        for era in ['era_dotcom_era', 'era_post_crash', 'era_recovery']:
-            if era not in df_processed.columns:
-                df_processed[era] = 0
-        
-        # Handles unknown economic era
-        if 'era_unknown' in df_processed.columns:
-            # Distributes unknown cases to recovery era (most common)
-            unknown_mask = df_processed['era_unknown'] == 1
-            df_processed.loc[unknown_mask, 'era_recovery'] = 1
-            df_processed.loc[unknown_mask, 'era_unknown'] = 0
-        
-        # 5. FEATURE SELECTION - EXTRACT FEATURES MODEL EXPECTS
-        try:
-            feature_matrix = df_processed[self.feature_columns].values
-        except KeyError as e:
-            missing_cols = [col for col in self.feature_columns if col not in df_processed.columns]
-            available_cols = list(df_processed.columns)
+        # Missing founding years stay NaN, matching the reference path
+        founded_year = df['founded_year'].to_numpy(dtype=np.float64)
+        columns['founded_year_std'] = (founded_year - self.founding_year_mean) / self.founding_year_std
+        
+        eras = self._encode_eras(founded_year)
+        for slot, (era, _, _) in enumerate(ECONOMIC_ERAS):
+            columns[era] = eras[:, slot]
+        
+        # 4. FEATURE SELECTION - EXTRACT FEATURES MODEL EXPECTS
+        missing_cols = [col for col in self.feature_columns if col not in columns]
+        if missing_cols:
             logger.error(f"Missing columns after preprocessing: {missing_cols}")
-            logger.error(f"Available columns: {available_cols}")
             raise KeyError(f"Missing required columns: {missing_cols}")
         
-        # Handles any remaining NaN values
-        feature_matrix = np.nan_to_num(feature_matrix, nan=0.0)
+        feature_matrix = np.empty((len(df), len(self.feature_columns)))
+        for position, col in enumerate(self.feature_columns):
+            feature_matrix[:, position] = columns[col]
         
         logger.info(f"Transformation complete. Output shape: {feature_matrix.shape}")
         logger.info(f"Feature order: {self.feature_columns}")
@@ -226,17 +349,102 @@ class StartupDataProcessor:
         logger.info(f"Preprocessor loaded from {filepath}")
         return processor
 
-def create_and_fit_preprocessor(training_data_path: str, encoding: str = 'utf-8') -> StartupDataProcessor:
+class RecordEncoder:
+    """
+    Single record encoder compiled from a fitted StartupDataProcessor
+    Plain dict lookups replace the DataFrame machinery for one API payload
+    """
+    
+    ERA_COLUMNS = [era for era, _, _ in ECONOMIC_ERAS]
+    
+    def __init__(self, processor: 'StartupDataProcessor'):
+        positions = {col: position for position, col in enumerate(processor.feature_columns)}
+        self.n_features = len(processor.feature_columns)
+        
+        # Geographic lookups: name -> density tier, unknown names fall back to tier 5
+        self.region_tiers = {region: float(tier) for region, tier in processor.region_density_mapping.items()}
+        self.city_tiers = {city: float(tier) for city, tier in processor.city_density_mapping.items()}
+        self.region_slot = positions['region_startup_density']
+        self.city_slot = positions['city_startup_density']
+        self.usa_slot = positions['is_usa']
+        
+        # Industry lookup: cleaned category token -> feature position
+        self.category_slots = {
+            category: positions[f'category_{category}'] for category in processor.top_categories
+        }
+        
+        # Temporal lookup: founding year -> (founded_year_std, era position)
+        self.year_mean = float(processor.founding_year_mean)
+        self.year_std = float(processor.founding_year_std)
+        self.year_slot = positions['founded_year_std']
+        self.era_slots = [positions[era] for era in self.ERA_COLUMNS]
+        self.year_table = {year: self._year_features(year) for year in range(1995, 2016)}
+    
+    def _year_features(self, founded_year: Any) -> Tuple[float, int]:
+        """
+        Computes founded_year_std and the era position for one year
+        """
+        if founded_year is None or pd.isna(founded_year):
+            # Missing years stay NaN and fall into recovery, like the batch path
+            return float('nan'), self.era_slots[2]
+        
+        founded_year = float(founded_year)
+        year_std = (founded_year - self.year_mean) / self.year_std
+        if 1995 <= founded_year <= 2000:
+            return year_std, self.era_slots[0]
+        elif 2001 <= founded_year <= 2008:
+            return year_std, self.era_slots[1]
+        return year_std, self.era_slots[2]
+    
+    def encode(self, data: Dict[str, Any]) -> np.ndarray:
+        """
+        Encodes one startup record into the model feature vector
+        """
+        row = np.zeros(self.n_features)
+        
+        # 1. GEOGRAPHIC FEATURES
+        row[self.region_slot] = self.region_tiers.get(data['region'], 5.0)
+        row[self.city_slot] = self.city_tiers.get(data['city'], 5.0)
+        row[self.usa_slot] = data['country_code'] == 'USA'
+        
+        # 2. INDUSTRY FEATURES (same tokenization as clean_and_extract_categories)
+        category_string = data['category_list']
+        if isinstance(category_string, str):
+            for token in category_string.replace('|', ' ').lower().split():
+                slot = self.category_slots.get(token)
+                if slot is not None:
+                    row[slot] = 1.0
+        
+        # 3. TEMPORAL FEATURES
+        founded_year = data['founded_year']
+        year_features = self.year_table.get(founded_year)
+        if year_features is None:
+            year_features = self._year_features(founded_year)
+        row[self.year_slot], era_slot = year_features
+        row[era_slot] = 1.0
+        
+        return row
+
+def create_and_fit_preprocessor(training_data_path: str, encoding: str = 'utf-8',
+                                chunksize: Optional[int] = None) -> StartupDataProcessor:
     """
     Creates and fit preprocessor on training data
+    With chunksize the CSV is streamed through partial_fit instead of loaded whole
     """
     logger.info(f"Loading training data from {training_data_path}")
+    processor = StartupDataProcessor()
     
-    # Loads the training data with specified encoding
-    df = pd.read_csv(training_data_path, encoding=encoding)
+    if chunksize is not None:
+        # Only the columns fit reads, chunksize rows at a time
+        for chunk in iter_raw_data(training_data_path, chunksize, columns=['region', 'city', 'founded_year'],
+                                   encoding=encoding):
+            processor.partial_fit(chunk)
+        return processor.finalize_fit()
+    
+    # Loads the columns fit reads with specified encoding and the typed loader's dtypes
+    df = load_raw_data(training_data_path, columns=['region', 'city', 'founded_year'], encoding=encoding)
     
     # Creates and fit preprocessor
-    processor = StartupDataProcessor()
     processor.fit(df)
     
     return processor
@@ -1,26 +1,31 @@
 import pandas as pd
 import os
+from pathlib import Path
+from typing import Optional
+
+from src.data_loader import load_raw_data
 
 def extract_dropdown_options(raw_data_path='data/raw/startups_data.csv', 
-                           output_dir='data/processed/'):
+                           output_dir='data/processed/', df=None):
     """
     Extracts unique regions and cities for UI dropdowns from raw startup data
         raw_data_path: Path to the raw startups data CSV
         output_dir: Directory to save the output CSV files
+        df: Frame already loaded with src.data_loader, skips reading raw_data_path again
         Returns tuple: (unique_regions_list, unique_cities_list)
     """
     
-    # Loads just the geographic columns (only 3 columns exist)
-    df_geo = pd.read_csv(raw_data_path, 
-                         encoding='latin-1', 
-                         usecols=['region', 'city', 'founded_year'])
+    # Loads just the geographic columns unless the caller already has the typed frame
+    if df is None:
+        df = load_raw_data(raw_data_path, columns=['region', 'city', 'founded_year'])
+    df_geo = df[['region', 'city', 'founded_year']]
     
     # Applies the same temporal filter used in preprocessing (1995-2015)
     df_geo = df_geo[(df_geo['founded_year'] >= 1995) & (df_geo['founded_year'] <= 2015)]
     
     # Gets all unique regions and cities (excludes NaN values)
-    unique_regions = df_geo['region'].dropna().unique()
-    unique_cities = df_geo['city'].dropna().unique()
+    unique_regions = pd.Series(df_geo['region'].dropna().unique(), dtype=object)
+    unique_cities = pd.Series(df_geo['city'].dropna().unique(), dtype=object)
     
     # Creatse output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
@@ -37,7 +42,53 @@ def extract_dropdown_options(raw_data_path='data/raw/startups_data.csv',
     
     return sorted(unique_regions.tolist()), sorted(unique_cities.tolist())
 
+class ChunkWriter:
+    """
+    Appends chunks to a CSV or Parquet file, the first chunk fixes the header/schema
+    encoding applies to CSV output (pandas' default UTF-8 when None)
+    """
+
+    def __init__(self, path: Path, encoding: Optional[str] = None):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() == '.parquet'
+        self.encoding = encoding
+        self._writer = None
+        self._started = False
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False,
+                         encoding=self.encoding)
+        self._started = True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+# Request fields of /predict, in the order the API models declare them
+API_COLUMNS = ['country_code', 'region', 'city', 'category_list', 'founded_year']
+
+def synthetic_frame(n_rows: int, seed: int) -> pd.DataFrame:
+    """
+    n_rows seeded rows from generate_sample_data.py, with category_list like the training data
+    """
+    from generate_sample_data import build_catalog, generate_chunk
+
+    df = generate_chunk(0, 0, n_rows, seed, build_catalog(n_rows))
+    df['category_list'] = df['category_code'].astype(str)
+    return df
+
 if __name__ == "__main__":
     regions, cities = extract_dropdown_options()
     print(f"\nFirst 10 regions: {regions[:10]}")
-    print(f"First 10 cities: {cities[:10]}")
\ No newline at end of file
+    print(f"First 10 cities: {cities[:10]}")
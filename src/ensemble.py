@@ -0,0 +1,52 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+ENSEMBLE_METHODS = ('mean', 'weighted', 'vote')
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """
+    Parses "xgboost=2,svm=1" into model weights, raises ValueError on malformed or negative entries
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, separator, weight = item.partition('=')
+        if not separator:
+            raise ValueError(f"Weight '{item}' must look like model=weight")
+        weight = float(weight)
+        if weight < 0:
+            raise ValueError(f"Weight for {name.strip()} must be non-negative")
+        weights[name.strip()] = weight
+    return weights
+
+def ensemble_weights(names: List[str], method: str, weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Normalized weight per scored model, equal for mean (and vote without weights)
+    Models missing from weights get 0 for the weighted method
+    """
+    if method not in ENSEMBLE_METHODS:
+        raise ValueError(f"Unknown ensemble method {method}, choose from {list(ENSEMBLE_METHODS)}")
+    if method == 'mean' or not weights:
+        raw = {name: 1.0 for name in names}
+    else:
+        raw = {name: float(weights.get(name, 0.0)) for name in names}
+    total = sum(raw.values())
+    if total <= 0:
+        raise ValueError(f"Weights give every scored model ({', '.join(names)}) zero weight")
+    return {name: weight / total for name, weight in raw.items()}
+
+def combine(probabilities: Dict[str, np.ndarray], method: str = 'mean', weights: Optional[Dict[str, float]] = None,
+            threshold: float = 0.5) -> Tuple[np.ndarray, Dict[str, float]]:
+    """
+    Combines per model success probabilities (scalars or one value per row) into one score
+        mean: average probability
+        weighted: weighted average probability
+        vote: weighted share of models whose probability is above threshold
+    Returns (combined score, normalized weights used)
+    """
+    used = ensemble_weights(list(probabilities), method, weights)
+    names = list(used)
+    stacked = np.vstack([np.atleast_1d(np.asarray(probabilities[name], dtype=np.float64)) for name in names])
+    if method == 'vote':
+        stacked = (stacked > threshold).astype(np.float64)
+    combined = np.asarray([used[name] for name in names]) @ stacked
+    return combined, used
@@ -0,0 +1,167 @@
+import asyncio
+import multiprocessing
+import threading
+import joblib
+import numpy as np
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.model_bundle import load_bundle
+
+logger = logging.getLogger(__name__)
+
+class PoolSaturatedError(RuntimeError):
+    """
+    Raised when a pool already has max_queue jobs waiting, the API maps it to 503
+    """
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a bounded wait queue for CPU bound model work
+    Jobs beyond max_workers running + max_queue waiting are rejected instead of queued
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int,
+                 initializer: Callable = None, initargs: tuple = ()):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max(0, max_queue)
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+        if kind == 'thread':
+            self._executor: Executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"{name}-pool",
+                initializer=initializer, initargs=initargs
+            )
+        else:
+            # Spawn avoids forking the server's threads into the workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=initializer, initargs=initargs
+            )
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Runs fn(*args) on the pool, raises PoolSaturatedError when the queue is full
+        """
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is saturated ({self.pending} jobs pending)")
+
+        # The counter is only touched from the event loop thread, so no lock is needed
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    async def run_on_each_worker(self, fn: Callable, *args: Any, timeout: float = 120.0) -> List[Any]:
+        """
+        Runs fn(*args) once on every worker, returns the results in submission order
+        Each job waits on a barrier until all max_workers jobs have started, so no worker can take two of them
+        and a process pool has spawned and initialized every worker by the time this returns
+        """
+        if self.kind == 'thread':
+            barrier = threading.Barrier(self.max_workers)
+            return await asyncio.gather(*[self.run(_run_after_barrier, barrier, timeout, fn, *args)
+                                          for _ in range(self.max_workers)])
+        
+        # Plain multiprocessing barriers cannot be pickled into a running pool, manager proxies can
+        manager = await asyncio.to_thread(multiprocessing.get_context('spawn').Manager)
+        try:
+            barrier = manager.Barrier(self.max_workers)
+            return await asyncio.gather(*[self.run(_run_after_barrier, barrier, timeout, fn, *args)
+                                          for _ in range(self.max_workers)])
+        finally:
+            await asyncio.to_thread(manager.shutdown)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns pool occupancy for /health
+        """
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "running": min(self.pending, self.max_workers),
+            "queue_depth": max(0, self.pending - self.max_workers),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        """
+        Stops the pool without waiting for queued jobs
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def _run_after_barrier(barrier: Any, timeout: float, fn: Callable, *args: Any) -> Any:
+    """
+    Holds the worker until every job of run_on_each_worker has started, then runs fn
+    """
+    barrier.wait(timeout)
+    return fn(*args)
+
+# Artifacts loaded once inside each worker process, explainers on first use unless preloaded
+_worker_models: Dict[str, Any] = {}
+_worker_explainers: Dict[str, Any] = {}
+_worker_explainer_paths: Dict[str, str] = {}
+_worker_bundle = None
+
+def init_worker(model_paths: Dict[str, str], explainer_paths: Dict[str, str],
+                preload_explainers: bool = False, bundle_dir: Optional[str] = None) -> None:
+    """
+    Process pool initializer, loads the pickled models into the worker
+    With bundle_dir the models come from the memory-mapped bundle instead of the pickles
+    Explainers (and the shap import behind them) wait for the first explanation unless preloaded
+    """
+    global _worker_bundle
+    
+    if bundle_dir is not None:
+        # The server already verified the hashes
+        _worker_bundle = load_bundle(bundle_dir, verify=False)
+        for name in model_paths:
+            _worker_models[name] = _worker_bundle.models[name]
+    else:
+        for name, path in model_paths.items():
+            _worker_models[name] = joblib.load(path)
+    _worker_explainer_paths.update(explainer_paths)
+    if preload_explainers:
+        for name in explainer_paths:
+            _load_worker_explainer(name)
+
+def _load_worker_explainer(model_name: str) -> Any:
+    if model_name not in _worker_explainers:
+        if _worker_bundle is not None:
+            _worker_explainers[model_name] = _worker_bundle.explainer(model_name)
+        else:
+            _worker_explainers[model_name] = joblib.load(_worker_explainer_paths[model_name])
+    return _worker_explainers[model_name]
+
+def predict_in_worker(model_name: str, X: np.ndarray) -> np.ndarray:
+    """
+    predict_proba inside a worker process
+    """
+    return _worker_models[model_name].predict_proba(X)
+
+def explain_in_worker(model_name: str, X: np.ndarray, options: Dict[str, Any] = None) -> Any:
+    """
+    SHAP values inside a worker process, options carry the explanation budget
+    """
+    return _load_worker_explainer(model_name).shap_values(X, **(options or {}))
@@ -0,0 +1,292 @@
+import argparse
+import json
+import sys
+import time
+import joblib
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LinearShapExplainer:
+    """
+    Exact SHAP values for a linear model with independent features
+    phi_i = coef_i * (x_i - background_mean_i), in log-odds units
+    Replaces KernelExplainer sampling for Logistic Regression, any batch size in one vectorized step
+    """
+
+    # Units of shap_values(), reported by /predict/explain
+    output_space = 'log_odds'
+
+    def __init__(self, coef: np.ndarray, intercept: float, background_mean: np.ndarray):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(intercept)
+        self.background_mean = np.asarray(background_mean, dtype=np.float64).ravel()
+        if self.coef.shape != self.background_mean.shape:
+            raise ValueError(f"coef has {self.coef.size} features, background mean has {self.background_mean.size}")
+
+        # Model output (log-odds) at the background mean, attributions sum to f(x) - expected_value
+        self.expected_value = float(self.coef @ self.background_mean + self.intercept)
+
+    @classmethod
+    def from_model(cls, model: Any, background_data: np.ndarray,
+                   weights: Optional[np.ndarray] = None) -> 'LinearShapExplainer':
+        """
+        Builds the explainer from a fitted binary LogisticRegression and its background sample
+        """
+        if model.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic regression models are supported")
+        background_mean = np.average(np.asarray(background_data, dtype=np.float64), axis=0, weights=weights)
+        return cls(model.coef_[0], model.intercept_[0], background_mean)
+
+    @classmethod
+    def from_kernel_explainer(cls, model: Any, kernel_explainer: Any) -> 'LinearShapExplainer':
+        """
+        Converts a pickled KernelExplainer, reusing its (possibly weighted) background data
+        """
+        background = kernel_explainer.data
+        return cls.from_model(model, background.data, getattr(background, 'weights', None))
+
+    def shap_values(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the exact (n_rows, n_features) log-odds SHAP values for the positive class
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return (X - self.background_mean) * self.coef
+
+class BudgetedKernelExplainer:
+    """
+    KernelExplainer with a bounded cost per explanation
+    Cost grows with background rows x nsamples model evaluations, so the raw background
+    is summarized with k-means at a few sizes and nsamples is fixed by a default budget
+    Both can be overridden per call within the sizes built at training time
+    """
+
+    # Explains predict_proba, so values are in probability units
+    output_space = 'probability'
+
+    def __init__(self, predict_fn: Any, background_data: np.ndarray,
+                 background_sizes: Iterable[int] = (10, 25, 50),
+                 default_background_size: int = 10, default_nsamples: int = 200):
+        import shap
+
+        self.predict_fn = predict_fn
+        self.background_data = np.asarray(background_data, dtype=np.float64)
+
+        # One explainer per summarized background, sizes capped by the raw background rows
+        self.explainers = {}
+        for size in sorted(set(background_sizes) | {default_background_size}):
+            size = min(size, len(self.background_data))
+            self.explainers[size] = shap.KernelExplainer(predict_fn, shap.kmeans(self.background_data, size))
+
+        self.set_budget(default_background_size, default_nsamples)
+
+    @classmethod
+    def from_summaries(cls, predict_fn: Any, background_data: np.ndarray,
+                       summaries: Dict[int, Tuple[np.ndarray, np.ndarray]],
+                       default_background_size: int, default_nsamples: int) -> 'BudgetedKernelExplainer':
+        """
+        Rebuilds the explainer for the stored summary sizes through the public shap API
+        shap.kmeans is seeded, so it reproduces the training time summaries from the same background;
+        the stored ones only verify that, a mismatch (other shap/sklearn version) is logged
+        """
+        import shap
+
+        explainer = cls.__new__(cls)
+        explainer.predict_fn = predict_fn
+        # Copied, shap imputes and rounds on its input and memory-mapped arrays are read-only
+        explainer.background_data = np.array(background_data, dtype=np.float64)
+        explainer.explainers = {}
+        for size, (data, weights) in summaries.items():
+            summary = shap.kmeans(explainer.background_data, int(size))
+            if not (np.allclose(summary.data, data) and np.allclose(summary.weights, np.asarray(weights) / np.sum(weights))):
+                logger.warning(f"Rebuilt k-means background of size {size} differs from the trained one, "
+                               f"explanations use the rebuilt summary")
+            explainer.explainers[int(size)] = shap.KernelExplainer(predict_fn, summary)
+        explainer.set_budget(default_background_size, default_nsamples)
+        return explainer
+
+    def summaries(self) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the summarized background (cluster centers, weights) per size
+        """
+        return {
+            size: (explainer.data.data, explainer.data.weights) for size, explainer in self.explainers.items()
+        }
+
+    @property
+    def background_sizes(self) -> List[int]:
+        return sorted(self.explainers)
+
+    @property
+    def expected_value(self) -> Any:
+        return self.explainers[self.default_background_size].expected_value
+
+    def set_budget(self, background_size: int, nsamples: int) -> None:
+        """
+        Sets the default budget used when a call does not specify one
+        """
+        self.default_background_size = self._resolve_size(background_size)
+        self.default_nsamples = int(nsamples)
+
+    def _resolve_size(self, background_size: int) -> int:
+        background_size = min(int(background_size), len(self.background_data))
+        if background_size not in self.explainers:
+            raise ValueError(f"Background size {background_size} not available, choose from {self.background_sizes}")
+        return background_size
+
+    def shap_values(self, X: np.ndarray, nsamples: Optional[int] = None,
+                    background_size: Optional[int] = None) -> Any:
+        """
+        SHAP values within the given (or default) budget, same output format as KernelExplainer
+        """
+        size = self.default_background_size if background_size is None else self._resolve_size(background_size)
+        return self.explainers[size].shap_values(
+            X, nsamples=nsamples or self.default_nsamples, silent=True
+        )
+
+def _positive_class(shap_values: Any) -> np.ndarray:
+    if isinstance(shap_values, list):
+        shap_values = shap_values[1]
+    return np.asarray(shap_values, dtype=np.float64)
+
+def budget_report_path(models_dir: Path, name: str) -> Path:
+    """
+    Accuracy/latency report of a model's explanation budgets, next to its explainer pickle
+    """
+    return Path(models_dir) / f"{name}_explanation_budgets.json"
+
+def evaluate_budgets(explainer: BudgetedKernelExplainer, X: np.ndarray,
+                     nsamples_options: Iterable[int] = (100, 200, 500),
+                     reference_nsamples: int = 2048, accuracy_rows: int = 50,
+                     p99_target_ms: Optional[float] = None, probe_rows: int = 20) -> Dict[str, Any]:
+    """
+    Measures every (background size, nsamples) budget: latency percentiles over all rows of X,
+    error against a high-budget reference on the first accuracy_rows rows
+    The reference uses the full raw background; error is relative to the reference L1 norm
+    With a p99 target, a budget whose median over the first probe_rows rows already misses it
+    is not run on the remaining rows, its p99 cannot meet the target either
+    """
+    import shap
+
+    X_reference = X[:accuracy_rows]
+    reference_explainer = shap.KernelExplainer(explainer.predict_fn, explainer.background_data)
+    reference = np.vstack([
+        _positive_class(reference_explainer.shap_values(row.reshape(1, -1), nsamples=reference_nsamples, silent=True))
+        for row in X_reference
+    ])
+    reference_norm = np.abs(reference).sum(axis=1)
+    reference_top5 = np.argsort(-np.abs(reference), axis=1)[:, :5]
+
+    results = []
+    for background_size in explainer.background_sizes:
+        for nsamples in nsamples_options:
+            latencies, values = [], []
+            for i, row in enumerate(X):
+                start = time.perf_counter()
+                values.append(_positive_class(explainer.shap_values(row.reshape(1, -1), nsamples, background_size)))
+                latencies.append(time.perf_counter() - start)
+                if (p99_target_ms is not None and i + 1 == probe_rows and len(X) > probe_rows
+                        and np.median(latencies) * 1000 > p99_target_ms):
+                    break
+            values = np.vstack(values)[:len(X_reference)]
+
+            top5 = np.argsort(-np.abs(values), axis=1)[:, :5]
+            top5_overlap = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(top5, reference_top5[:len(values)])])
+            complete = len(latencies) == len(X)
+            results.append({
+                "background_size": background_size,
+                "nsamples": nsamples,
+                "rows": len(latencies),
+                "relative_l1_error": float(np.mean(np.abs(values - reference[:len(values)]).sum(axis=1)
+                                                   / reference_norm[:len(values)])),
+                "top5_overlap": float(top5_overlap),
+                "latency_p50_ms": float(np.percentile(latencies, 50) * 1000),
+                # Stopped budgets only have their probe median, they are over the target
+                "latency_p99_ms": float(np.percentile(latencies, 99) * 1000) if complete else None
+            })
+            logger.info(f"Budget k={background_size} nsamples={nsamples}: {results[-1]}")
+
+    return {
+        "reference": {"background_size": len(explainer.background_data), "nsamples": reference_nsamples},
+        "evaluated_rows": len(X),
+        "accuracy_rows": len(X_reference),
+        "p99_target_ms": p99_target_ms,
+        "budgets": results
+    }
+
+def choose_budget(report: Dict[str, Any], p99_target_ms: float) -> Optional[Dict[str, Any]]:
+    """
+    Picks the most accurate budget whose p99 latency meets the target
+    """
+    eligible = [
+        budget for budget in report["budgets"]
+        if budget["latency_p99_ms"] is not None and budget["latency_p99_ms"] <= p99_target_ms
+    ]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda budget: budget["relative_l1_error"])
+
+def fastest_budget(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Budget with the lowest median latency, the fallback when none meets the target
+    """
+    return min(report["budgets"], key=lambda budget: budget["latency_p50_ms"])
+
+if __name__ == "__main__":
+    # Records a kernel explainer's accuracy/latency tradeoff and optionally applies the chosen budget
+    parser = argparse.ArgumentParser(description="Evaluate SVM explanation budgets")
+    parser.add_argument("--models-dir", default=None, help="Directory with the explainer pickle (default results/models)")
+    parser.add_argument("--model", default="svm", choices=["svm", "svm_approx"], help="Model whose explainer to evaluate")
+    parser.add_argument("--rows", type=int, default=300, help="Rows to explain per budget for the latency percentiles")
+    parser.add_argument("--accuracy-rows", type=int, default=50, help="Rows also explained by the reference")
+    parser.add_argument("--nsamples", type=int, nargs="+", default=[100, 200, 500], help="nsamples options")
+    parser.add_argument("--reference-nsamples", type=int, default=2048)
+    parser.add_argument("--p99-ms", type=float, default=1000.0, help="p99 latency target per explanation")
+    parser.add_argument("--apply", action="store_true", help="Save the chosen budget as the explainer default")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # KernelExplainer logs every phi vector at INFO
+    logging.getLogger('shap').setLevel(logging.WARNING)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from src.model_export import sample_feature_matrix
+    # Pickles reference src.explainers, not __main__
+    from src.explainers import BudgetedKernelExplainer, budget_report_path, choose_budget, evaluate_budgets
+
+    models_dir = Path(args.models_dir) if args.models_dir else project_root / "results" / "models"
+    explainer_path = models_dir / f"{args.model}_explainer.pkl"
+    explainer = joblib.load(explainer_path)
+    if not isinstance(explainer, BudgetedKernelExplainer):
+        sys.exit(f"{explainer_path} is not a BudgetedKernelExplainer, retrain with train_models.py")
+
+    X = sample_feature_matrix(project_root, n_rows=max(1000, 2 * args.rows))
+    X = X[~np.isnan(X).any(axis=1)][:args.rows]
+
+    report = evaluate_budgets(explainer, X, args.nsamples, args.reference_nsamples, args.accuracy_rows, args.p99_ms)
+    chosen = choose_budget(report, args.p99_ms)
+    report["chosen"] = chosen
+
+    report_path = budget_report_path(models_dir, args.model)
+    report_path.write_text(json.dumps(report, indent=2))
+    print(f"Saved budget report to {report_path}")
+
+    print(f"{'k':>4} {'nsamples':>9} {'rows':>5} {'rel L1 err':>11} {'top5':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for budget in report["budgets"]:
+        p99 = f"{budget['latency_p99_ms']:>9.1f}" if budget['latency_p99_ms'] is not None else f"{'-':>9}"
+        print(f"{budget['background_size']:>4} {budget['nsamples']:>9} {budget['rows']:>5} "
+              f"{budget['relative_l1_error']:>11.3f} {budget['top5_overlap']:>6.2f} {budget['latency_p50_ms']:>9.1f} {p99}")
+
+    if chosen is None:
+        print(f"No budget meets the {args.p99_ms:.0f} ms p99 target")
+    elif args.apply:
+        explainer.set_budget(chosen["background_size"], chosen["nsamples"])
+        joblib.dump(explainer, explainer_path)
+        print(f"Default budget set to k={chosen['background_size']}, nsamples={chosen['nsamples']}")
+    else:
+        print(f"Chosen budget: k={chosen['background_size']}, nsamples={chosen['nsamples']} (use --apply to save)")
@@ -0,0 +1,126 @@
+"""
+Content-addressed cache of transformed feature matrices for training runs
+
+An entry is keyed by a hash of the input rows, the fitted processor state, the
+preprocessing source code and the label rule, so any change to one of them is a
+miss. X and y are stored as .npy files and reloaded memory-mapped on a hit
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import src.data_preprocessing as data_preprocessing
+from src.data_preprocessing import ECONOMIC_ERAS, StartupDataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Raw columns transform reads, hashed to key the input data
+TRANSFORM_COLUMNS = ['country_code', 'region', 'city', 'category_list', 'founded_year']
+
+def _hash_frame(df: pd.DataFrame) -> str:
+    """
+    Hashes the row values and dtypes of a frame, independent of its index
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([(column, str(df[column].dtype)) for column in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _processor_state(processor: StartupDataProcessor) -> dict:
+    """
+    Everything transform reads from a fitted processor, in JSON form
+    """
+    mappings = {}
+    for name in ('region_density_mapping', 'city_density_mapping'):
+        mapping = pd.Series(getattr(processor, name))
+        mappings[name] = [[str(key) for key in mapping.index], [int(tier) for tier in mapping]]
+    return {
+        "top_categories": list(processor.top_categories),
+        "founding_year_mean": repr(float(processor.founding_year_mean)),
+        "founding_year_std": repr(float(processor.founding_year_std)),
+        "feature_columns": list(processor.feature_columns),
+        "economic_eras": [list(era) for era in ECONOMIC_ERAS],
+        **mappings
+    }
+
+class FeatureCache:
+    """
+    Directory of cached (X, y) pairs, one subdirectory per key, oldest entries pruned beyond max_entries
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 8):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def key(self, df: pd.DataFrame, processor: StartupDataProcessor, label_column: str, positive_label: str) -> str:
+        """
+        Content hash of the input rows, processor state, preprocessing code and label rule
+        """
+        digest = hashlib.sha256()
+        digest.update(_hash_frame(df[TRANSFORM_COLUMNS + [label_column]]).encode())
+        digest.update(json.dumps(_processor_state(processor), sort_keys=True).encode())
+        digest.update(Path(data_preprocessing.__file__).read_bytes())
+        digest.update(json.dumps([label_column, positive_label]).encode())
+        return digest.hexdigest()[:32]
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the memory-mapped (X, y) for key, or None on a miss
+        """
+        entry = self.cache_dir / key
+        if not (entry / 'meta.json').exists():
+            return None
+        # Marks the entry as recently used for pruning
+        os.utime(entry)
+        return np.load(entry / 'X.npy', mmap_mode='r'), np.load(entry / 'y.npy', mmap_mode='r')
+
+    def save(self, key: str, X: np.ndarray, y: np.ndarray, **meta) -> Path:
+        """
+        Writes an entry atomically (staged, then renamed into place) and prunes old entries
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.cache_dir))
+        entry = self.cache_dir / key
+        try:
+            np.save(staging / 'X.npy', np.asarray(X), allow_pickle=False)
+            np.save(staging / 'y.npy', np.asarray(y), allow_pickle=False)
+            (staging / 'meta.json').write_text(json.dumps({"key": key, "shape": list(np.shape(X)), **meta}, indent=2))
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(staging, entry)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.prune()
+        return entry
+
+    def prune(self) -> None:
+        entries = [path for path in self.cache_dir.iterdir() if path.is_dir() and not path.name.startswith('.')]
+        entries.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale in entries[self.max_entries:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def transform(self, df: pd.DataFrame, processor: StartupDataProcessor, label_column: str = 'status',
+                  positive_label: str = 'acquired', key: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Returns (X, y, hit): the cached matrices when the key matches, otherwise transforms and stores them
+        y is 1 where df[label_column] == positive_label, key skips hashing when the caller already has it
+        """
+        key = key or self.key(df, processor, label_column, positive_label)
+        cached = self.load(key)
+        if cached is not None:
+            logger.info(f"Feature cache hit {key}")
+            return cached[0], cached[1], True
+
+        logger.info(f"Feature cache miss {key}, transforming {len(df)} records")
+        X = processor.transform(df)
+        y = (df[label_column] == positive_label).to_numpy(dtype=np.int64)
+        self.save(key, X, y, rows=len(df), label_column=label_column, positive_label=positive_label)
+        return X, y, False
@@ -0,0 +1,209 @@
+"""
+Load generator for the prediction API, in-process or against a running server
+
+Closed loop: at each concurrency level N workers send requests back to back for a
+fixed duration, picking endpoints from a weighted mix and /predict payloads from
+seeded synthetic startups (generate_sample_data.py). Reports throughput,
+p50/p95/p99 latency and error rate per endpoint and level. Runs fully offline
+
+Usage: python -m src.load_test [--url http://127.0.0.1:8000] [--concurrency 1,4,16,64] [--duration 10]
+Without --url the app is started in-process through an ASGI transport (client and
+server then share one event loop, so absolute numbers are a lower bound)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Endpoint mix: name -> (method, path, weight)
+ENDPOINTS = {
+    '/predict': ('POST', '/predict', 0.7),
+    '/predict/explain': ('POST', '/predict/explain', 0.1),
+    '/regions': ('GET', '/regions', 0.1),
+    '/cities': ('GET', '/cities', 0.1)
+}
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+
+def sample_payloads(n_payloads: int, seed: int, data_path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    /predict request bodies, from a raw data CSV when given, otherwise seeded synthetic rows
+    """
+    from src.data_utils import API_COLUMNS, synthetic_frame
+
+    if data_path is not None:
+        from src.data_loader import load_raw_data
+        df = load_raw_data(data_path)
+        df = df.sample(n=min(n_payloads, len(df)), random_state=seed)
+    else:
+        df = synthetic_frame(n_payloads, seed)
+    df = df[API_COLUMNS].dropna()
+    # The API only accepts founding years the models were trained on
+    df = df[df['founded_year'].between(1995, 2015)]
+    return [
+        {**record, 'founded_year': int(record['founded_year'])}
+        for record in df.astype({column: str for column in API_COLUMNS[:-1]}).to_dict(orient='records')
+    ]
+
+def summarize(samples: List[Tuple[str, float, bool]], seconds: float) -> Dict[str, Dict[str, float]]:
+    """
+    Per endpoint throughput, latency percentiles (ms) and error rate from (endpoint, latency, ok) samples
+    """
+    report = {}
+    names = sorted({endpoint for endpoint, _, _ in samples})
+    for name in names + ['all']:
+        rows = [(latency, ok) for endpoint, latency, ok in samples if name == 'all' or endpoint == name]
+        latencies = np.array([latency for latency, _ in rows]) * 1000.0
+        errors = sum(1 for _, ok in rows if not ok)
+        report[name] = {
+            "requests": len(rows),
+            "rps": len(rows) / seconds if seconds > 0 else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "error_rate": errors / len(rows)
+        }
+    return report
+
+async def run_level(client: Any, concurrency: int, duration: float, warmup: float,
+                    endpoints: Dict[str, Tuple[str, str, float]], payloads: List[Dict[str, Any]],
+                    seed: int) -> Dict[str, Dict[str, float]]:
+    """
+    Runs concurrency closed loop workers for warmup + duration seconds, only the last duration seconds count
+    """
+    names = list(endpoints)
+    weights = np.array([endpoints[name][2] for name in names], dtype=np.float64)
+    weights /= weights.sum()
+    samples: List[Tuple[str, float, bool]] = []
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def worker(index: int) -> None:
+        rng = np.random.default_rng([seed, concurrency, index])
+        while True:
+            name = names[rng.choice(len(names), p=weights)]
+            method, path, _ = endpoints[name]
+            body = payloads[rng.integers(len(payloads))] if method == 'POST' else None
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                return
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except Exception as e:
+                logger.debug(f"{name} failed: {e}")
+                ok = False
+            if sent >= measure_from:
+                samples.append((name, time.perf_counter() - sent, ok))
+
+    await asyncio.gather(*[worker(index) for index in range(concurrency)])
+    # The last requests may finish after stop_at, so throughput uses the real measured window
+    return summarize(samples, time.perf_counter() - measure_from) if samples else {}
+
+async def run_load_test(concurrency_levels: List[int], duration: float, warmup: float,
+                        endpoints: Dict[str, Tuple[str, str, float]], payloads: List[Dict[str, Any]],
+                        url: Optional[str] = None, seed: int = 42, timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Ramps through concurrency_levels against url, or the in-process app when url is None
+    Returns {"levels": {concurrency: {endpoint: stats}}}
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(concurrency_levels), max_keepalive_connections=max(concurrency_levels))
+    levels = {}
+
+    async def ramp(client: Any) -> None:
+        for concurrency in concurrency_levels:
+            logger.info(f"Running {concurrency} concurrent clients for {duration}s")
+            levels[concurrency] = await run_level(client, concurrency, duration, warmup, endpoints, payloads, seed)
+            print_level(concurrency, levels[concurrency])
+
+    if url is not None:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+            await ramp(client)
+    else:
+        from app.app import app
+        # ASGITransport does not run the lifespan, so models are loaded here
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=timeout) as client:
+                await ramp(client)
+    return {"levels": levels}
+
+def print_level(concurrency: int, report: Dict[str, Dict[str, float]]) -> None:
+    print(f"\nConcurrency {concurrency}")
+    print(f"   {'endpoint':<20} {'requests':>9} {'req/sec':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in report.items():
+        print(f"   {name:<20} {stats['requests']:>9} {stats['rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+              f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['error_rate']:>7.1%}")
+
+def parse_mix(value: str) -> Dict[str, Tuple[str, str, float]]:
+    """
+    Parses "/predict=0.8,/regions=0.2" into an endpoint mix
+    """
+    endpoints = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name}, choose from {list(ENDPOINTS)}")
+        method, path, default = ENDPOINTS[name]
+        endpoints[name] = (method, path, float(weight) if weight else default)
+    return endpoints
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the prediction API")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default in-process app)")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="Comma separated concurrency levels to ramp through")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds at the start of each level")
+    parser.add_argument("--mix", type=parse_mix, default=None,
+                        help="Endpoint weights, e.g. /predict=0.8,/predict/explain=0.1,/cities=0.1")
+    parser.add_argument("--payloads", type=int, default=2000, help="Distinct /predict payloads to sample")
+    parser.add_argument("--data", default=None, help="Sample payloads from this raw CSV instead of synthetic rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="In-process only: disable the prediction cache")
+    parser.add_argument("--output", default=None, help="JSON report path (default results/loadtest/latest.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    # Keeps the per request log lines out of the measurements
+    logging.getLogger('src.data_preprocessing').setLevel(logging.WARNING)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    if args.no_cache:
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+    os.environ.setdefault("BACKGROUND_STARTUP", "0")
+    from src.load_test import ENDPOINTS, run_load_test, sample_payloads
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(',')]
+    payloads = sample_payloads(args.payloads, args.seed, Path(args.data) if args.data else None)
+    print(f"Sampled {len(payloads)} payloads, target {args.url or 'in-process app'}, "
+          f"levels {concurrency_levels}, {args.duration}s each")
+
+    report = asyncio.run(run_load_test(concurrency_levels, args.duration, args.warmup, args.mix or ENDPOINTS,
+                                       payloads, args.url, args.seed))
+    report["meta"] = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "target": args.url or "in-process",
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "payloads": len(payloads),
+        "prediction_cache": "off" if args.no_cache else "default",
+        "cpu_count": os.cpu_count()
+    }
+
+    output_path = Path(args.output) if args.output else project_root / "results" / "loadtest" / "latest.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved report to {output_path}")
@@ -0,0 +1,182 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Latency buckets in seconds, from sub-millisecond native scoring up to kernel explanations
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> LabelSet:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+class Histogram:
+    """
+    Fixed bucket histogram, observe is a bisect and three additions under an uncontended lock
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+class MetricsRegistry:
+    """
+    Labelled histograms and counters rendered in the Prometheus text format
+    Series are created on first use, so label values must come from a bounded set
+    """
+
+    def __init__(self, prefix: str, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        """
+        Records a duration in the histogram name{labels}
+        """
+        if not self.enabled:
+            return
+        series = self._histograms.get(name)
+        key = _labels(labels)
+        histogram = series.get(key) if series is not None else None
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, {}).setdefault(key, Histogram(self.buckets))
+        histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Adds amount to the counter name{labels}
+        """
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    @contextmanager
+    def time(self, name: str, **labels: Any) -> Iterator[None]:
+        """
+        Observes the duration of the with block, also when it raises
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self, gauges: Iterable[Tuple[str, str, Dict[str, Any], float]] = ()) -> str:
+        """
+        Prometheus text exposition of every series, gauges are (name, type, labels, value)
+        read at scrape time from components that keep their own counters
+        """
+        lines = []
+        with self._lock:
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        for name, series in sorted(histograms.items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in sorted(series.items()):
+                counts, total, count = histogram.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {repr(total)}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+
+        for name, series in sorted(counters.items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        declared = set()
+        for name, kind, labels, value in gauges:
+            metric = f"{self.prefix}_{name}"
+            if metric not in declared:
+                lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {metric} {kind}")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(_labels(labels))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware counting requests and their latency by route and status
+    Paths that are not application routes are reported as "other" to keep the label set bounded
+    """
+
+    def __init__(self, app: Any, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+        self.known_paths: Optional[set] = None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        if self.known_paths is None:
+            # Routes are registered after the middleware, so they are read on the first request
+            self.known_paths = {route.path for route in scope["app"].routes}
+        path = scope["path"] if scope["path"] in self.known_paths else "other"
+        status = {"code": 500}
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.observe("request_duration_seconds", time.perf_counter() - start, endpoint=path)
+            self.registry.inc("requests_total", endpoint=path, status=status["code"])
@@ -0,0 +1,156 @@
+import asyncio
+import numpy as np
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from src.executors import BoundedExecutor, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Groups concurrent single row predictions into one vectorized model call
+    Requests wait at most max_wait_ms for company, a batch never exceeds max_batch_size rows
+    With an executor the model call runs on its pool instead of the event loop
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 executor: Optional[BoundedExecutor] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be non-negative")
+
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()
+
+        # Running totals reported through /health
+        self.batches_run = 0
+        self.rows_scored = 0
+
+    def start(self) -> None:
+        """
+        Starts the batching loop on the running event loop
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Cancels the batching loop, pending requests fail with CancelledError
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+        for task in list(self._in_flight):
+            task.cancel()
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._worker = None
+        self._queue = None
+
+    async def submit(self, row: np.ndarray) -> np.ndarray:
+        """
+        Queues one feature row and waits for its predict_proba output
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        """
+        Waits for the first request, then gathers more until the batch is full or the wait expires
+        """
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drains whatever is already queued without yielding
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """
+        Scores one batch with a single model call and fans the results back out
+        """
+        futures = [future for _, future in batch]
+
+        try:
+            X = np.vstack([row for row, _ in batch])
+            if self.executor is not None:
+                probabilities = await self.executor.run(self.predict_fn, X)
+            else:
+                probabilities = self.predict_fn(X)
+        except asyncio.CancelledError:
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            # Saturation is expected under load and gets logged by the API as a 503
+            if not isinstance(e, PoolSaturatedError):
+                logger.error(f"Micro-batch of {len(batch)} rows failed: {str(e)}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.rows_scored += len(batch)
+        for future, probability in zip(futures, probabilities):
+            # Skips callers that gave up (client disconnect, timeout)
+            if not future.done():
+                future.set_result(probability)
+
+    async def _run(self) -> None:
+        """
+        Batching loop: collect a batch, score it, repeat
+        """
+        while True:
+            batch = await self._collect()
+            if self.executor is None:
+                await self._dispatch(batch)
+                continue
+
+            # Pool backed batches run concurrently, the pool bounds how many
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    def stats(self) -> dict:
+        """
+        Returns batching counters for monitoring
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches_run": self.batches_run,
+            "rows_scored": self.rows_scored,
+            "mean_batch_size": self.rows_scored / self.batches_run if self.batches_run else 0.0
+        }
@@ -0,0 +1,368 @@
+"""
+Versioned model bundle: one JSON manifest plus one .npy file per numeric array
+
+Layout: <models_dir>/bundles/<version>/manifest.json and its .npy files, with
+<models_dir>/bundles/LATEST naming the version to serve. The manifest holds the
+feature order, the category and era tables, the array hashes and how to rebuild
+each model and explainer. Arrays load with np.load(mmap_mode='r'), so every
+process serving a bundle shares its pages through the OS page cache
+
+The XGBoost booster is the exception: its serialized bytes are stored as a uint8
+array, but XGBoost parses them into its own memory, so every process loading the
+bundle holds a private copy of the trees. Only its NumPy scorer arrays are shared
+
+Usage: python -m src.model_bundle [models_dir]
+Builds a bundle from the pickles in models_dir and checks it against them
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.data_preprocessing import ECONOMIC_ERAS, RecordEncoder, StartupDataProcessor
+from src.explainers import BudgetedKernelExplainer, LinearShapExplainer
+from src.model_export import SCORER_KINDS, compile_model
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+BUNDLES_DIR = 'bundles'
+LATEST_FILE = 'LATEST'
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class _ArrayWriter:
+    """
+    Saves arrays as .npy files in the bundle directory and records them for the manifest
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, key: str, array: np.ndarray) -> str:
+        array = np.asarray(array)
+        if array.dtype == object:
+            raise TypeError(f"{key} is an object array and cannot be memory-mapped")
+        filename = f"{key}.npy"
+        np.save(self.directory / filename, array, allow_pickle=False)
+        self.entries[key] = {
+            "file": filename,
+            "sha256": _sha256(self.directory / filename),
+            "dtype": array.dtype.str,
+            "shape": list(array.shape)
+        }
+        return key
+
+    def add_all(self, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, str]:
+        return {name: self.add(f"{prefix}.{name}", array) for name, array in arrays.items()}
+
+def _preprocessor_section(processor: StartupDataProcessor, writer: _ArrayWriter) -> Dict[str, Any]:
+    """
+    Stores the density tier maps as name/tier arrays and the scalar statistics in the manifest
+    """
+    arrays = {}
+    for column, mapping in (('region', processor.region_density_mapping), ('city', processor.city_density_mapping)):
+        mapping = pd.Series(mapping)
+        arrays[f'{column}_names'] = np.asarray(mapping.index.astype(str), dtype=str)
+        arrays[f'{column}_tiers'] = np.asarray(mapping, dtype=np.int8)
+    return {
+        "top_categories": list(processor.top_categories),
+        "founding_year_mean": float(processor.founding_year_mean),
+        "founding_year_std": float(processor.founding_year_std),
+        "economic_eras": [list(era) for era in ECONOMIC_ERAS],
+        "arrays": writer.add_all('preprocessor', arrays)
+    }
+
+def _model_section(name: str, model: Any, writer: _ArrayWriter, tmp_dir: Path) -> Dict[str, Any]:
+    """
+    Compiles the model into its NumPy scorer; XGBoost also keeps its booster for large batches
+    """
+    scorer = compile_model(model)
+    section = {
+        "kind": scorer.kind,
+        "arrays": writer.add_all(f'models.{name}', scorer.arrays())
+    }
+    if hasattr(model, 'get_booster'):
+        # save_model keeps the sklearn wrapper attributes, the raw bytes are stored as a uint8 array
+        booster_path = tmp_dir / f"{name}.ubj"
+        model.save_model(booster_path)
+        section["booster"] = writer.add(f'models.{name}.booster', np.frombuffer(booster_path.read_bytes(), dtype=np.uint8))
+    return section
+
+def _explainer_section(name: str, explainer: Any, models: Dict[str, Any], writer: _ArrayWriter) -> Optional[Dict[str, Any]]:
+    """
+    Describes an explainer by its arrays, or by the model it is rebuilt from
+    """
+    if type(explainer).__name__ == 'KernelExplainer' and name == 'logistic':
+        # Older training runs pickled a sampled KernelExplainer for LR
+        explainer = LinearShapExplainer.from_kernel_explainer(models[name], explainer)
+
+    if isinstance(explainer, LinearShapExplainer):
+        return {
+            "kind": "linear_shap",
+            "arrays": writer.add_all(f'explainers.{name}', {
+                'coef': explainer.coef, 'intercept': np.array([explainer.intercept]),
+                'background_mean': explainer.background_mean
+            })
+        }
+    if isinstance(explainer, BudgetedKernelExplainer):
+        summaries = {}
+        for size, (data, weights) in explainer.summaries().items():
+            summaries[str(size)] = writer.add_all(f'explainers.{name}.k{size}', {'data': data, 'weights': weights})
+        return {
+            "kind": "budgeted_kernel",
+            "model": name,
+            "default_background_size": explainer.default_background_size,
+            "default_nsamples": explainer.default_nsamples,
+            "arrays": writer.add_all(f'explainers.{name}', {'background_data': explainer.background_data}),
+            "summaries": summaries
+        }
+    if type(explainer).__name__ == 'TreeExplainer':
+        # Cheap to rebuild from the booster, so only the model reference is stored
+        return {"kind": "tree_shap", "model": name}
+
+    logger.warning(f"Explainer for {name} ({type(explainer).__name__}) cannot be bundled, skipping it")
+    return None
+
+def write_bundle(models_dir: Path, processor: StartupDataProcessor, models: Dict[str, Any],
+                 explainers: Dict[str, Any]) -> Path:
+    """
+    Writes a new bundle version under models_dir/bundles and points LATEST at it
+    The directory is staged and renamed into place, so readers never see a partial bundle
+    """
+    bundles_dir = Path(models_dir) / BUNDLES_DIR
+    bundles_dir.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=bundles_dir))
+
+    try:
+        writer = _ArrayWriter(staging)
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "feature_columns": list(processor.feature_columns),
+            "preprocessor": _preprocessor_section(processor, writer),
+            "models": {name: _model_section(name, model, writer, staging) for name, model in models.items()},
+            "explainers": {}
+        }
+        for name, explainer in explainers.items():
+            section = _explainer_section(name, explainer, models, writer)
+            if section is not None:
+                manifest["explainers"][name] = section
+        for booster_file in staging.glob('*.ubj'):
+            booster_file.unlink()
+        manifest["arrays"] = writer.entries
+
+        # Version is the creation time plus a content hash of everything in the bundle
+        content_hash = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+        manifest["version"] = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{content_hash[:10]}"
+        (staging / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+
+        bundle_dir = bundles_dir / manifest["version"]
+        os.replace(staging, bundle_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    set_latest(models_dir, manifest["version"])
+    logger.info(f"Model bundle {manifest['version']} written to {bundle_dir}")
+    return bundle_dir
+
+def set_latest(models_dir: Path, version: str) -> None:
+    """
+    Atomically points LATEST at a bundle version
+    """
+    bundles_dir = Path(models_dir) / BUNDLES_DIR
+    if not (bundles_dir / version / 'manifest.json').exists():
+        raise FileNotFoundError(f"No bundle {version} in {bundles_dir}")
+    pointer = bundles_dir / f".{LATEST_FILE}.{os.getpid()}"
+    pointer.write_text(version + "\n")
+    os.replace(pointer, bundles_dir / LATEST_FILE)
+
+def latest_bundle_dir(models_dir: Path) -> Optional[Path]:
+    """
+    Returns the directory LATEST points to, or None when no bundle has been written
+    """
+    pointer = Path(models_dir) / BUNDLES_DIR / LATEST_FILE
+    if not pointer.exists():
+        return None
+    bundle_dir = pointer.parent / pointer.read_text().strip()
+    return bundle_dir if (bundle_dir / 'manifest.json').exists() else None
+
+class ModelBundle:
+    """
+    A loaded bundle: preprocessor, models and their NumPy scorers, explainers built on first use
+    models[name] serves predict_proba (the XGBoost booster for xgboost, the scorer otherwise),
+    scorers[name] is the compiled NumPy scorer for every model
+    """
+
+    def __init__(self, path: Path, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.feature_columns = list(manifest["feature_columns"])
+        self._arrays = arrays
+        self._explainers: Dict[str, Any] = {}
+        self._explainer_lock = threading.Lock()
+
+        self.preprocessor = self._build_preprocessor(manifest["preprocessor"])
+        self.scorers = {}
+        self.models = {}
+        for name, section in manifest["models"].items():
+            self.scorers[name] = SCORER_KINDS[section["kind"]].from_arrays(self._section_arrays(section["arrays"]))
+            self.models[name] = self._build_booster(section["booster"]) if "booster" in section else self.scorers[name]
+
+    def _section_arrays(self, keys: Dict[str, str]) -> Dict[str, np.ndarray]:
+        return {name: self._arrays[key] for name, key in keys.items()}
+
+    def _build_preprocessor(self, section: Dict[str, Any]) -> StartupDataProcessor:
+        """
+        Rebuilds a fitted StartupDataProcessor from the manifest tables
+        """
+        eras = [tuple(era) for era in section["economic_eras"]]
+        if eras != ECONOMIC_ERAS:
+            raise ValueError(f"Bundle era table {eras} does not match this code's {ECONOMIC_ERAS}")
+
+        arrays = self._section_arrays(section["arrays"])
+        processor = StartupDataProcessor()
+        processor.top_categories = list(section["top_categories"])
+        processor.founding_year_mean = section["founding_year_mean"]
+        processor.founding_year_std = section["founding_year_std"]
+        processor.feature_columns = list(self.feature_columns)
+        processor.region_density_mapping = pd.Series(arrays['region_tiers'], index=arrays['region_names'])
+        processor.city_density_mapping = pd.Series(arrays['city_tiers'], index=arrays['city_names'])
+        processor.record_encoder = RecordEncoder(processor)
+        return processor
+
+    def _build_booster(self, key: str) -> Any:
+        """
+        Parses the stored booster bytes, the trees end up in XGBoost's own (per process) memory
+        """
+        import xgboost as xgb
+
+        model = xgb.XGBClassifier()
+        model.load_model(bytearray(self._arrays[key]))
+        return model
+
+    @property
+    def explainer_names(self) -> List[str]:
+        return list(self.manifest["explainers"])
+
+    def explainer(self, name: str) -> Any:
+        """
+        Returns the explainer for a model, building it (and importing shap) on first use
+        """
+        if name not in self._explainers:
+            with self._explainer_lock:
+                if name not in self._explainers:
+                    self._explainers[name] = self._build_explainer(self.manifest["explainers"][name])
+        return self._explainers[name]
+
+    def _build_explainer(self, section: Dict[str, Any]) -> Any:
+        if section["kind"] == "linear_shap":
+            arrays = self._section_arrays(section["arrays"])
+            return LinearShapExplainer(arrays['coef'], arrays['intercept'][0], arrays['background_mean'])
+        if section["kind"] == "budgeted_kernel":
+            summaries = {}
+            for size, keys in section["summaries"].items():
+                arrays = self._section_arrays(keys)
+                summaries[int(size)] = (arrays['data'], arrays['weights'])
+            return BudgetedKernelExplainer.from_summaries(
+                self.models[section["model"]].predict_proba,
+                self._arrays[section["arrays"]["background_data"]], summaries,
+                section["default_background_size"], section["default_nsamples"]
+            )
+        if section["kind"] == "tree_shap":
+            import shap
+
+            return shap.TreeExplainer(self.models[section["model"]])
+        raise ValueError(f"Unknown explainer kind: {section['kind']}")
+
+def load_bundle(bundle_dir: Path, mmap_mode: Optional[str] = 'r', verify: bool = True) -> ModelBundle:
+    """
+    Loads a bundle in one step, arrays memory-mapped unless mmap_mode is None
+    verify checks every array file against its manifest hash first
+    """
+    bundle_dir = Path(bundle_dir)
+    manifest = json.loads((bundle_dir / 'manifest.json').read_text())
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')}, expected {BUNDLE_FORMAT}")
+
+    arrays = {}
+    for key, entry in manifest["arrays"].items():
+        path = bundle_dir / entry["file"]
+        if verify and _sha256(path) != entry["sha256"]:
+            raise ValueError(f"Bundle file {entry['file']} does not match its manifest hash")
+        arrays[key] = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+    return ModelBundle(bundle_dir, manifest, arrays)
+
+def export_bundle(models_dir: Path) -> Path:
+    """
+    Builds a bundle from the preprocessor, model and explainer pickles in models_dir
+    """
+    models_dir = Path(models_dir)
+    model_files = {
+        'logistic': models_dir / 'logistic_regression_best.pkl',
+        'xgboost': models_dir / 'xgboost_best.pkl',
+        'svm': models_dir / 'svm_rbf_best.pkl',
+        'svm_approx': models_dir / 'svm_approx_best.pkl'
+    }
+    models = {name: joblib.load(path) for name, path in model_files.items() if path.exists()}
+
+    explainers = {}
+    for name in models:
+        path = models_dir / f"{name}_explainer.pkl"
+        if path.exists():
+            explainers[name] = joblib.load(path)
+
+    processor = StartupDataProcessor.load(str(models_dir / 'preprocessor.pkl'))
+    return write_bundle(models_dir, processor, models, explainers)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    # Pickles and isinstance checks reference src.*, not __main__
+    from src.model_bundle import export_bundle, load_bundle
+    from src.model_export import sample_feature_matrix
+
+    models_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else project_root / "results" / "models"
+    bundle_dir = export_bundle(models_dir)
+
+    start = time.perf_counter()
+    bundle = load_bundle(bundle_dir)
+    load_seconds = time.perf_counter() - start
+    print(f"Bundle {bundle.version}: {len(bundle.manifest['arrays'])} arrays, loaded in {load_seconds * 1000:.1f}ms")
+
+    # The bundle must reproduce the pickled preprocessor and models
+    X = sample_feature_matrix(project_root, n_rows=2000)
+    X = X[~np.isnan(X).any(axis=1)]
+    processor = StartupDataProcessor.load(str(models_dir / 'preprocessor.pkl'))
+    df = pd.read_csv(project_root / "data" / "raw" / "startups_data.csv", encoding='latin-1').head(2000)
+    df['category_list'] = df['category_code'].astype(str)
+    assert np.array_equal(processor.transform(df), bundle.preprocessor.transform(df), equal_nan=True)
+    print("preprocessor: transform matches")
+
+    for name, model_file in (('logistic', 'logistic_regression_best.pkl'), ('xgboost', 'xgboost_best.pkl'),
+                             ('svm', 'svm_rbf_best.pkl'), ('svm_approx', 'svm_approx_best.pkl')):
+        if name not in bundle.models:
+            continue
+        model = joblib.load(models_dir / model_file)
+        difference = float(np.max(np.abs(model.predict_proba(X)[:, 1] - bundle.models[name].predict_proba(X)[:, 1])))
+        print(f"{name}: max |dp| {difference:.2e}")
+        assert difference < 1e-6, f"{name} differs from its pickle by {difference}"
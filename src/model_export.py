@@ -0,0 +1,474 @@
+"""
+Compiles the trained Logistic Regression, XGBoost, RBF SVM and approximate SVM models into pure NumPy
+scorers backed by flat arrays, so serving skips the sklearn/XGBoost call overhead
+
+Usage: python -m src.model_export [models_dir]
+Exports the scorers, checks parity against the original models and prints a latency benchmark
+"""
+import json
+import sys
+import time
+import joblib
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# File names of the compiled scorers, next to the pickles they are compiled from
+NATIVE_SCORER_FILES = {
+    'logistic': 'logistic_regression_native.npz',
+    'xgboost': 'xgboost_native.npz',
+    'svm_approx': 'svm_approx_native.npz'
+}
+
+def _sigmoid(margin: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-margin))
+
+class LinearScorer:
+    """
+    Logistic Regression as a single dot product: sigmoid(X @ coef + intercept)
+    """
+
+    kind = 'linear'
+
+    # A dot product beats the sklearn call at every batch size
+    max_native_rows = None
+
+    def __init__(self, coef: np.ndarray, intercept: float):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'LinearScorer':
+        """
+        Compiles a fitted binary sklearn LogisticRegression
+        """
+        if model.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic regression models can be compiled")
+        return cls(model.coef_[0], model.intercept_[0])
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns [P(class 0), P(class 1)] per row, like the sklearn model
+        """
+        positive = _sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - positive, positive])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {'coef': self.coef, 'intercept': np.array([self.intercept])}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'LinearScorer':
+        return cls(arrays['coef'], arrays['intercept'][0])
+
+class TreeEnsembleScorer:
+    """
+    XGBoost binary:logistic booster flattened into node arrays
+    All trees share one set of arrays; tree t starts at roots[t] and the right
+    child of an internal node is always left + 1 (XGBoost allocates children in pairs)
+    Leaves loop back to themselves with an infinite threshold, so every row can
+    walk all trees for max_depth steps without branching
+    """
+
+    kind = 'tree_ensemble'
+
+    # XGBoost's C++ predictor wins beyond a handful of rows, see the benchmark in __main__
+    max_native_rows = 4
+
+    # Rows per traversal chunk, keeps the (rows x trees) index arrays in cache
+    chunk_size = 256
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 base_margin: float, max_depth: int):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'TreeEnsembleScorer':
+        """
+        Compiles a fitted XGBClassifier (gbtree booster, binary:logistic objective)
+        """
+        learner = json.loads(model.get_booster().save_raw(raw_format='json'))['learner']
+        if learner['objective']['name'] != 'binary:logistic':
+            raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+        if learner['gradient_booster']['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster: {learner['gradient_booster']['name']}")
+
+        feature, threshold, left, default_left, value, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in learner['gradient_booster']['model']['trees']:
+            if any(tree['split_type']):
+                raise ValueError("Categorical splits are not supported")
+
+            tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+            tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+            is_leaf = tree_left == -1
+            if np.any(tree_right[~is_leaf] != tree_left[~is_leaf] + 1):
+                raise ValueError(f"Tree {tree['id']} does not store children in consecutive pairs")
+
+            # Leaf values are stored in split_conditions, learning rate already applied
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            own_index = np.arange(len(tree_left), dtype=np.int32) + offset
+            left.append(np.where(is_leaf, own_index, tree_left + offset))
+            feature.append(np.where(is_leaf, 0, tree['split_indices']))
+            threshold.append(np.where(is_leaf, np.float32(np.inf), conditions))
+            default_left.append(np.asarray(tree['default_left'], dtype=bool) | is_leaf)
+            value.append(np.where(is_leaf, conditions, np.float32(0.0)))
+            roots.append(offset)
+
+            max_depth = max(max_depth, cls._depth(tree_left, tree_right))
+            offset += len(tree_left)
+
+        # base_score is a probability for binary:logistic, scoring works in margin space
+        base_score = float(learner['learner_model_param']['base_score'])
+        base_margin = np.log(base_score / (1.0 - base_score))
+
+        return cls(np.concatenate(feature), np.concatenate(threshold), np.concatenate(left),
+                   np.concatenate(default_left), np.concatenate(value),
+                   np.asarray(roots), base_margin, max_depth)
+
+    @staticmethod
+    def _depth(left: np.ndarray, right: np.ndarray) -> int:
+        depth = np.zeros(len(left), dtype=np.int32)
+        for node in range(len(left)):
+            if left[node] != -1:
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+        return int(depth.max())
+
+    def _leaf_sum(self, X: np.ndarray) -> np.ndarray:
+        """
+        Sums the reached leaf of every tree for one chunk of float32 rows
+        """
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        has_missing = np.isnan(flat).any()
+
+        for _ in range(self.max_depth):
+            values = flat[row_offsets + self.feature[nodes]]
+            # XGBoost goes left when value < threshold, NaN follows the default branch
+            go_right = values >= self.threshold[nodes]
+            if has_missing:
+                go_right |= np.isnan(values) & ~self.default_left[nodes]
+            nodes = self.left[nodes] + go_right
+
+        return self.value[nodes].sum(axis=1, dtype=np.float32)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """
+        Raw margin per row: base margin plus the sum of one leaf per tree
+        """
+        # XGBoost compares features as float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        margin = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), self.chunk_size):
+            margin[start:start + self.chunk_size] = self._leaf_sum(X[start:start + self.chunk_size])
+        return margin + np.float32(self.base_margin)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns [P(class 0), P(class 1)] per row, like the XGBoost model
+        """
+        positive = _sigmoid(self.decision_function(X).astype(np.float64))
+        return np.column_stack([1.0 - positive, positive])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'feature': self.feature, 'threshold': self.threshold, 'left': self.left,
+            'default_left': self.default_left, 'value': self.value, 'roots': self.roots,
+            'base_margin': np.array([self.base_margin]), 'max_depth': np.array([self.max_depth])
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'TreeEnsembleScorer':
+        return cls(arrays['feature'], arrays['threshold'], arrays['left'],
+                   arrays['default_left'], arrays['value'], arrays['roots'],
+                   arrays['base_margin'][0], arrays['max_depth'][0])
+
+class KernelSVMScorer:
+    """
+    Binary RBF kernel SVC with libsvm's Platt scaled probabilities
+    Kernel rows come from one matrix product against the support vectors
+    """
+
+    kind = 'rbf_svm'
+
+    max_native_rows = None
+
+    # libsvm clips pairwise probabilities to [min_prob, 1 - min_prob]
+    min_prob = 1e-7
+
+    def __init__(self, support_vectors: np.ndarray, dual_coef: np.ndarray, intercept: float,
+                 gamma: float, prob_a: float, prob_b: float):
+        self.support_vectors = np.asarray(support_vectors, dtype=np.float64)
+        self.dual_coef = np.asarray(dual_coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.gamma = float(gamma)
+        self.prob_a = float(prob_a)
+        self.prob_b = float(prob_b)
+        self.support_norms = np.einsum('ij,ij->i', self.support_vectors, self.support_vectors)
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'KernelSVMScorer':
+        """
+        Compiles a fitted binary sklearn SVC(kernel='rbf', probability=True)
+        """
+        if model.kernel != 'rbf':
+            raise ValueError(f"Unsupported kernel: {model.kernel}")
+        if len(model.classes_) != 2 or len(model.probA_) != 1:
+            raise ValueError("Only binary SVC models with probability=True can be compiled")
+        # The underscored attributes hold libsvm's own signs, the public ones are flipped for binary models
+        return cls(model.support_vectors_, model._dual_coef_[0], model._intercept_[0],
+                   model._gamma, model.probA_[0], model.probB_[0])
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """
+        libsvm decision value per row (the negated sklearn decision_function)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        squared_distance = (np.einsum('ij,ij->i', X, X)[:, None] + self.support_norms
+                            - 2.0 * X @ self.support_vectors.T)
+        kernel = np.exp(-self.gamma * np.maximum(squared_distance, 0.0))
+        return kernel @ self.dual_coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns [P(class 0), P(class 1)] per row, like the sklearn model
+        """
+        pairwise = _sigmoid(-(self.decision_function(X) * self.prob_a + self.prob_b))
+        negative = self._couple(np.clip(pairwise, self.min_prob, 1.0 - self.min_prob))
+        return np.column_stack([negative, 1.0 - negative])
+
+    @staticmethod
+    def _couple(r: np.ndarray, max_iter: int = 100) -> np.ndarray:
+        """
+        libsvm's multiclass_probability for two classes, vectorized over rows
+        The iteration stops at a tolerance, so it is replayed rather than taking r directly
+        """
+        Q = [[(1.0 - r) ** 2, -(1.0 - r) * r], [-(1.0 - r) * r, r ** 2]]
+        p = [np.full_like(r, 0.5), np.full_like(r, 0.5)]
+        active = np.ones(len(r), dtype=bool)
+        eps = 0.005 / 2
+
+        for _ in range(max_iter):
+            Qp = [Q[t][0] * p[0] + Q[t][1] * p[1] for t in range(2)]
+            pQp = p[0] * Qp[0] + p[1] * Qp[1]
+            active &= np.maximum(np.abs(Qp[0] - pQp), np.abs(Qp[1] - pQp)) >= eps
+            if not active.any():
+                break
+            for t in range(2):
+                # Converged rows take a zero step and stay put
+                diff = np.where(active, (pQp - Qp[t]) / Q[t][t], 0.0)
+                p[t] = p[t] + diff
+                pQp = (pQp + diff * (diff * Q[t][t] + 2.0 * Qp[t])) / (1.0 + diff) ** 2
+                for j in range(2):
+                    Qp[j] = (Qp[j] + diff * Q[t][j]) / (1.0 + diff)
+                    p[j] = p[j] / (1.0 + diff)
+        return p[0]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'support_vectors': self.support_vectors, 'dual_coef': self.dual_coef,
+            'intercept': np.array([self.intercept]), 'gamma': np.array([self.gamma]),
+            'prob_a': np.array([self.prob_a]), 'prob_b': np.array([self.prob_b])
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'KernelSVMScorer':
+        return cls(arrays['support_vectors'], arrays['dual_coef'], arrays['intercept'][0],
+                   arrays['gamma'][0], arrays['prob_a'][0], arrays['prob_b'][0])
+
+class NystroemScorer:
+    """
+    Nystroem RBF feature map followed by a logistic regression, as in src.approx_svm
+    The feature map's normalization matrix is folded into the coefficients, so scoring is
+    one kernel product against the landmarks and a dot product: sigmoid(K(X, landmarks) @ weights + intercept)
+    """
+
+    kind = 'nystroem'
+
+    # Landmarks are fixed and few, the kernel product beats the sklearn pipeline at every batch size
+    max_native_rows = None
+
+    def __init__(self, landmarks: np.ndarray, weights: np.ndarray, intercept: float, gamma: float):
+        self.landmarks = np.asarray(landmarks, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.gamma = float(gamma)
+        self.landmark_norms = np.einsum('ij,ij->i', self.landmarks, self.landmarks)
+
+    @classmethod
+    def from_model(cls, model: Any) -> 'NystroemScorer':
+        """
+        Compiles a fitted Pipeline of Nystroem(kernel='rbf') and a binary LogisticRegression
+        """
+        feature_map, classifier = model.steps[0][1], model.steps[-1][1]
+        if len(model.steps) != 2 or not hasattr(feature_map, 'normalization_'):
+            raise ValueError("Only Nystroem + LogisticRegression pipelines can be compiled")
+        if feature_map.kernel != 'rbf':
+            raise ValueError(f"Unsupported kernel: {feature_map.kernel}")
+        if classifier.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic regression models can be compiled")
+        # sklearn's rbf_kernel defaults gamma to 1 / n_features
+        gamma = feature_map.gamma if feature_map.gamma is not None else 1.0 / feature_map.components_.shape[1]
+        # features = K @ normalization.T, so features @ coef = K @ (normalization.T @ coef)
+        weights = feature_map.normalization_.T @ classifier.coef_[0]
+        return cls(feature_map.components_, weights, classifier.intercept_[0], gamma)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        squared_distance = (np.einsum('ij,ij->i', X, X)[:, None] + self.landmark_norms
+                            - 2.0 * X @ self.landmarks.T)
+        kernel = np.exp(-self.gamma * np.maximum(squared_distance, 0.0))
+        return kernel @ self.weights + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns [P(class 0), P(class 1)] per row, like the sklearn pipeline
+        """
+        positive = _sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - positive, positive])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'landmarks': self.landmarks, 'weights': self.weights,
+            'intercept': np.array([self.intercept]), 'gamma': np.array([self.gamma])
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'NystroemScorer':
+        return cls(arrays['landmarks'], arrays['weights'], arrays['intercept'][0], arrays['gamma'][0])
+
+SCORER_KINDS = {scorer.kind: scorer for scorer in (LinearScorer, TreeEnsembleScorer, KernelSVMScorer, NystroemScorer)}
+
+def compile_model(model: Any):
+    """
+    Compiles a fitted LogisticRegression, XGBClassifier, RBF SVC or Nystroem pipeline into its NumPy scorer
+    """
+    if hasattr(model, 'get_booster'):
+        return TreeEnsembleScorer.from_model(model)
+    if hasattr(model, 'support_vectors_'):
+        return KernelSVMScorer.from_model(model)
+    if hasattr(model, 'steps'):
+        return NystroemScorer.from_model(model)
+    if hasattr(model, 'coef_'):
+        return LinearScorer.from_model(model)
+    raise TypeError(f"No native scorer for {type(model).__name__}")
+
+def save_scorer(scorer, filepath: str) -> None:
+    """
+    Saves a scorer as an .npz file of its flat arrays
+    """
+    np.savez(filepath, kind=np.array(scorer.kind), **scorer.arrays())
+    logger.info(f"Native scorer saved to {filepath}")
+
+def load_scorer(filepath: str):
+    """
+    Loads a scorer written by save_scorer
+    """
+    with np.load(filepath) as data:
+        arrays = {key: data[key] for key in data.files}
+    return SCORER_KINDS[str(arrays.pop('kind'))].from_arrays(arrays)
+
+def export_native_scorers(models_dir: Path) -> Dict[str, Path]:
+    """
+    Compiles the logistic, XGBoost and approximate SVM pickles in models_dir into .npz scorers
+    """
+    source_files = {
+        'logistic': models_dir / 'logistic_regression_best.pkl',
+        'xgboost': models_dir / 'xgboost_best.pkl',
+        'svm_approx': models_dir / 'svm_approx_best.pkl'
+    }
+    exported = {}
+    for name, source in source_files.items():
+        if not source.exists():
+            logger.warning(f"Model file not found: {source}")
+            continue
+        target = models_dir / NATIVE_SCORER_FILES[name]
+        save_scorer(compile_model(joblib.load(source)), str(target))
+        exported[name] = target
+    return exported
+
+def predict_proba_native(scorer, model: Any, X: np.ndarray) -> np.ndarray:
+    """
+    Scores with the native scorer up to its max_native_rows, larger batches go to the original model
+    """
+    if scorer.max_native_rows is not None and len(X) > scorer.max_native_rows:
+        return model.predict_proba(X)
+    return scorer.predict_proba(X)
+
+def check_parity(model: Any, scorer, X: np.ndarray, atol: float = 1e-6) -> float:
+    """
+    Returns the max absolute probability difference, raises if it exceeds atol
+    """
+    difference = float(np.max(np.abs(model.predict_proba(X)[:, 1] - scorer.predict_proba(X)[:, 1])))
+    if difference > atol:
+        raise AssertionError(f"Native scorer differs from model by {difference:.3g} (atol {atol:.1g})")
+    return difference
+
+def benchmark(predict_fn, X: np.ndarray, repeats: int = 200) -> float:
+    """
+    Returns the median seconds per predict_fn(X) call
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_fn(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def sample_feature_matrix(project_root: Path, n_rows: int = 10000) -> np.ndarray:
+    """
+    Builds parity/benchmark inputs from the raw sample data and the saved preprocessor
+    """
+    import pandas as pd
+    from src.data_preprocessing import StartupDataProcessor
+
+    processor = StartupDataProcessor.load(str(project_root / "results" / "models" / "preprocessor.pkl"))
+    df = pd.read_csv(project_root / "data" / "raw" / "startups_data.csv", encoding='latin-1')
+    df['category_list'] = df['category_code'].astype(str)
+    X = processor.transform(df.sample(n=n_rows, replace=True, random_state=42))
+
+    # Adds missing founding years to exercise the default branches
+    X[::97, processor.feature_columns.index('founded_year_std')] = np.nan
+    return X
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    models_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else project_root / "results" / "models"
+
+    exported = export_native_scorers(models_dir)
+    X = sample_feature_matrix(project_root)
+
+    print(f"{'model':<10} {'max |dp|':>10} {'batch':>6} {'original':>12} {'native':>12} {'speedup':>8}")
+    for name, path in exported.items():
+        model = joblib.load(models_dir / Path(path).name.replace('_native.npz', '_best.pkl'))
+        scorer = load_scorer(str(path))
+
+        # Logistic NaN rows have no defined output, so parity is checked on complete rows
+        X_check = X if name == 'xgboost' else X[~np.isnan(X).any(axis=1)]
+        difference = check_parity(model, scorer, X_check)
+
+        for batch_size in (1, 8, 64, 10000):
+            X_batch = X_check[:batch_size]
+            repeats = 200 if batch_size < 10000 else 20
+            original = benchmark(model.predict_proba, X_batch, repeats)
+            native = benchmark(scorer.predict_proba, X_batch, repeats)
+            print(f"{name:<10} {difference:>10.2e} {batch_size:>6} {original * 1e6:>10.1f}us "
+                  f"{native * 1e6:>10.1f}us {original / native:>7.1f}x")
@@ -0,0 +1,138 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from src.model_bundle import BUNDLES_DIR, LATEST_FILE
+
+logger = logging.getLogger(__name__)
+
+class ModelSnapshot:
+    """
+    One version of everything a request reads: models, scorers, explainers, preprocessor and lookups
+    Swapped as a whole by ModelRegistry, nothing in it changes after activation except explainers
+    loaded on first use. Its micro-batchers and process pool belong to it and stop when it is retired
+    """
+
+    def __init__(self, version: str, models: Dict[str, Any], preprocessor: Any, feature_columns: List[str],
+                 native_scorers: Dict[str, Any], model_versions: Dict[str, str], artifact_paths: Dict[str, Any],
+                 model_bundle: Any = None, region_index: Any = None, city_index: Any = None,
+                 catalog_responses: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.models = models
+        self.preprocessor = preprocessor
+        self.feature_columns = feature_columns
+        self.native_scorers = native_scorers
+        self.model_versions = model_versions
+        self.artifact_paths = artifact_paths
+        self.model_bundle = model_bundle
+        self.region_index = region_index
+        self.city_index = city_index
+        self.catalog_responses = catalog_responses or {}
+        # Per artifact load and per model warmup timings, reported by /ready while this version serves
+        self.artifacts: Dict[str, Any] = {}
+        self.warmup: Dict[str, Any] = {}
+        self.explainers: Dict[str, Any] = {}
+        self.explainer_load_lock = asyncio.Lock()
+        self.batchers: Dict[str, Any] = {}
+        self.executors: Dict[str, Any] = {}
+        self.loaded_at = time.time()
+
+        # Requests currently holding this snapshot, retirement waits for them
+        self.in_flight = 0
+        self._drained: Optional[asyncio.Event] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.loaded_at)),
+            "models": list(self.models),
+            "bundle": self.artifact_paths.get('bundle'),
+            "in_flight": self.in_flight
+        }
+
+class ModelRegistry:
+    """
+    Holds the active ModelSnapshot and swaps in new ones without stopping traffic
+    Requests take the active snapshot once through acquire() and keep it until they finish,
+    so a swap never mixes two versions inside one request. Reloads are serialized by reload_lock
+    """
+
+    def __init__(self, history_size: int = 20):
+        self.active: Optional[ModelSnapshot] = None
+        self.reload_lock = asyncio.Lock()
+        self.history = deque(maxlen=history_size)
+        self.retiring: List[ModelSnapshot] = []
+
+    @contextmanager
+    def acquire(self) -> Iterator[ModelSnapshot]:
+        """
+        Pins the active snapshot for the duration of the with block
+        """
+        snapshot = self.active
+        if snapshot is None:
+            raise LookupError("No model version is active")
+        snapshot.in_flight += 1
+        try:
+            yield snapshot
+        finally:
+            snapshot.in_flight -= 1
+            if snapshot.in_flight == 0 and snapshot._drained is not None:
+                snapshot._drained.set()
+
+    def activate(self, snapshot: ModelSnapshot, seconds: Optional[float] = None, trigger: str = "startup") -> Optional[ModelSnapshot]:
+        """
+        Makes snapshot the active version and returns the one it replaced
+        A single assignment on the event loop thread, so every request sees either version, never a mix
+        """
+        previous, self.active = self.active, snapshot
+        self.history.append({
+            "version": snapshot.version,
+            "activated_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "trigger": trigger,
+            "load_seconds": round(seconds, 4) if seconds is not None else None,
+            "replaced": previous.version if previous is not None else None
+        })
+        logger.info(f"Activated model version {snapshot.version} ({trigger})")
+        return previous
+
+    async def retire(self, snapshot: ModelSnapshot, close: Callable[[ModelSnapshot], Awaitable[None]],
+                     timeout: float) -> None:
+        """
+        Waits up to timeout seconds for requests still holding snapshot, then releases its resources
+        """
+        self.retiring.append(snapshot)
+        snapshot._drained = asyncio.Event()
+        if snapshot.in_flight == 0:
+            snapshot._drained.set()
+        try:
+            await asyncio.wait_for(snapshot._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Model version {snapshot.version} still has {snapshot.in_flight} requests "
+                           f"after {timeout}s, closing it anyway")
+        try:
+            await close(snapshot)
+        finally:
+            self.retiring.remove(snapshot)
+            logger.info(f"Retired model version {snapshot.version}")
+
+def source_fingerprint(models_dir: Path, data_dir: Path, use_bundle: bool) -> str:
+    """
+    Cheap identity of what a reload would load: the LATEST bundle pointer, or the size and
+    modification time of every pickle, plus the dropdown CSVs. Changes when training writes new artifacts
+    """
+    parts = []
+    latest = models_dir / BUNDLES_DIR / LATEST_FILE
+    if use_bundle and latest.exists():
+        parts.append(f"bundle:{latest.read_text().strip()}")
+    else:
+        for path in sorted(models_dir.glob("*.pkl")) + sorted(models_dir.glob("*.npz")):
+            stat = path.stat()
+            parts.append(f"{path.name}:{stat.st_size:x}-{stat.st_mtime_ns:x}")
+    for path in sorted(data_dir.glob("unique_*.csv")):
+        stat = path.stat()
+        parts.append(f"{path.name}:{stat.st_size:x}-{stat.st_mtime_ns:x}")
+    return "|".join(parts)
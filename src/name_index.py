@@ -0,0 +1,161 @@
+"""
+Search index over the region and city names behind the dropdowns and input normalization
+
+Names are kept sorted by their lowercase form, so a prefix is a binary search for the
+first match plus a slice, and the match count is a second binary search. A trigram
+inverted index (posting arrays of name ids) backs typo tolerant matching: candidates
+are ranked by shared trigrams with one np.bincount, scored with the Dice coefficient,
+and trigrams shared by too many names are skipped so lookup time stays bounded
+
+Usage: python -m src.name_index [--csv data/processed/unique_cities.csv --column city] [--names 100000]
+"""
+import argparse
+import bisect
+import sys
+import time
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Longer inputs are cut before trigram matching, nobody types a 64 character city by mistake
+MAX_QUERY_LENGTH = 64
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    """
+    Case INSENSITIVE exact, prefix and fuzzy lookups over a fixed list of names
+    Names differing only in case collapse to the last one seen, like the old lookup dictionaries
+    """
+
+    def __init__(self, names: Iterable[str], max_posting_fraction: float = 0.1):
+        by_key = {str(name).lower(): str(name) for name in names}
+        self.keys: List[str] = sorted(by_key)
+        self.names: List[str] = [by_key[key] for key in self.keys]
+        self._exact: Dict[str, str] = by_key
+
+        postings: Dict[str, List[int]] = {}
+        sizes = np.empty(len(self.keys), dtype=np.int32)
+        for name_id, key in enumerate(self.keys):
+            grams = _trigrams(key)
+            sizes[name_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._sizes = sizes
+        # Trigrams in more names than this carry little signal and dominate the work, so they are skipped
+        self.max_postings = max(64, int(len(self.keys) * max_posting_fraction))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def exact(self, query: str) -> Optional[str]:
+        return self._exact.get(query.lower())
+
+    def prefix(self, prefix: str, limit: int = 20, offset: int = 0) -> Tuple[List[str], int]:
+        """
+        Names starting with prefix (case INSENSITIVE) in key order, returns (page, total matches)
+        """
+        key = prefix.lower()
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_left(self.keys, key + "\U0010ffff", lo=start)
+        page_start = min(start + offset, end)
+        return self.names[page_start:min(page_start + limit, end)], end - start
+
+    def fuzzy(self, query: str, min_similarity: float = 0.6, limit: int = 1) -> List[Tuple[str, float]]:
+        """
+        Up to limit (name, similarity) pairs with trigram Dice similarity >= min_similarity, best first
+        """
+        grams = _trigrams(query.lower()[:MAX_QUERY_LENGTH])
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        selective = [ids for ids in lists if len(ids) <= self.max_postings]
+        # Falls back to the common trigrams only when nothing else matched
+        lists = selective or lists
+        if not lists:
+            return []
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+        candidates = np.flatnonzero(shared)
+        scores = 2.0 * shared[candidates] / (len(grams) + self._sizes[candidates])
+        keep = scores >= min_similarity
+        candidates, scores = candidates[keep], scores[keep]
+        # Stable sort keeps ties in key order, so results are deterministic
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [(self.names[candidates[i]], float(scores[i])) for i in order]
+
+    def normalize(self, query: str, min_similarity: Optional[float] = 0.6) -> str:
+        """
+        Exact name for query, else its closest fuzzy match, else query unchanged
+        min_similarity None disables the fuzzy fallback
+        """
+        if not query:
+            return query
+        match = self._exact.get(query.lower())
+        if match is not None:
+            return match
+        if min_similarity is None:
+            return query
+        best = self.fuzzy(query, min_similarity, limit=1)
+        return best[0][0] if best else query
+
+def read_name_index(column: str, path: Path) -> NameIndex:
+    """
+    Builds the index from a dropdown CSV column
+    """
+    return NameIndex(pd.read_csv(path)[column].dropna())
+
+def benchmark(index: NameIndex, queries: List[str], repeats: int = 5) -> Dict[str, float]:
+    """
+    Mean microseconds per exact, prefix and fuzzy lookup over queries
+    """
+    results = {}
+    for label, fn in (('exact_us', lambda q: index.exact(q)),
+                      ('prefix_us', lambda q: index.prefix(q[:3], 20)),
+                      ('fuzzy_us', lambda q: index.fuzzy(q))):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for query in queries:
+                fn(query)
+        results[label] = (time.perf_counter() - start) / (repeats * len(queries)) * 1e6
+    return results
+
+def _with_typo(rng: np.random.Generator, name: str) -> str:
+    position = int(rng.integers(len(name)))
+    return name[:position] + name[position + 1:] if len(name) > 3 else name
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a name index and time its lookups")
+    parser.add_argument("--csv", default=None, help="Dropdown CSV to index (default synthetic names)")
+    parser.add_argument("--column", default="city")
+    parser.add_argument("--names", type=int, default=100000, help="Synthetic names when no --csv is given")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from src.name_index import NameIndex, benchmark, read_name_index
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    if args.csv:
+        index = read_name_index(args.column, Path(args.csv))
+    else:
+        syllables = np.array(['san', 'ta', 'ber', 'lin', 'mon', 'ro', 'ville', 'port', 'ham', 'ton', 'ka', 'dor',
+                              'sea', 'ri', 'vo', 'new', 'ford', 'lake', 'ma', 'del'])
+        names = {"".join(rng.choice(syllables, rng.integers(2, 5))).title() for _ in range(args.names)}
+        index = NameIndex(names)
+    print(f"Indexed {len(index)} names in {time.perf_counter() - start:.2f}s")
+
+    sample = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+    queries = [_with_typo(rng, index.names[i]) for i in sample]
+    recovered = sum(index.normalize(query) == index.names[i] for query, i in zip(queries, sample))
+    print(f"Typo recovery: {recovered}/{len(queries)} ({recovered / len(queries):.1%})")
+    for label, micros in benchmark(index, queries).items():
+        print(f"   {label:<10} {micros:>8.1f} us")
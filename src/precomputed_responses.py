@@ -0,0 +1,54 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Bodies smaller than this are sent uncompressed, gzip framing would outweigh the savings
+GZIP_MIN_BYTES = 1024
+
+class PrecomputedResponse:
+    """
+    JSON body serialized once, with an optional gzip copy and strong ETags for both
+    Served as bytes, If-None-Match requests for an unchanged body get an empty 304
+    """
+
+    def __init__(self, content: Any, compress: bool = True, cache_control: str = "no-cache"):
+        self.body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.cache_control = cache_control
+        # Each encoding is its own representation, so the gzip copy gets its own strong ETag
+        self.gzip_body: Optional[bytes] = None
+        self.gzip_etag: Optional[str] = None
+        if compress and len(self.body) >= GZIP_MIN_BYTES:
+            # mtime=0 keeps the compressed bytes identical across rebuilds of the same content
+            self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self.gzip_etag = f'"{digest}-gz"'
+
+    def _not_modified(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        # W/ prefixes are ignored, If-None-Match uses the weak comparison
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self.etag in tags or (self.gzip_etag is not None and self.gzip_etag in tags)
+
+    def respond(self, request: Request) -> Response:
+        """
+        200 with the identity or gzip body depending on Accept-Encoding, or 304 when the client's copy is current
+        """
+        use_gzip = self.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", "")
+        headers = {
+            "ETag": self.gzip_etag if use_gzip else self.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding"
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and self._not_modified(if_none_match):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
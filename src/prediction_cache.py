@@ -0,0 +1,96 @@
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class PredictionCache:
+    """
+    Bounded LRU cache with optional TTL for model outputs
+    Keys are built from the preprocessed feature vector, so different spellings
+    of the same region/city/category share one entry
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 0):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(kind: str, model_name: str, model_version: str, features: np.ndarray) -> Hashable:
+        """
+        Builds a cache key from the output kind, model identity and encoded features
+        """
+        return (kind, model_name, model_version, np.ascontiguousarray(features, dtype=np.float64).tobytes())
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value or None, refreshing its LRU position on a hit
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries beyond max_entries
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops every entry, used when models are reloaded
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns cache counters for monitoring
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
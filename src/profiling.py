@@ -0,0 +1,163 @@
+import asyncio
+import cProfile
+import hmac
+import io
+import json
+import pstats
+import time
+import uuid
+import logging
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+
+# Set for the duration of a profiled request, so endpoints can run pool work inline where the profiler sees it
+_active_profile: ContextVar[Optional[cProfile.Profile]] = ContextVar('active_profile', default=None)
+
+def profiling_active() -> bool:
+    """
+    True inside a request running under ProfilingMiddleware
+    """
+    return _active_profile.get() is not None
+
+def render_stats(profile: cProfile.Profile, limit: int = 40) -> str:
+    """
+    Text call tree summary: the slowest functions by cumulative time, then who called them
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(limit)
+    stats.print_callers(limit // 2)
+    return stream.getvalue()
+
+class _StepProfiled:
+    """
+    Awaitable driving a coroutine one step at a time with the profiler enabled only during its steps
+    Whatever else the event loop runs while the coroutine waits stays out of the profile,
+    as does work it hands to other tasks or threads
+    """
+
+    def __init__(self, coroutine: Any, profile: cProfile.Profile):
+        self.coroutine = coroutine
+        self.profile = profile
+
+    def __await__(self):
+        step, value = self.coroutine.send, None
+        while True:
+            self.profile.enable()
+            try:
+                yielded = step(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value = yield yielded
+                step = self.coroutine.send
+            except GeneratorExit:
+                self.coroutine.close()
+                raise
+            except BaseException as error:
+                # Cancellation and errors set on awaited futures are raised inside the request
+                step, value = self.coroutine.throw, error
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running single requests under cProfile on demand
+    A request is profiled when it sends the X-Profile header or ?profile=1 together with
+    X-Profile-Token matching the configured token, other requests pass straight through
+    Only the request's own coroutine steps are measured, not concurrent requests sharing the event loop
+    The profile is saved as <id>.prof (pstats/snakeviz) and <id>.txt, the id is returned in X-Profile-Id
+    """
+
+    def __init__(self, app: Any, token: str, output_dir: Path, paths: Tuple[str, ...] = ('/predict', '/predict/explain'),
+                 limit: int = 40):
+        self.app = app
+        self.token = token.encode()
+        self.output_dir = Path(output_dir)
+        self.paths = set(paths)
+        self.limit = limit
+        # cProfile hooks the interpreter, so only one request is profiled at a time
+        self._busy = False
+
+    def _requested(self, scope: Dict[str, Any], headers: Dict[bytes, bytes]) -> bool:
+        if PROFILE_HEADER in headers:
+            return headers[PROFILE_HEADER] not in (b"0", b"")
+        query = parse_qs(scope.get("query_string", b"").decode())
+        return query.get("profile", ["0"])[-1] not in ("0", "")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not self._requested(scope, headers):
+            await self.app(scope, receive, send)
+            return
+
+        if not hmac.compare_digest(headers.get(TOKEN_HEADER, b""), self.token):
+            await self._reject(send, 403, "Profiling requires a valid X-Profile-Token")
+            return
+        if self._busy:
+            await self._reject(send, 429, "Another request is being profiled")
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        self._busy = True
+        profile = cProfile.Profile()
+        token = _active_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await _StepProfiled(self.app(scope, receive, send_with_id), profile)
+        finally:
+            _active_profile.reset(token)
+            self._busy = False
+            seconds = time.perf_counter() - start
+            await asyncio.to_thread(self._save, profile_id, profile, scope["path"], seconds)
+
+    def _save(self, profile_id: str, profile: cProfile.Profile, path: str, seconds: float) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(self.output_dir / f"{profile_id}.prof"))
+        # Wall time includes waits, the stats only the time the request itself was running
+        header = f"{path} profiled in {seconds * 1000.0:.2f} ms\n\n"
+        (self.output_dir / f"{profile_id}.txt").write_text(header + render_stats(profile, self.limit))
+        logger.info(f"Saved profile {profile_id} for {path} ({seconds * 1000.0:.2f} ms)")
+
+    async def _reject(self, send: Any, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+def load_profile(output_dir: Path, profile_id: str) -> Optional[str]:
+    """
+    Text summary of a saved profile, None when the id is unknown
+    """
+    # Ids are generated by the middleware, anything else could escape the output directory
+    if not profile_id or not all(char.isalnum() or char == "-" for char in profile_id):
+        return None
+    path = Path(output_dir) / f"{profile_id}.txt"
+    return path.read_text() if path.exists() else None
+
+def list_profiles(output_dir: Path) -> List[str]:
+    """
+    Saved profile ids, newest first
+    """
+    output_dir = Path(output_dir)
+    if not output_dir.exists():
+        return []
+    return sorted((path.stem for path in output_dir.glob("*.txt")), reverse=True)
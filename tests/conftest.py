@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+import pandas as pd
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+@pytest.fixture(scope="session")
+def sample_csv(tmp_path_factory) -> Path:
+    """
+    Seeded generate_sample_data.py output, written once per test session
+    """
+    from generate_sample_data import generate
+
+    path = tmp_path_factory.mktemp("data") / "startups_data.csv"
+    generate(path, n_rows=3000, seed=42, chunk_size=1000)
+    return path
+
+@pytest.fixture(scope="session")
+def sample_frame(sample_csv) -> pd.DataFrame:
+    """
+    The sample data read like train_models.py did before the typed loader
+    """
+    df = pd.read_csv(sample_csv, encoding='latin-1')
+    df['category_list'] = df['category_code'].astype(str)
+    return df
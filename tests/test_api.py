@@ -0,0 +1,132 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+
+from src.data_preprocessing import StartupDataProcessor
+from src.prediction_cache import PredictionCache
+
+FEATURES = ['country_code', 'region', 'city', 'category_list', 'founded_year']
+
+@pytest.fixture(scope="module")
+def trained(sample_frame, tmp_path_factory):
+    """
+    Loose logistic and XGBoost pickles plus the dropdown CSVs the API loads at startup
+    """
+    import xgboost as xgb
+
+    processor = StartupDataProcessor().fit(sample_frame)
+    X = processor.transform(sample_frame)
+    y = (sample_frame['status'] == 'acquired').to_numpy(dtype=np.int64)
+    complete = ~np.isnan(X).any(axis=1)
+    models = {
+        'logistic': LogisticRegression(max_iter=1000).fit(X[complete], y[complete]),
+        'xgboost': xgb.XGBClassifier(n_estimators=20, max_depth=3, random_state=42).fit(X, y)
+    }
+
+    models_dir = tmp_path_factory.mktemp("models")
+    processor.save(str(models_dir / 'preprocessor.pkl'))
+    joblib.dump(processor.feature_columns, models_dir / 'feature_columns.pkl')
+    joblib.dump(models['logistic'], models_dir / 'logistic_regression_best.pkl')
+    joblib.dump(models['xgboost'], models_dir / 'xgboost_best.pkl')
+
+    data_dir = tmp_path_factory.mktemp("processed")
+    pd.DataFrame({'region': sorted(sample_frame['region'].dropna().unique())}).to_csv(data_dir / 'unique_regions.csv', index=False)
+    pd.DataFrame({'city': sorted(sample_frame['city'].dropna().unique())}).to_csv(data_dir / 'unique_cities.csv', index=False)
+    return processor, models, models_dir, data_dir
+
+@pytest.fixture(scope="module")
+def api(trained):
+    from app import app as api
+
+    _, _, models_dir, data_dir = trained
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(api, 'MODELS_DIR', models_dir)
+        patch.setattr(api, 'DATA_DIR', data_dir)
+        # Thread pool only, so every model runs in this process
+        patch.setattr(api, 'EXPLAIN_PROCESSES', 0)
+        patch.setattr(api, 'BACKGROUND_STARTUP', False)
+        patch.setattr(api, 'WARMUP_BATCH_ROWS', 2)
+        yield api
+
+@pytest.fixture(scope="module")
+def client(api):
+    with TestClient(api.app) as client:
+        yield client
+
+@pytest.fixture(scope="module")
+def startups(sample_frame):
+    records = sample_frame[FEATURES].dropna().drop_duplicates().head(5)
+    return records.astype({'founded_year': int}).to_dict(orient='records')
+
+def expected(trained, startups, name):
+    processor, models, _, _ = trained
+    return models[name].predict_proba(processor.transform(pd.DataFrame(startups)))[:, 1]
+
+def test_batch_scores_every_startup_with_the_requested_model(client, trained, startups):
+    default = client.post("/predict/batch", json={"startups": startups})
+    chosen = client.post("/predict/batch", params={"model": "logistic"}, json={"startups": startups})
+
+    assert default.status_code == 200 and chosen.status_code == 200
+    for response, name in ((default, 'xgboost'), (chosen, 'logistic')):
+        body = response.json()
+        assert body["count"] == len(startups) == len(body["predictions"])
+        assert {prediction["model_used"] for prediction in body["predictions"]} == {name}
+        probabilities = [prediction["success_probability"] for prediction in body["predictions"]]
+        np.testing.assert_allclose(probabilities, expected(trained, startups, name), atol=1e-6, err_msg=name)
+        assert [prediction["prediction"] for prediction in body["predictions"]] == [int(p > 0.5) for p in probabilities]
+
+def test_batch_rejects_unknown_models_even_when_empty(client):
+    assert client.post("/predict/batch", params={"model": "knn"}, json={"startups": []}).status_code == 404
+    assert client.post("/predict/batch", json={"startups": []}).json() == {"predictions": [], "count": 0}
+
+def test_ensemble_combines_the_model_scores(client, trained, startups):
+    response = client.post("/predict/ensemble", params={"method": "weighted", "weights": "xgboost=3,logistic=1"},
+                           json=startups[0])
+
+    assert response.status_code == 200
+    body = response.json()
+    scores = {name: expected(trained, startups[:1], name)[0] for name in ('logistic', 'xgboost')}
+    assert body["method"] == "weighted"
+    assert body["weights"] == pytest.approx({'xgboost': 0.75, 'logistic': 0.25})
+    assert body["model_probabilities"] == pytest.approx(scores, abs=1e-6)
+    assert body["success_probability"] == pytest.approx(0.75 * scores['xgboost'] + 0.25 * scores['logistic'], abs=1e-6)
+    assert body["model_version"]
+
+def test_batch_ensemble_matches_the_single_endpoint(client, startups):
+    params = {"models": "logistic,xgboost", "method": "mean"}
+    batch = client.post("/predict/batch/ensemble", params=params, json={"startups": startups})
+
+    assert batch.status_code == 200
+    body = batch.json()
+    assert body["count"] == len(startups)
+    for startup, prediction in zip(startups, body["predictions"]):
+        single = client.post("/predict/ensemble", params=params, json=startup).json()
+        assert set(prediction["model_probabilities"]) == {'logistic', 'xgboost'}
+        assert prediction["success_probability"] == pytest.approx(single["success_probability"], abs=1e-6)
+
+@pytest.mark.parametrize("path", ["/predict/ensemble", "/predict/batch/ensemble"])
+@pytest.mark.parametrize("params, status", [
+    ({"method": "median"}, 422),
+    ({"method": "weighted", "weights": "xgboost"}, 400),
+    ({"method": "weighted", "weights": "xgboost=-1"}, 400),
+    ({"method": "weighted", "weights": "svm=1"}, 400),
+    ({"models": "knn"}, 404)
+])
+def test_invalid_ensemble_settings_are_client_errors(client, startups, path, params, status):
+    payload = startups[0] if path == "/predict/ensemble" else {"startups": startups}
+    assert client.post(path, params=params, json=payload).status_code == status
+
+@pytest.mark.parametrize("path", ["/predict/batch", "/predict/ensemble", "/predict/batch/ensemble"])
+def test_saturated_pool_returns_503(api, client, startups, path, monkeypatch):
+    executor = api.registry.active.executors['thread']
+    monkeypatch.setattr(executor, 'pending', executor.max_workers + executor.max_queue)
+    # A cached score would skip the pool
+    monkeypatch.setattr(api, 'prediction_cache', PredictionCache(0, 0))
+
+    payload = startups[0] if path == "/predict/ensemble" else {"startups": startups}
+    response = client.post(path, json=payload)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from src.approx_svm import build_approx_svm, compare_variants, kernel_rows
+from src.model_export import NystroemScorer, check_parity, compile_model
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(500, 5))
+    y = (np.sum(X[:, :2] ** 2, axis=1) + rng.normal(scale=0.3, size=500) > 1.5).astype(int)
+    return X[:400], y[:400], X[400:], y[400:]
+
+@pytest.fixture(scope="module")
+def approx(data):
+    X_train, y_train, _, _ = data
+    return build_approx_svm(X_train, n_components=50).fit(X_train, y_train)
+
+def test_approximation_uses_the_svm_gamma_and_caps_landmarks(data):
+    X_train, y_train, _, _ = data
+    pipeline = build_approx_svm(X_train, n_components=50)
+    feature_map = pipeline.steps[0][1]
+
+    # SVC(gamma='scale')
+    assert feature_map.gamma == pytest.approx(1.0 / (X_train.shape[1] * X_train.var()))
+    assert build_approx_svm(X_train[:30], n_components=50).steps[0][1].n_components == 30
+
+def test_approximation_learns_the_rbf_boundary(data, approx):
+    _, _, X_test, y_test = data
+    assert kernel_rows(approx) == 50
+    assert approx.score(X_test, y_test) > 0.8
+
+def test_native_scorer_matches_the_pipeline(data, approx):
+    _, _, X_test, _ = data
+    scorer = compile_model(approx)
+
+    assert isinstance(scorer, NystroemScorer)
+    check_parity(approx, scorer, X_test, atol=1e-9)
+
+def test_compare_variants_reports_every_model(data, approx):
+    X_train, y_train, X_test, y_test = data
+    svm = SVC(probability=True, random_state=42).fit(X_train, y_train)
+    report = compare_variants({'svm': svm, 'svm_approx': approx}, X_test, y_test, batch_sizes=(1, 16), repeats=3)
+
+    assert set(report) == {'svm', 'svm_approx'}
+    assert report['svm']['kernel_rows'] == len(svm.support_vectors_)
+    assert report['svm_approx']['kernel_rows'] == 50
+    # Agreement is measured against the exact SVM only
+    assert 'agreement' not in report['svm']
+    assert 0.0 <= report['svm_approx']['agreement'] <= 1.0
+    assert report['svm_approx']['accuracy'] == pytest.approx(approx.score(X_test, y_test))
+    for entry in report.values():
+        assert set(entry['latency']) == {'1', '16'}
+        assert all(timing['sklearn_ms'] > 0 and timing['native_ms'] > 0 for timing in entry['latency'].values())
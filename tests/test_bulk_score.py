@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src import bulk_score
+from src.bulk_score import MODEL_FILES, NAN_TOLERANT_MODELS, score_file
+from src.data_preprocessing import StartupDataProcessor
+
+@pytest.fixture(scope="module")
+def models_dir(sample_frame, tmp_path_factory):
+    """
+    Loose pickles only, so the scorer takes the pickle path
+    """
+    import xgboost as xgb
+
+    processor = StartupDataProcessor().fit(sample_frame)
+    X = processor.transform(sample_frame)
+    y = (sample_frame['status'] == 'acquired').to_numpy(dtype=np.int64)
+    complete = ~np.isnan(X).any(axis=1)
+
+    models_dir = tmp_path_factory.mktemp("models")
+    processor.save(str(models_dir / 'preprocessor.pkl'))
+    joblib.dump(LogisticRegression(max_iter=1000).fit(X[complete], y[complete]), models_dir / MODEL_FILES['logistic'])
+    joblib.dump(xgb.XGBClassifier(n_estimators=20, max_depth=3, random_state=42).fit(X, y),
+                models_dir / MODEL_FILES['xgboost'])
+    return models_dir
+
+@pytest.fixture(scope="module")
+def input_csv(sample_frame, tmp_path_factory):
+    # Missing founding years exercise the NaN handling of the non tolerant models
+    df = sample_frame.drop(columns=['category_list'])
+    df.loc[::50, 'founded_year'] = np.nan
+    path = tmp_path_factory.mktemp("input") / "startups.csv"
+    df.to_csv(path, index=False, encoding='latin-1')
+    return path
+
+def expected_probabilities(models_dir, input_csv):
+    """
+    Scores the whole file in memory
+    """
+    df = pd.read_csv(input_csv, encoding='latin-1')
+    df['category_list'] = df['category_code'].astype(str)
+    X = StartupDataProcessor.load(str(models_dir / 'preprocessor.pkl')).transform(df)
+    return df, X, {name: joblib.load(models_dir / MODEL_FILES[name]).predict_proba for name in ('logistic', 'xgboost')}
+
+@pytest.mark.parametrize("suffix", ['.csv', '.parquet'])
+def test_chunked_scores_match_in_memory_scoring(models_dir, input_csv, tmp_path, suffix):
+    if suffix == '.parquet':
+        pytest.importorskip('pyarrow')
+    output = tmp_path / f"scored{suffix}"
+    report = score_file(input_csv, output, models_dir, ['logistic', 'xgboost'], keep_columns=['name'], chunksize=700)
+
+    df, X, predictors = expected_probabilities(models_dir, input_csv)
+    scored = pd.read_parquet(output) if suffix == '.parquet' else pd.read_csv(output)
+    assert (report["rows"], report["chunks"]) == (len(df), 5)
+    assert len(scored) == len(df)
+    assert scored['name'].astype(str).tolist() == df['name'].tolist()
+
+    missing = np.isnan(X).any(axis=1)
+    assert missing.any()
+    for name, predict_fn in predictors.items():
+        probability = scored[f'{name}_probability'].to_numpy(dtype=np.float64)
+        rows = np.ones(len(X), dtype=bool) if name in NAN_TOLERANT_MODELS else ~missing
+        np.testing.assert_allclose(probability[rows], predict_fn(X[rows])[:, 1], atol=1e-6, err_msg=name)
+        # Rows a model cannot score are left empty rather than guessed
+        assert np.isnan(probability[~rows]).all()
+        assert scored[f'{name}_prediction'][~rows].isna().all()
+
+class CountingPool:
+    """
+    ProcessPoolExecutor stand-in on threads, records how many submitted chunks were not yet collected
+    """
+    max_outstanding = 0
+
+    def __init__(self, max_workers, initializer, initargs):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+        self._lock = threading.Lock()
+        self._outstanding = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            self._outstanding += 1
+            CountingPool.max_outstanding = max(CountingPool.max_outstanding, self._outstanding)
+        future = self._pool.submit(fn, *args)
+        result = future.result
+
+        def collect(*a, **kw):
+            with self._lock:
+                self._outstanding -= 1
+            return result(*a, **kw)
+
+        future.result = collect
+        return future
+
+def test_parallel_scoring_bounds_chunks_in_flight_and_keeps_order(models_dir, input_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_score, 'ProcessPoolExecutor', CountingPool)
+    CountingPool.max_outstanding = 0
+    output = tmp_path / "scored.csv"
+    report = score_file(input_csv, output, models_dir, ['xgboost'], keep_columns=['name'], chunksize=100, workers=2)
+
+    df, X, predictors = expected_probabilities(models_dir, input_csv)
+    scored = pd.read_csv(output)
+    assert report["chunks"] == 30
+    assert CountingPool.max_outstanding == 2 * 2
+    assert scored['name'].tolist() == df['name'].tolist()
+    np.testing.assert_allclose(scored['xgboost_probability'], predictors['xgboost'](X)[:, 1], atol=1e-6)
+
+def test_unknown_models_fail_before_scoring(models_dir, input_csv, tmp_path):
+    with pytest.raises(ValueError):
+        score_file(input_csv, tmp_path / "scored.csv", models_dir, ['knn'])
@@ -0,0 +1,141 @@
+"""
+Parity of the StartupDataProcessor fast paths with the reference implementations:
+- columnar transform vs the original row by row implementation
+- compiled transform_single vs transform, record by record
+- chunked partial_fit/finalize_fit vs fit on the whole frame
+- fit/transform on the typed (categorical) loader frame vs the inferred dtypes
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader import load_raw_data
+from src.data_preprocessing import StartupDataProcessor
+
+INPUT_COLUMNS = ['country_code', 'region', 'city', 'category_list', 'founded_year']
+
+def add_edge_cases(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Appends rows exercising the awkward inputs the API and raw data can produce
+    """
+    edge_cases = pd.DataFrame({
+        'country_code': ['USA', 'usa', None, 'GBR', 'USA', 'USA'],
+        'region': ['Unknown Region', None, 'Other', 'Western Europe', 'Other', 'Other'],
+        'city': ['Nowhere', None, 'Boston', 'Seattle', 'Boston', 'Other'],
+        'category_list': ['Software|Mobile', 'web  and & games', '', None,
+                          'E-Commerce|analytics|health', 'softwares'],
+        'founded_year': [1995, 2000.5, 2008, np.nan, 1990, 2015],
+    })
+    return pd.concat([df, edge_cases], ignore_index=True)
+
+def transform_rowwise(processor: StartupDataProcessor, df: pd.DataFrame) -> np.ndarray:
+    """
+    The processor's original row by row transform, the reference the columnar transform must match
+    """
+    # Creates a copy to AVOID modifying original *IMPORTANT*
+    df_processed = df.copy()
+
+    # 1. GEOGRAPHIC FEATURE ENGINEERING
+    # Region startup density (5 tier ranking system)
+    df_processed['region_startup_density'] = df_processed['region'].map(processor.region_density_mapping)
+
+    # Fill unknown regions with tier 5 (lowest density)
+    df_processed['region_startup_density'].fillna(5, inplace=True)
+
+    # City startup density (5 tier ranking system)
+    df_processed['city_startup_density'] = df_processed['city'].map(processor.city_density_mapping)
+
+    # Fill unknown cities with tier 5 (lowest density)
+    df_processed['city_startup_density'].fillna(5, inplace=True)
+
+    # USA binary flag
+    df_processed['is_usa'] = (df_processed['country_code'] == 'USA').astype(int)
+
+    # 2. INDUSTRY FEATURE ENGINEERING
+    # Cleans and extract categories
+    df_processed['categories_clean'] = df_processed['category_list'].apply(processor.clean_and_extract_categories)
+
+    # Creates binary features for top categories
+    for category in processor.top_categories:
+        df_processed[f'category_{category}'] = df_processed['categories_clean'].apply(
+            lambda x: 1 if category in x else 0
+        )
+
+    # 3. TEMPORAL FEATURE ENGINEERING
+    # Standardized founding year
+    df_processed['founded_year_std'] = (
+        df_processed['founded_year'] - processor.founding_year_mean
+    ) / processor.founding_year_std
+
+    # Economic era classification
+    df_processed['economic_era'] = df_processed['founded_year'].apply(processor.assign_economic_era)
+
+    # Creates era dummy variables
+    era_dummies = pd.get_dummies(df_processed['economic_era'], prefix='era')
+    df_processed = pd.concat([df_processed, era_dummies], axis=1)
+
+    # Ensures all expected era columns exist
+    for era in ['era_dotcom_era', 'era_post_crash', 'era_recovery']:
+        if era not in df_processed.columns:
+            df_processed[era] = 0
+
+    # Handles unknown economic era
+    if 'era_unknown' in df_processed.columns:
+        # Distributes unknown cases to recovery era (most common)
+        unknown_mask = df_processed['era_unknown'] == 1
+        df_processed.loc[unknown_mask, 'era_recovery'] = 1
+        df_processed.loc[unknown_mask, 'era_unknown'] = 0
+
+    # 5. FEATURE SELECTION - EXTRACT FEATURES MODEL EXPECTS
+    feature_matrix = df_processed[processor.feature_columns].values
+
+    # Handles any remaining NaN values
+    return np.nan_to_num(feature_matrix, nan=0.0)
+
+@pytest.fixture(scope="module")
+def processor(sample_frame) -> StartupDataProcessor:
+    return StartupDataProcessor().fit(sample_frame)
+
+@pytest.fixture(scope="module")
+def edge_frame(sample_frame) -> pd.DataFrame:
+    return add_edge_cases(sample_frame)
+
+def test_transform_matches_rowwise_reference(processor, edge_frame):
+    columnar = processor.transform(edge_frame)
+    reference = transform_rowwise(processor, edge_frame).astype(np.float64)
+
+    assert columnar.dtype == np.float64
+    assert columnar.shape == reference.shape
+    # Bit for bit, NaN == NaN and the sign of zero included
+    np.testing.assert_array_equal(columnar, reference)
+    assert np.array_equal(np.signbit(columnar), np.signbit(reference))
+
+def test_transform_single_matches_transform(processor, edge_frame):
+    batch = processor.transform(edge_frame)
+    for row, record in enumerate(edge_frame[INPUT_COLUMNS].to_dict(orient='records')):
+        np.testing.assert_array_equal(processor.transform_single(record), batch[row], err_msg=str(record))
+
+@pytest.mark.parametrize("chunksize", [1, 7, 1000, None])
+def test_chunked_fit_matches_fit(processor, sample_frame, chunksize):
+    chunksize = chunksize or len(sample_frame)
+    chunked = StartupDataProcessor()
+    for start in range(0, len(sample_frame), chunksize):
+        chunked.partial_fit(sample_frame.iloc[start:start + chunksize])
+    chunked.finalize_fit()
+
+    # Tier maps must match exactly, founding year statistics to floating point rounding
+    for name in ('region_density_mapping', 'city_density_mapping'):
+        assert getattr(chunked, name).equals(getattr(processor, name)), name
+    for name in ('founding_year_mean', 'founding_year_std'):
+        assert np.isclose(getattr(chunked, name), getattr(processor, name), rtol=1e-12, atol=0), name
+    assert chunked.feature_columns == processor.feature_columns
+
+def test_typed_loader_matches_inferred_dtypes(processor, sample_csv, sample_frame):
+    typed = load_raw_data(sample_csv)
+    typed_processor = StartupDataProcessor().fit(typed)
+
+    for name in ('region_density_mapping', 'city_density_mapping'):
+        assert getattr(typed_processor, name).equals(getattr(processor, name)), name
+    assert (typed_processor.founding_year_mean, typed_processor.founding_year_std) == \
+        (processor.founding_year_mean, processor.founding_year_std)
+    np.testing.assert_array_equal(typed_processor.transform(typed), processor.transform(sample_frame))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.ensemble import combine, ensemble_weights, parse_weights
+
+PROBABILITIES = {
+    'logistic': np.array([0.2, 0.9]),
+    'xgboost': np.array([0.6, 0.7]),
+    'svm': np.array([0.7, 0.1])
+}
+
+def test_mean_averages_every_model():
+    combined, used = combine(PROBABILITIES, 'mean')
+
+    np.testing.assert_allclose(combined, [0.5, 1.7 / 3])
+    assert used == pytest.approx({'logistic': 1 / 3, 'xgboost': 1 / 3, 'svm': 1 / 3})
+
+def test_weighted_normalizes_weights_and_skips_unweighted_models():
+    combined, used = combine(PROBABILITIES, 'weighted', {'xgboost': 3, 'svm': 1})
+
+    assert used == pytest.approx({'logistic': 0.0, 'xgboost': 0.75, 'svm': 0.25})
+    np.testing.assert_allclose(combined, [0.75 * 0.6 + 0.25 * 0.7, 0.75 * 0.7 + 0.25 * 0.1])
+
+def test_weighted_without_weights_is_the_mean():
+    np.testing.assert_allclose(combine(PROBABILITIES, 'weighted')[0], combine(PROBABILITIES, 'mean')[0])
+
+def test_vote_counts_models_above_the_threshold():
+    combined, _ = combine(PROBABILITIES, 'vote')
+    np.testing.assert_allclose(combined, [2 / 3, 2 / 3])
+
+    combined, _ = combine(PROBABILITIES, 'vote', {'logistic': 2, 'xgboost': 1, 'svm': 1})
+    np.testing.assert_allclose(combined, [0.5, 0.75])
+    np.testing.assert_allclose(combine(PROBABILITIES, 'vote', threshold=0.65)[0], [1 / 3, 2 / 3])
+
+def test_scalar_probabilities_combine_to_one_score():
+    combined, _ = combine({'logistic': 0.2, 'xgboost': 0.4}, 'mean')
+    np.testing.assert_allclose(combined, [0.3])
+
+def test_parse_weights():
+    assert parse_weights(" xgboost=2, svm=0.5,, ") == {'xgboost': 2.0, 'svm': 0.5}
+    with pytest.raises(ValueError):
+        parse_weights("xgboost")
+    with pytest.raises(ValueError):
+        parse_weights("xgboost=heavy")
+    with pytest.raises(ValueError):
+        parse_weights("xgboost=-1")
+
+def test_invalid_methods_and_zero_weights_are_rejected():
+    with pytest.raises(ValueError):
+        ensemble_weights(['xgboost'], 'median')
+    with pytest.raises(ValueError):
+        combine(PROBABILITIES, 'weighted', {'xgboost': 0, 'svm': 0})
+    with pytest.raises(ValueError):
+        combine(PROBABILITIES, 'weighted', {'knn': 1})
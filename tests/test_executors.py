@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+import pytest
+
+from src.executors import BoundedExecutor, PoolSaturatedError
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor('test', 'thread', max_workers=1, max_queue=1)
+    yield executor
+    executor.shutdown()
+
+def test_jobs_beyond_workers_plus_queue_are_rejected(executor):
+    release = threading.Event()
+
+    async def run():
+        # One job running and one waiting fill the pool
+        jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert executor.stats()["running"] == 1
+        assert executor.stats()["queue_depth"] == 1
+        with pytest.raises(PoolSaturatedError):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["rejected"]) == (2, 0, 1)
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+
+def test_failed_jobs_are_not_counted_as_completed(executor):
+    def fail():
+        raise ValueError("job failed")
+
+    async def run():
+        assert await executor.run(sum, [1, 2]) == 3
+        with pytest.raises(ValueError):
+            await executor.run(fail)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["rejected"]) == (1, 1, 0)
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        BoundedExecutor('test', 'fiber', max_workers=1, max_queue=0)
+    with pytest.raises(ValueError):
+        BoundedExecutor('test', 'thread', max_workers=0, max_queue=0)
+
+@pytest.mark.parametrize("kind", ['thread', 'process'])
+def test_run_on_each_worker_reaches_every_worker(kind):
+    executor = BoundedExecutor('test', kind, max_workers=2, max_queue=0)
+    try:
+        idents = asyncio.run(executor.run_on_each_worker(os.getpid if kind == 'process' else threading.get_ident))
+    finally:
+        executor.shutdown()
+
+    # Without the barrier the first worker could take both jobs
+    assert len(idents) == 2 and len(set(idents)) == 2
+    assert executor.stats()["completed"] == 2
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.explainers import LinearShapExplainer
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(400, 5))
+    y = (X @ np.array([1.5, -2.0, 0.5, 0.0, 1.0]) + rng.normal(size=400) > 0).astype(int)
+    model = LogisticRegression().fit(X, y)
+    return model, X
+
+def test_log_odds_values_are_exact(fitted):
+    model, X = fitted
+    explainer = LinearShapExplainer.from_model(model, X)
+    values = explainer.shap_values(X[:20])
+
+    assert explainer.output_space == 'log_odds'
+    np.testing.assert_allclose(values.sum(axis=1) + explainer.expected_value, model.decision_function(X[:20]))
+    np.testing.assert_allclose(explainer.shap_values(explainer.background_mean), 0.0)
+
+def test_matches_kernel_explainer_on_the_log_odds(fitted):
+    import shap
+
+    model, X = fitted
+    background = X[:50]
+    explainer = LinearShapExplainer.from_model(model, background)
+    kernel = shap.KernelExplainer(model.decision_function, background)
+
+    # Five features, so nsamples covers every coalition and KernelSHAP is exact up to solver noise
+    expected = kernel.shap_values(X[100:105], nsamples=1000, silent=True)
+    np.testing.assert_allclose(explainer.shap_values(X[100:105]), expected, atol=1e-6)
+    np.testing.assert_allclose(explainer.expected_value, kernel.expected_value)
+
+def test_budgeted_kernel_explainer_rebuilds_from_summaries(fitted, caplog):
+    from src.explainers import BudgetedKernelExplainer
+
+    model, X = fitted
+    explainer = BudgetedKernelExplainer(model.predict_proba, X[:60], background_sizes=(5, 10),
+                                        default_background_size=5, default_nsamples=50)
+    summaries = explainer.summaries()
+    rebuilt = BudgetedKernelExplainer.from_summaries(model.predict_proba, X[:60], summaries, 5, 50)
+
+    assert "differs" not in caplog.text
+    assert rebuilt.background_sizes == explainer.background_sizes == [5, 10]
+    for size, (data, weights) in rebuilt.summaries().items():
+        np.testing.assert_allclose(data, summaries[size][0])
+        np.testing.assert_allclose(weights, summaries[size][1])
+    np.testing.assert_allclose(rebuilt.expected_value, explainer.expected_value)
+
+def test_budgeted_kernel_explainer_rejects_unknown_sizes(fitted):
+    from src.explainers import BudgetedKernelExplainer
+
+    model, X = fitted
+    explainer = BudgetedKernelExplainer(model.predict_proba, X[:60], background_sizes=(5,),
+                                        default_background_size=5, default_nsamples=50)
+    with pytest.raises(ValueError):
+        explainer.set_budget(7, 50)
+
+def test_budget_evaluation_times_every_row_and_picks_the_most_accurate(fitted):
+    from src.explainers import BudgetedKernelExplainer, choose_budget, evaluate_budgets, fastest_budget
+
+    model, X = fitted
+    explainer = BudgetedKernelExplainer(model.predict_proba, X[:60], background_sizes=(5, 10),
+                                        default_background_size=5, default_nsamples=50)
+    report = evaluate_budgets(explainer, X[100:130], nsamples_options=(20, 64), reference_nsamples=256,
+                              accuracy_rows=10)
+
+    assert (report["evaluated_rows"], report["accuracy_rows"]) == (30, 10)
+    assert [(b["background_size"], b["nsamples"]) for b in report["budgets"]] == [(5, 20), (5, 64), (10, 20), (10, 64)]
+    assert all(b["rows"] == 30 and b["latency_p99_ms"] >= b["latency_p50_ms"] for b in report["budgets"])
+    chosen = choose_budget(report, p99_target_ms=float('inf'))
+    assert chosen["relative_l1_error"] == min(b["relative_l1_error"] for b in report["budgets"])
+    assert choose_budget(report, p99_target_ms=0) is None
+    assert fastest_budget(report)["latency_p50_ms"] == min(b["latency_p50_ms"] for b in report["budgets"])
+
+def test_budgets_over_the_target_stop_after_the_probe(fitted):
+    from src.explainers import BudgetedKernelExplainer, choose_budget, evaluate_budgets
+
+    model, X = fitted
+    explainer = BudgetedKernelExplainer(model.predict_proba, X[:60], background_sizes=(5,),
+                                        default_background_size=5, default_nsamples=50)
+    report = evaluate_budgets(explainer, X[100:130], nsamples_options=(20,), reference_nsamples=64,
+                              accuracy_rows=5, p99_target_ms=0, probe_rows=8)
+
+    budget = report["budgets"][0]
+    assert budget["rows"] == 8 and budget["latency_p99_ms"] is None
+    assert choose_budget(report, p99_target_ms=0) is None
@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pytest
+
+from src.data_preprocessing import StartupDataProcessor
+from src.feature_cache import FeatureCache
+
+@pytest.fixture(scope="module")
+def processor(sample_frame) -> StartupDataProcessor:
+    return StartupDataProcessor().fit(sample_frame)
+
+def test_key_changes_with_rows_processor_state_and_label_rule(sample_frame, processor, tmp_path):
+    cache = FeatureCache(tmp_path)
+    key = cache.key(sample_frame, processor, 'status', 'acquired')
+
+    # Columns transform does not read and the index do not matter
+    assert cache.key(sample_frame.assign(name='x').reset_index(drop=True), processor, 'status', 'acquired') == key
+
+    edited = sample_frame.copy()
+    edited.loc[0, 'founded_year'] = edited.loc[0, 'founded_year'] + 1
+    assert cache.key(edited, processor, 'status', 'acquired') != key
+
+    refitted = StartupDataProcessor().fit(sample_frame.iloc[:1000])
+    assert cache.key(sample_frame, refitted, 'status', 'acquired') != key
+
+    assert cache.key(sample_frame, processor, 'status', 'closed') != key
+
+def test_miss_then_memory_mapped_hit(sample_frame, processor, tmp_path):
+    cache = FeatureCache(tmp_path)
+    X, y, hit = cache.transform(sample_frame, processor)
+    assert not hit
+
+    X_cached, y_cached, hit = cache.transform(sample_frame, processor)
+    assert hit
+    assert isinstance(X_cached, np.memmap) and isinstance(y_cached, np.memmap)
+    np.testing.assert_array_equal(X_cached, X)
+    np.testing.assert_array_equal(y_cached, (sample_frame['status'] == 'acquired').to_numpy())
+    # Only the finished entry is left, no staging directory
+    assert [path.name for path in tmp_path.iterdir()] == [cache.key(sample_frame, processor, 'status', 'acquired')]
+
+def test_failed_save_leaves_no_entry(tmp_path, monkeypatch):
+    cache = FeatureCache(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, 'save', fail)
+    with pytest.raises(OSError):
+        cache.save('key', np.zeros((2, 2)), np.zeros(2))
+    assert cache.load('key') is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_least_recently_used_entries_are_pruned(tmp_path):
+    cache = FeatureCache(tmp_path, max_entries=2)
+    for i, key in enumerate(('a', 'b')):
+        cache.save(key, np.full((2, 2), i), np.zeros(2))
+        os.utime(tmp_path / key, (1000 + i, 1000 + i))
+
+    # Reading a makes b the oldest entry
+    assert cache.load('a') is not None
+    cache.save('c', np.zeros((2, 2)), np.zeros(2))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a', 'c']
+    assert cache.load('b') is None
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from generate_sample_data import generate
+
+def test_status_shares_match_the_original_generator(sample_frame):
+    shares = sample_frame['status'].value_counts(normalize=True)
+
+    # Initial draw [0.08, 0.78, 0.14], then acquired for ~15% of pre-2010 rows and closed for 30% of the rest:
+    # ~11% acquired and ~35% closed
+    assert abs(shares['acquired'] - 0.11) < 0.03
+    assert abs(shares['closed'] - 0.35) < 0.03
+
+def test_output_is_latin1_and_independent_of_workers(tmp_path):
+    serial = generate(tmp_path / "serial.csv", n_rows=2500, seed=7, chunk_size=500)
+    parallel = generate(tmp_path / "parallel.csv", n_rows=2500, seed=7, chunk_size=500, workers=2)
+
+    assert (serial["rows"], serial["chunks"]) == (2500, 5)
+    assert (tmp_path / "serial.csv").read_bytes() == (tmp_path / "parallel.csv").read_bytes()
+    df = pd.read_csv(tmp_path / "serial.csv", encoding='latin-1')
+    assert len(df) == 2500 and df['name'].is_unique
+    assert serial["status_counts"].to_dict() == df['status'].value_counts().to_dict()
@@ -0,0 +1,90 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.metrics import Histogram, MetricsMiddleware, MetricsRegistry
+
+def test_histogram_counts_each_value_in_its_bucket():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    # Bounds are inclusive, the last slot is +Inf
+    assert histogram.snapshot() == ([2, 1, 1], 5.65, 4)
+
+def test_render_writes_cumulative_buckets_and_counters():
+    registry = MetricsRegistry('api', buckets=(0.1, 1.0))
+    registry.describe('stage_duration_seconds', 'Time per stage')
+    for seconds in (0.05, 0.5, 0.5, 5.0):
+        registry.observe('stage_duration_seconds', seconds, stage='inference')
+    registry.inc('requests_total', endpoint='/predict', status=200)
+    registry.inc('requests_total', amount=2, endpoint='/predict', status=200)
+
+    lines = registry.render().splitlines()
+    assert lines[:7] == [
+        '# HELP api_stage_duration_seconds Time per stage',
+        '# TYPE api_stage_duration_seconds histogram',
+        'api_stage_duration_seconds_bucket{stage="inference",le="0.1"} 1',
+        'api_stage_duration_seconds_bucket{stage="inference",le="1.0"} 3',
+        'api_stage_duration_seconds_bucket{stage="inference",le="+Inf"} 4',
+        'api_stage_duration_seconds_sum{stage="inference"} 6.05',
+        'api_stage_duration_seconds_count{stage="inference"} 4'
+    ]
+    # Counters without HELP text fall back to their name
+    assert lines[7:] == [
+        '# HELP api_requests_total requests_total',
+        '# TYPE api_requests_total counter',
+        'api_requests_total{endpoint="/predict",status="200"} 3'
+    ]
+
+def test_label_values_are_escaped_and_gauges_declared_once():
+    registry = MetricsRegistry('api')
+    registry.inc('errors_total', kind='say "hi"\\\n')
+    gauges = [('pool_running', 'gauge', {'pool': 'thread'}, 2), ('pool_running', 'gauge', {'pool': 'process'}, 0.5)]
+
+    text = registry.render(gauges)
+    assert 'api_errors_total{kind="say \\"hi\\"\\\\\\n"} 1\n' in text
+    assert text.count('# TYPE api_pool_running gauge') == 1
+    assert 'api_pool_running{pool="thread"} 2\n' in text
+    assert 'api_pool_running{pool="process"} 0.5\n' in text
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry('api', enabled=False)
+    registry.inc('requests_total')
+    with registry.time('stage_duration_seconds', stage='inference'):
+        pass
+
+    assert registry.render() == "\n"
+
+def test_middleware_labels_unknown_paths_as_other():
+    registry = MetricsRegistry('api')
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    client = TestClient(app)
+    client.get("/ping")
+    client.get("/scanner/probe-1")
+    client.get("/scanner/probe-2")
+
+    text = registry.render()
+    assert 'api_requests_total{endpoint="/ping",status="200"} 1\n' in text
+    assert 'api_requests_total{endpoint="other",status="404"} 2\n' in text
+    assert 'api_request_duration_seconds_count{endpoint="other"} 2\n' in text
+    assert 'probe' not in text
+
+def test_metrics_endpoint_serves_prometheus_text():
+    from app import app as api
+
+    client = TestClient(api.app)
+    client.get("/metrics")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    # The previous scrape is counted by the middleware
+    assert 'startup_api_requests_total{endpoint="/metrics",status="200"}' in response.text
+    assert '# TYPE startup_api_request_duration_seconds histogram' in response.text
+    assert '# TYPE startup_api_ready gauge' in response.text
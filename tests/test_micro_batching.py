@@ -0,0 +1,76 @@
+import asyncio
+import numpy as np
+import pytest
+
+from src.executors import BoundedExecutor
+from src.micro_batching import MicroBatcher
+
+class RecordingModel:
+    """
+    predict_proba stand-in: P(class 1) is the first feature, batch sizes are recorded
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        self.batch_sizes.append(len(X))
+        return np.column_stack([1.0 - X[:, 0], X[:, 0]])
+
+async def submit_all(batcher: MicroBatcher, n_rows: int):
+    rows = [np.array([i / n_rows, 0.0]) for i in range(n_rows)]
+    try:
+        return rows, await asyncio.gather(*[batcher.submit(row) for row in rows])
+    finally:
+        await batcher.stop()
+
+def test_concurrent_rows_share_one_call_and_get_their_own_output():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_proba, max_batch_size=64, max_wait_ms=20)
+    rows, outputs = asyncio.run(submit_all(batcher, 10))
+
+    assert model.batch_sizes == [10]
+    for row, output in zip(rows, outputs):
+        assert output[1] == row[0]
+    assert batcher.stats()["batches_run"] == 1
+    assert batcher.stats()["rows_scored"] == 10
+
+def test_batches_never_exceed_max_batch_size():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_proba, max_batch_size=4, max_wait_ms=20)
+    asyncio.run(submit_all(batcher, 10))
+
+    assert max(model.batch_sizes) <= 4
+    assert sum(model.batch_sizes) == 10
+
+def test_executor_backed_batches_run_on_the_pool():
+    model = RecordingModel()
+    executor = BoundedExecutor('test', 'thread', max_workers=2, max_queue=4)
+    try:
+        batcher = MicroBatcher(model.predict_proba, max_batch_size=64, max_wait_ms=20, executor=executor)
+        rows, outputs = asyncio.run(submit_all(batcher, 8))
+    finally:
+        executor.shutdown()
+
+    assert [output[1] for output in outputs] == [row[0] for row in rows]
+    assert executor.stats()["completed"] == 1
+
+def test_model_errors_reach_every_waiter():
+    def failing(X: np.ndarray) -> np.ndarray:
+        raise ValueError("model failed")
+
+    async def run():
+        batcher = MicroBatcher(failing, max_batch_size=8, max_wait_ms=20)
+        try:
+            return await asyncio.gather(*[batcher.submit(np.zeros(2)) for _ in range(3)], return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingModel().predict_proba, max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingModel().predict_proba, max_wait_ms=-1)
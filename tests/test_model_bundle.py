@@ -0,0 +1,96 @@
+import json
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+from src.data_preprocessing import StartupDataProcessor
+from src.explainers import BudgetedKernelExplainer, LinearShapExplainer
+from src.model_bundle import BUNDLES_DIR, LATEST_FILE, latest_bundle_dir, load_bundle, set_latest, write_bundle
+
+@pytest.fixture(scope="module")
+def trained(sample_frame):
+    import shap
+    import xgboost as xgb
+
+    processor = StartupDataProcessor().fit(sample_frame)
+    X = processor.transform(sample_frame)
+    y = (sample_frame['status'] == 'acquired').to_numpy(dtype=np.int64)
+    models = {
+        'logistic': LogisticRegression(max_iter=1000).fit(X, y),
+        'xgboost': xgb.XGBClassifier(n_estimators=20, max_depth=3, random_state=42).fit(X, y),
+        'svm': SVC(probability=True, random_state=42).fit(X[:400], y[:400])
+    }
+    background = X[:40]
+    explainers = {
+        'logistic': LinearShapExplainer.from_model(models['logistic'], background),
+        'xgboost': shap.TreeExplainer(models['xgboost']),
+        'svm': BudgetedKernelExplainer(models['svm'].predict_proba, background, background_sizes=(5, 10),
+                                       default_background_size=5, default_nsamples=50)
+    }
+    return processor, models, explainers, X
+
+@pytest.fixture
+def bundle_dir(trained, tmp_path):
+    processor, models, explainers, _ = trained
+    return write_bundle(tmp_path, processor, models, explainers)
+
+def test_bundle_round_trip_matches_the_pickled_objects(trained, bundle_dir, sample_frame):
+    processor, models, explainers, X = trained
+    bundle = load_bundle(bundle_dir)
+
+    assert latest_bundle_dir(bundle_dir.parent.parent) == bundle_dir
+    assert bundle.version == bundle_dir.name
+    assert bundle.feature_columns == processor.feature_columns
+    np.testing.assert_array_equal(bundle.preprocessor.transform(sample_frame), X)
+    for name, model in models.items():
+        np.testing.assert_allclose(bundle.models[name].predict_proba(X), model.predict_proba(X), atol=1e-6,
+                                   err_msg=name)
+    # Only the XGBoost booster is rebuilt as a model, the others serve through their scorers
+    assert bundle.models['xgboost'] is not bundle.scorers['xgboost']
+    assert bundle.models['logistic'] is bundle.scorers['logistic']
+    # Scorer arrays are views of the memory-mapped files, not copies
+    assert isinstance(bundle._arrays['models.svm.support_vectors'], np.memmap)
+    assert np.shares_memory(bundle.scorers['svm'].support_vectors, bundle._arrays['models.svm.support_vectors'])
+
+def test_bundle_rebuilds_every_explainer(trained, bundle_dir):
+    _, models, explainers, X = trained
+    bundle = load_bundle(bundle_dir)
+
+    assert sorted(bundle.explainer_names) == ['logistic', 'svm', 'xgboost']
+    np.testing.assert_allclose(bundle.explainer('logistic').shap_values(X[:5]), explainers['logistic'].shap_values(X[:5]))
+    np.testing.assert_allclose(bundle.explainer('xgboost').shap_values(X[:5]), explainers['xgboost'].shap_values(X[:5]),
+                               atol=1e-5)
+    svm = bundle.explainer('svm')
+    assert (svm.default_background_size, svm.default_nsamples) == (5, 50)
+    for size, (data, weights) in svm.summaries().items():
+        np.testing.assert_allclose(data, explainers['svm'].summaries()[size][0])
+        np.testing.assert_allclose(weights, explainers['svm'].summaries()[size][1])
+    # Built once, then reused
+    assert bundle.explainer('svm') is svm
+
+def test_tampered_array_fails_verification(bundle_dir):
+    manifest = json.loads((bundle_dir / 'manifest.json').read_text())
+    path = bundle_dir / manifest["arrays"]["models.logistic.coef"]["file"]
+    coef = np.load(path)
+    np.save(path, coef + 1.0)
+
+    with pytest.raises(ValueError, match="hash"):
+        load_bundle(bundle_dir)
+    # Skipping verification loads the altered array as is
+    np.testing.assert_array_equal(load_bundle(bundle_dir, verify=False).scorers['logistic'].coef, coef + 1.0)
+
+def test_latest_pointer_follows_set_latest(trained, tmp_path):
+    processor, models, explainers, _ = trained
+    assert latest_bundle_dir(tmp_path) is None
+
+    first = write_bundle(tmp_path, processor, {'logistic': models['logistic']}, {})
+    second = write_bundle(tmp_path, processor, models, explainers)
+    assert latest_bundle_dir(tmp_path) == second
+    set_latest(tmp_path, first.name)
+    assert latest_bundle_dir(tmp_path) == first
+    assert (tmp_path / BUNDLES_DIR / LATEST_FILE).read_text().strip() == first.name
+    with pytest.raises(FileNotFoundError):
+        set_latest(tmp_path, 'missing-version')
+    # No staging directories are left behind
+    assert sorted(path.name for path in (tmp_path / BUNDLES_DIR).iterdir()) == sorted([first.name, second.name, LATEST_FILE])
@@ -0,0 +1,95 @@
+"""
+Parity of the native NumPy scorers with the predict_proba of the models they are compiled from
+"""
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+from src.model_export import (KernelSVMScorer, LinearScorer, TreeEnsembleScorer, check_parity, compile_model,
+                              load_scorer, predict_proba_native, save_scorer)
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(600, 6))
+    y = (X[:, 0] - 0.5 * X[:, 1] + X[:, 2] * X[:, 3] + rng.normal(scale=0.5, size=600) > 0).astype(int)
+    return X, y
+
+@pytest.fixture(scope="module")
+def xgboost_model(data):
+    import xgboost as xgb
+
+    X, y = data
+    X = X.copy()
+    # Missing values at training time give the splits learned default directions
+    X[::7, 0] = np.nan
+    X[::11, 2] = np.nan
+    return xgb.XGBClassifier(n_estimators=30, max_depth=4, learning_rate=0.3, random_state=42).fit(X, y)
+
+def test_linear_scorer_matches_logistic_regression(data):
+    X, y = data
+    model = LogisticRegression().fit(X, y)
+    scorer = compile_model(model)
+
+    assert isinstance(scorer, LinearScorer)
+    assert check_parity(model, scorer, X, atol=1e-12) <= 1e-12
+
+def test_tree_scorer_matches_xgboost_including_missing_values(data, xgboost_model):
+    X, _ = data
+    X = X.copy()
+    X[::5, 0] = np.nan
+    X[::3, 2] = np.nan
+    X[1::4, 3] = np.nan
+    scorer = compile_model(xgboost_model)
+
+    assert isinstance(scorer, TreeEnsembleScorer)
+    assert not scorer.default_left.all()
+    # Below max_native_rows the native scorer answers, chunks included
+    scorer.chunk_size = 64
+    check_parity(xgboost_model, scorer, X, atol=1e-6)
+
+def test_tree_scorer_falls_back_to_xgboost_above_max_native_rows(data, xgboost_model):
+    X, _ = data
+    scorer = compile_model(xgboost_model)
+    calls = []
+
+    class RecordingModel:
+        def predict_proba(self, X):
+            calls.append(len(X))
+            return xgboost_model.predict_proba(X)
+
+    n = scorer.max_native_rows
+    np.testing.assert_allclose(predict_proba_native(scorer, RecordingModel(), X[:n]),
+                               xgboost_model.predict_proba(X[:n]), atol=1e-6)
+    assert calls == []
+    predict_proba_native(scorer, RecordingModel(), X[:n + 1])
+    assert calls == [n + 1]
+
+def test_kernel_svm_scorer_replays_libsvm_platt_probabilities(data):
+    X, y = data
+    model = SVC(kernel='rbf', probability=True, random_state=42).fit(X[:300], y[:300])
+    scorer = compile_model(model)
+
+    assert isinstance(scorer, KernelSVMScorer)
+    np.testing.assert_allclose(scorer.decision_function(X), -model.decision_function(X), atol=1e-8)
+    check_parity(model, scorer, X, atol=1e-6)
+
+def test_scorers_survive_a_save_load_round_trip(data, xgboost_model, tmp_path):
+    X, y = data
+    for name, model in (('logistic', LogisticRegression().fit(X, y)), ('xgboost', xgboost_model),
+                        ('svm', SVC(probability=True, random_state=42).fit(X[:200], y[:200]))):
+        scorer = compile_model(model)
+        path = tmp_path / f"{name}.npz"
+        save_scorer(scorer, str(path))
+        loaded = load_scorer(str(path))
+
+        assert type(loaded) is type(scorer)
+        np.testing.assert_array_equal(loaded.predict_proba(X[:50]), scorer.predict_proba(X[:50]))
+
+def test_unsupported_models_are_rejected(data):
+    X, y = data
+    with pytest.raises(TypeError):
+        compile_model(object())
+    with pytest.raises(ValueError):
+        compile_model(SVC(kernel='linear', probability=True).fit(X[:100], y[:100]))
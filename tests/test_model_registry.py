@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+
+from src.model_registry import ModelRegistry, ModelSnapshot
+
+def snapshot(version: str) -> ModelSnapshot:
+    return ModelSnapshot(version, {'logistic': object()}, None, [], {}, {}, {'explainers': {}})
+
+def test_activate_returns_the_replaced_snapshot():
+    registry = ModelRegistry()
+    first, second = snapshot('v1'), snapshot('v2')
+
+    assert registry.activate(first, 1.0) is None
+    assert registry.activate(second, 2.0, 'admin') is first
+    assert registry.active is second
+    assert [entry["replaced"] for entry in registry.history] == [None, 'v1']
+    assert registry.history[-1]["trigger"] == 'admin'
+
+def test_acquire_pins_the_snapshot_across_a_swap():
+    registry = ModelRegistry()
+    first = snapshot('v1')
+    registry.activate(first)
+
+    with registry.acquire() as pinned:
+        registry.activate(snapshot('v2'))
+        assert pinned is first
+        assert first.in_flight == 1
+    assert first.in_flight == 0
+
+def test_acquire_without_an_active_snapshot_fails():
+    with pytest.raises(LookupError):
+        with ModelRegistry().acquire():
+            pass
+
+def test_retire_waits_for_in_flight_requests_before_closing():
+    registry = ModelRegistry()
+    first = snapshot('v1')
+    registry.activate(first)
+    events = []
+
+    async def close(retired):
+        events.append(('closed', retired.version))
+
+    async def run():
+        with registry.acquire():
+            registry.activate(snapshot('v2'))
+            retirement = asyncio.ensure_future(registry.retire(first, close, timeout=5))
+            await asyncio.sleep(0.05)
+            assert events == [] and registry.retiring == [first]
+            events.append(('released', first.version))
+        await retirement
+
+    asyncio.run(run())
+    assert events == [('released', 'v1'), ('closed', 'v1')]
+    assert registry.retiring == []
+
+def test_retire_closes_after_the_timeout_when_requests_hang():
+    registry = ModelRegistry()
+    first = snapshot('v1')
+    registry.activate(first)
+    closed = []
+
+    async def close(retired):
+        closed.append(retired.in_flight)
+
+    async def run():
+        with registry.acquire():
+            await registry.retire(first, close, timeout=0.05)
+
+    asyncio.run(run())
+    # Closed while the request still held it
+    assert closed == [1]
+
+def test_reports_belong_to_each_snapshot():
+    first, second = snapshot('v1'), snapshot('v2')
+    first.artifacts['model:logistic'] = {"status": "loaded"}
+    first.warmup['logistic'] = {"seconds": 0.1}
+
+    assert second.artifacts == {} and second.warmup == {}
@@ -0,0 +1,38 @@
+from src.name_index import NameIndex
+
+CITIES = ['San Francisco', 'San Diego', 'San Jose', 'Santa Monica', 'Seattle', 'Boston', 'New York', 'Newark']
+
+def test_exact_lookup_is_case_insensitive():
+    index = NameIndex(CITIES)
+    assert index.exact('san francisco') == 'San Francisco'
+    assert index.exact('BOSTON') == 'Boston'
+    assert index.exact('Bostn') is None
+
+def test_prefix_returns_a_page_in_key_order_and_the_total():
+    index = NameIndex(CITIES)
+    assert index.prefix('san') == (['San Diego', 'San Francisco', 'San Jose', 'Santa Monica'], 4)
+    assert index.prefix('SAN ', limit=2) == (['San Diego', 'San Francisco'], 3)
+    assert index.prefix('san ', limit=2, offset=2) == (['San Jose'], 3)
+    assert index.prefix('san', offset=10) == ([], 4)
+    assert index.prefix('zz') == ([], 0)
+
+def test_fuzzy_ranks_by_trigram_similarity():
+    index = NameIndex(CITIES)
+    best, similarity = index.fuzzy('San Fransisco')[0]
+    assert best == 'San Francisco'
+    assert 0.6 <= similarity < 1.0
+    assert index.fuzzy('San Francisco')[0] == ('San Francisco', 1.0)
+    assert index.fuzzy('qqqq') == []
+
+def test_normalize_only_goes_fuzzy_when_asked():
+    index = NameIndex(CITIES)
+    assert index.normalize('new york') == 'New York'
+    assert index.normalize('Bostn', min_similarity=0.5) == 'Boston'
+    assert index.normalize('Bostn', min_similarity=None) == 'Bostn'
+    assert index.normalize('Timbuktu', min_similarity=0.6) == 'Timbuktu'
+    assert index.normalize('') == ''
+
+def test_names_differing_in_case_collapse_to_the_last_one():
+    index = NameIndex(['boston', 'Boston'])
+    assert len(index) == 1
+    assert index.exact('BOSTON') == 'Boston'
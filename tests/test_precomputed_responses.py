@@ -0,0 +1,43 @@
+from starlette.requests import Request
+
+from src.precomputed_responses import GZIP_MIN_BYTES, PrecomputedResponse
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace('_', '-').lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/regions", "headers": raw})
+
+LARGE = {"regions": [f"Region {i}" for i in range(GZIP_MIN_BYTES // 4)]}
+
+def test_body_is_serialized_once_with_a_strong_etag():
+    precomputed = PrecomputedResponse({"categories": ["software", "web"]})
+    response = precomputed.respond(make_request())
+
+    assert response.status_code == 200
+    assert response.body == b'{"categories":["software","web"]}'
+    assert response.headers["etag"] == precomputed.etag
+    assert not precomputed.etag.startswith('W/')
+    # Small bodies are never compressed
+    assert precomputed.gzip_body is None
+
+def test_matching_if_none_match_gets_an_empty_304():
+    precomputed = PrecomputedResponse(LARGE)
+    for tag in (precomputed.etag, f'W/{precomputed.etag}', f'"other", {precomputed.gzip_etag}', '*'):
+        response = precomputed.respond(make_request(if_none_match=tag))
+        assert response.status_code == 304, tag
+        assert response.body == b""
+    assert precomputed.respond(make_request(if_none_match='"other"')).status_code == 200
+
+def test_gzip_copy_has_its_own_etag():
+    import gzip
+
+    precomputed = PrecomputedResponse(LARGE)
+    response = precomputed.respond(make_request(accept_encoding="gzip, br"))
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == precomputed.gzip_etag != precomputed.etag
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body) == precomputed.body
+
+def test_same_content_gives_the_same_etag():
+    assert PrecomputedResponse(LARGE).gzip_etag == PrecomputedResponse(dict(LARGE)).gzip_etag
+    assert PrecomputedResponse({"a": 1}).etag != PrecomputedResponse({"a": 2}).etag
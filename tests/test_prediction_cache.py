@@ -0,0 +1,57 @@
+import numpy as np
+
+from src import prediction_cache
+from src.prediction_cache import PredictionCache
+
+def key(value: float):
+    return PredictionCache.make_key('predict', 'xgboost', 'v1', np.array([value, 1.0]))
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put(key(1), 'a')
+    cache.put(key(2), 'b')
+    # Reading 1 makes 2 the least recently used
+    assert cache.get(key(1)) == 'a'
+    cache.put(key(3), 'c')
+
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1)) == 'a'
+    assert cache.get(key(3)) == 'c'
+    stats = cache.stats()
+    assert (stats["size"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    cache.put(key(1), 'a')
+
+    now[0] += 4
+    assert cache.get(key(1)) == 'a'
+    now[0] += 2
+    assert cache.get(key(1)) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+def test_keys_separate_models_versions_and_features():
+    features = np.array([0.5, 1.0])
+    base = PredictionCache.make_key('predict', 'xgboost', 'v1', features)
+
+    assert base == PredictionCache.make_key('predict', 'xgboost', 'v1', features.astype(np.float32))
+    assert base != PredictionCache.make_key('predict', 'svm', 'v1', features)
+    assert base != PredictionCache.make_key('predict', 'xgboost', 'v2', features)
+    assert base != PredictionCache.make_key('explain', 'xgboost', 'v1', features)
+    assert base != PredictionCache.make_key('predict', 'xgboost', 'v1', np.array([0.5, 0.0]))
+
+def test_zero_size_disables_the_cache():
+    cache = PredictionCache(max_entries=0)
+    cache.put(key(1), 'a')
+    assert not cache.enabled
+    assert cache.get(key(1)) is None
+    assert cache.stats()["misses"] == 0
+
+def test_clear_drops_every_entry():
+    cache = PredictionCache(max_entries=10)
+    cache.put(key(1), 'a')
+    cache.clear()
+    assert cache.get(key(1)) is None
@@ -0,0 +1,67 @@
+import asyncio
+import pstats
+
+from src.profiling import ProfilingMiddleware, list_profiles, load_profile
+
+TOKEN = "secret"
+
+def work_in_request() -> int:
+    return sum(range(1000))
+
+def work_elsewhere() -> int:
+    return sum(range(1000))
+
+async def app(scope, receive, send):
+    work_in_request()
+    await asyncio.sleep(0.02)
+    work_in_request()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+def request(token: str = TOKEN):
+    return {"type": "http", "path": "/predict", "query_string": b"",
+            "headers": [(b"x-profile", b"1"), (b"x-profile-token", token.encode())]}
+
+async def call(middleware, scope):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, None, send)
+    return messages
+
+def profiled_functions(output_dir):
+    profile_id = list_profiles(output_dir)[0]
+    stats = pstats.Stats(str(output_dir / f"{profile_id}.prof"))
+    return {function for _, _, function in stats.stats}
+
+def test_only_the_profiled_request_is_measured(tmp_path):
+    middleware = ProfilingMiddleware(app, TOKEN, tmp_path)
+
+    async def other_traffic():
+        for _ in range(20):
+            work_elsewhere()
+            await asyncio.sleep(0.001)
+
+    async def run():
+        messages, _ = await asyncio.gather(call(middleware, request()), other_traffic())
+        return messages
+
+    messages = asyncio.run(run())
+    headers = dict(messages[0]["headers"])
+    assert messages[0]["status"] == 200
+    assert b"x-profile-id" in headers
+
+    functions = profiled_functions(tmp_path)
+    assert "work_in_request" in functions
+    assert "work_elsewhere" not in functions
+    assert "work_in_request" in load_profile(tmp_path, headers[b"x-profile-id"].decode())
+
+def test_wrong_token_is_rejected(tmp_path):
+    messages = asyncio.run(call(ProfilingMiddleware(app, TOKEN, tmp_path), request("wrong")))
+    assert messages[0]["status"] == 403
+    assert list_profiles(tmp_path) == []
+
+def test_unknown_profile_ids_are_not_read(tmp_path):
+    assert load_profile(tmp_path, "../secrets") is None
@@ -0,0 +1,11 @@
+import json
+
+from train_models import stale_reason, training_record_path
+
+def test_pickles_are_only_reused_with_a_matching_training_record(tmp_path):
+    assert stale_reason(tmp_path, 'svm', 'abc') == "no training record"
+
+    training_record_path(tmp_path, 'svm').write_text(json.dumps({"data_key": "abc"}))
+    assert training_record_path(tmp_path, 'svm').name == 'svm_rbf_best.json'
+    assert stale_reason(tmp_path, 'svm', 'abc') is None
+    assert "trained on features abc" in stale_reason(tmp_path, 'svm', 'def')